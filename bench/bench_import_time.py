@@ -0,0 +1,83 @@
+"""
+导入耗时基准测试。
+
+用 python -X importtime 多次导入指定模块（默认为 main），解析 stderr 中的输出，
+打印累计导入耗时的中位数、耗时最多的模块，以及可选依赖（notifier、filler 等）是否被导入。
+
+用法（在仓库根目录运行）：
+    python bench/bench_import_time.py [--module main] [--runs 10] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+# -X importtime 输出的格式：import time: self [us] | cumulative | imported package
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+# 冷启动时不应被导入的模块；只有配置了相应功能时才应导入
+SHOULD_BE_LAZY = (
+    'argparse',
+    'html',
+    'sqlite3',
+    'configparser',
+    'bupt_ncov_report.notifier.telegram',
+    'bupt_ncov_report.notifier.server_chan',
+    'bupt_ncov_report.recorder.history',
+    'kv_config_reader.filler.ini_filler',
+    'kv_config_reader.filler.json_filler',
+    'kv_config_reader.roster.roster',
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(module: str) -> Tuple[Dict[str, Tuple[int, int]], Set[str]]:
+    """
+    在新的解释器中导入 module 一次。
+    :return: 元组。第一项为 dict，键为模块名，值为 (自身耗时, 累计耗时)，单位为微秒；第二项为导入后 sys.modules 中的模块名
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import sys, {module}; print("\\n".join(sys.modules))'],
+        cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True,
+    )
+
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match is not None:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+
+    return timings, set(proc.stdout.split())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='导入耗时基准测试')
+    parser.add_argument('--module', default='main', help='要导入的模块')
+    parser.add_argument('--runs', type=int, default=10, help='运行次数')
+    parser.add_argument('--top', type=int, default=15, help='显示累计耗时最多的模块数')
+    args = parser.parse_args()
+
+    runs: List[Tuple[Dict[str, Tuple[int, int]], Set[str]]] = [run_once(args.module) for _ in range(args.runs)]
+    totals = [timings[args.module][1] for timings, _modules in runs]
+
+    print(f'导入 {args.module}，共 {args.runs} 次：')
+    print(f'  累计耗时中位数：{statistics.median(totals) / 1000:.2f} ms'
+          f'（最小 {min(totals) / 1000:.2f} ms，最大 {max(totals) / 1000:.2f} ms）')
+
+    last_timings, last_modules = runs[-1]
+    print(f'\n累计耗时最多的 {args.top} 个模块（最后一次运行）：')
+    for name, (_self_us, cumulative_us) in sorted(last_timings.items(), key=lambda x: -x[1][1])[:args.top]:
+        print(f'  {cumulative_us / 1000:8.2f} ms  {name}')
+
+    print('\n应按需导入的模块：')
+    for name in SHOULD_BE_LAZY:
+        print(f'  {"已导入" if name in last_modules else "未导入"}  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+looks_falsy 微基准测试。
+
+对上报数据中常见的值（'0'、'1'、0、1、'' 等），比较 PureUtils.looks_falsy（带快速路径）
+与其通用实现 PureUtils._looks_falsy_generic 的耗时。
+
+用法（在仓库根目录运行）：
+    python bench/bench_looks_falsy.py [--number 200000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bupt_ncov_report.pure_utils import *  # noqa: E402
+
+# 上报数据的二值属性中实际出现的值
+VALUES = ('0', '1', 0, 1, '', 'false', None, [0])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='looks_falsy 微基准测试')
+    parser.add_argument('--number', type=int, default=200000, help='每个值的调用次数')
+    args = parser.parse_args()
+
+    print(f'{"值":>10}  {"通用实现":>12}  {"快速路径":>12}  加速比')
+    for value in VALUES:
+        generic_ns = timeit.timeit(
+            lambda: PureUtils._looks_falsy_generic(value), number=args.number) / args.number * 1e9
+        fast_ns = timeit.timeit(lambda: PureUtils.looks_falsy(value), number=args.number) / args.number * 1e9
+        print(f'{value!r:>10}  {generic_ns:9.1f} ns  {fast_ns:9.1f} ns  {generic_ns / fast_ns:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
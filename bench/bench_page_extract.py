@@ -0,0 +1,64 @@
+"""
+上报页面提取基准测试。
+
+比较两种从上报页面提取上报参数的方式：
+- 文本：先把整个页面解码为 str（相当于 Response.text），再用正则表达式提取；
+- 字节：直接在 UTF-8 字节串（相当于 Response.content）中查找，只解码 def 与 oldInfo 两段 JSON。
+输出每次提取的 CPU 时间，以及 tracemalloc 统计的内存分配峰值。
+
+页面在测试页面的基础上填充中文内容，以接近真实页面的大小。
+
+用法（在仓库根目录运行）：
+    python bench/bench_page_extract.py [--number 2000] [--padding 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bupt_ncov_report._test.constant import REPORT_PAGE_HTML  # noqa: E402
+from bupt_ncov_report.program_utils import *  # noqa: E402
+from bupt_ncov_report.pure_utils import *  # noqa: E402
+
+
+def measure(func: Callable[[], object], number: int) -> None:
+    start = time.process_time()
+    for _ in range(number):
+        func()
+    cpu_us = (time.process_time() - start) / number * 1e6
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'  CPU 时间 {cpu_us:9.1f} us/次    分配峰值 {peak / 1024:8.1f} KiB')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='上报页面提取基准测试')
+    parser.add_argument('--number', type=int, default=2000, help='每种方式的调用次数')
+    parser.add_argument('--padding', type=int, default=2000, help='在页面中填充多少行中文内容')
+    args = parser.parse_args()
+
+    padding = '<p>每日上报：请如实填写您的健康状况。</p>\n' * args.padding
+    html = REPORT_PAGE_HTML.replace('<script', f'{padding}<script', 1)
+    content = html.encode('utf-8')
+    print(f'页面大小 {len(content) / 1024:.1f} KiB')
+
+    util = ProgramUtils(PureUtils())
+
+    print('文本（解码整个页面 + 正则表达式）：')
+    measure(lambda: util.extract_post_data(content.decode('utf-8')), args.number)
+
+    print('字节（只解码两段 JSON）：')
+    measure(lambda: util.extract_post_data_from_bytes(content), args.number)
+
+
+if __name__ == '__main__':
+    main()
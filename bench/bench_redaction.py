@@ -0,0 +1,90 @@
+"""
+日志脱敏基准测试。
+
+模拟批量上报：与 Program 相同，逐个账号把其 3 个秘密加入进程共用的 Redactor（scoped_secrets），
+在该账号运行期间处理典型的日志消息（含完整上报参数的 DEBUG 日志、普通 INFO 日志），账号结束后移除其秘密。
+打印整批的总耗时与每条消息的平均耗时，并与以下两种做法对比：
+
+- 累积：秘密加入后不再移除（旧的做法），每个账号都要重新编译含此前所有秘密的正则表达式，总耗时随账号数平方增长；
+- 逐个 str.replace：每个秘密单独调用一次 str.replace，且不处理敏感字段。
+
+用法（在仓库根目录运行）：
+    python bench/bench_redaction.py [--accounts 200] [--messages 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bupt_ncov_report._test.constant.post_data import POST_DATA_FINAL  # noqa: E402
+from bupt_ncov_report.redactor import *  # noqa: E402
+
+
+def account_secrets(i: int) -> List[str]:
+    return [f'password-{i:06d}', f'{i:010d}:telegram-bot-token', f'SCU{i:08d}sckey']
+
+
+def naive_redact(secrets, text: str) -> str:
+    for secret in secrets:
+        text = text.replace(secret, REDACTED)
+    return text
+
+
+def run_batch(accounts: int, messages: int, text: str, redact_account: Callable[[int, str], None]) -> float:
+    """逐个账号处理 messages 条消息，返回整批的耗时（秒）。"""
+    start = time.perf_counter()
+    for i in range(accounts):
+        for _ in range(messages):
+            redact_account(i, text)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='日志脱敏基准测试')
+    parser.add_argument('--accounts', type=int, default=200, help='账号数；每个账号有 3 个秘密')
+    parser.add_argument('--messages', type=int, default=20, help='每个账号处理的每种消息的条数')
+    args = parser.parse_args()
+
+    messages = {
+        '上报参数（DEBUG）': f'最终提交参数：{json.dumps(POST_DATA_FINAL)}',
+        '普通日志（INFO）': '通过「Telegram 机器人」给用户发送通知',
+    }
+    total = args.accounts * args.messages
+
+    print(f'{args.accounts} 个账号，每个账号 3 个秘密，每个账号处理 {args.messages} 条消息')
+    for name, text in messages.items():
+        scoped = Redactor()
+
+        def redact_scoped(i: int, message: str) -> None:
+            with scoped.scoped_secrets(account_secrets(i)):
+                scoped.redact(message)
+
+        accumulated = Redactor()
+
+        def redact_accumulated(i: int, message: str) -> None:
+            accumulated.add_secrets(account_secrets(i))
+            accumulated.redact(message)
+
+        naive_secrets: List[str] = []
+
+        def redact_naive(i: int, message: str) -> None:
+            naive_secrets.extend(account_secrets(i))
+            naive_redact(naive_secrets, message)
+
+        print(f'  {name}（{len(text)} 字符）：')
+        for label, redact_account in (
+                ('Redactor（逐个账号 scoped_secrets）', redact_scoped),
+                ('Redactor（秘密累积不移除）', redact_accumulated),
+                ('逐个 str.replace（秘密累积）', redact_naive),
+        ):
+            seconds = run_batch(args.accounts, args.messages, text, redact_account)
+            print(f'    {label}：共 {seconds * 1000:9.2f} ms，{seconds / total * 1e6:8.2f} us/条')
+
+
+if __name__ == '__main__':
+    main()
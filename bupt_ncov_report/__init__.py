@@ -1,6 +1,112 @@
-from .constant import *
-from .notifier import *
-from .predef import *
-from .program import *
-from .program_utils import *
-from .pure_utils import *
+import sys
+from typing import TYPE_CHECKING
+
+from ._util import install_lazy_exports
+
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    from .constant import *
+    from .lru_cache import *
+    from .metrics import *
+    from .notifier import *
+    from .preconnect import *
+    from .predef import *
+    from .program import *
+    from .process_pool import *
+    from .program_utils import *
+    from .pure_utils import *
+    from .recorder import *
+    from .redactor import *
+    from .session_pool import *
+    from .sharding import *
+    from .status_table import *
+    from .work_queue import *
+else:
+    # 按需导入，以缩短冷启动时间；见 install_lazy_exports
+    install_lazy_exports(globals(), {
+        'LOGIN_API': '.constant',
+        'REPORT_PAGE': '.constant',
+        'REPORT_API': '.constant',
+        'REASONABLE_LENGTH': '.constant',
+        'TIMEOUT_SECOND': '.constant',
+        'HEADERS': '.constant',
+        'PHASE': '.constant',
+        'BEIJING_TZ': '.constant',
+
+        'LruCache': '.lru_cache',
+
+        'PHASE_BUCKETS': '.metrics.metrics',
+        'Metrics': '.metrics.metrics',
+        'MetricsServer': '.metrics.server',
+
+        'INotifier': '.notifier.base',
+        'ServerChanNotifier': '.notifier.server_chan',
+        'TelegramNotifier': '.notifier.telegram',
+
+        'DnsCache': '.preconnect',
+        'DnsCachingAdapter': '.preconnect',
+        'preconnect': '.preconnect',
+
+        'ConfigValue': '.predef',
+        'VerifiedData': '.predef',
+
+        'ProgramConfig': '.program.config',
+        'NOTIFY': '.program.deadline',
+        'NOTIFY_GRACE_SECONDS': '.program.deadline',
+        'DEFAULT_BUDGETS': '.program.deadline',
+        'DeadlineExceeded': '.program.deadline',
+        'Deadline': '.program.deadline',
+        'Program': '.program.program',
+        'RetryPolicy': '.program.retry',
+
+        'TaskOutcome': '.process_pool',
+        'ProcessPool': '.process_pool',
+        'current_rss': '.process_pool',
+
+        'ProgramUtils': '.program_utils',
+        'DataRule': '.program_utils',
+        'DEFAULT_RULES': '.program_utils',
+        'CheckResult': '.program_utils',
+        'DataChecker': '.program_utils',
+        'load_rules': '.program_utils',
+        'PageLayout': '.program_utils',
+        'LayoutCache': '.program_utils',
+        'NEW_DATA_MARKER': '.program_utils',
+        'OLD_DATA_MARKER': '.program_utils',
+        'find_object_slice': '.program_utils',
+        'scan_page_layout': '.program_utils',
+
+        'PureUtils': '.pure_utils',
+
+        'RunOutcome': '.recorder.base',
+        'IRecorder': '.recorder.base',
+        'beijing_date': '.recorder.base',
+        'beijing_now': '.recorder.base',
+        'ResultHistory': '.recorder.history',
+        'JsonlResultSink': '.recorder.jsonl_sink',
+        'hash_user': '.recorder.jsonl_sink',
+
+        'SENSITIVE_FIELDS': '.redactor',
+        'REDACTED': '.redactor',
+        'MIN_SECRET_LENGTH': '.redactor',
+        'Redactor': '.redactor',
+        'RedactionFilter': '.redactor',
+        'get_redactor': '.redactor',
+
+        'SessionPool': '.session_pool',
+        'TimeWindow': '.session_pool',
+
+        'jump_hash': '.sharding',
+        'shard_of': '.sharding',
+        'ShardSpec': '.sharding',
+
+        'QUEUED': '.status_table',
+        'FAILED': '.status_table',
+        'SKIPPED': '.status_table',
+        'SLOT_STATES': '.status_table',
+        'StatusTable': '.status_table',
+        'format_progress': '.status_table',
+
+        'Lease': '.work_queue',
+        'DeadLetter': '.work_queue',
+        'WorkQueue': '.work_queue',
+    })
@@ -8,6 +8,9 @@ __all__ = (
 import json
 from typing import Any, Dict, List, MutableMapping, NamedTuple, Optional, Tuple
 
+import requests.utils
+from requests.structures import CaseInsensitiveDict
+
 
 class RequestHistory(NamedTuple):
     """
@@ -22,6 +25,7 @@ class RequestHistory(NamedTuple):
     url: str
     data: Optional[Dict[str, Any]]
     json: Optional[Dict[str, Any]]
+    timeout: Optional[float] = None
 
 
 class MockResponse(NamedTuple):
@@ -33,6 +37,25 @@ class MockResponse(NamedTuple):
     status_code: int
     text: str
     url: str
+    content_type: str = 'text/html; charset=utf-8'
+
+    @property
+    def content(self) -> bytes:
+        """text 属性的 UTF-8 编码。"""
+        return self.text.encode('utf-8')
+
+    @property
+    def headers(self) -> 'CaseInsensitiveDict[str]':
+        return CaseInsensitiveDict({'Content-Type': self.content_type})
+
+    @property
+    def encoding(self) -> Optional[str]:
+        """与 requests 相同，由 Content-Type 得出；text/* 未声明 charset 时为 ISO-8859-1。"""
+        return requests.utils.get_encoding_from_headers(self.headers)
+
+    @property
+    def apparent_encoding(self) -> str:
+        return 'utf-8'
 
     def json(self) -> Dict[str, Any]:
         """
@@ -65,11 +88,17 @@ class MockWhenWrapper:
         self._url = url
         self._action = action
 
-    def respond(self, *, status_code: int = 200, text: str = '', url: Optional[str] = None):
+    def respond(
+            self, *,
+            status_code: int = 200,
+            text: str = '',
+            url: Optional[str] = None,
+            content_type: str = 'text/html; charset=utf-8',
+    ):
         if url is None:
             url = self._url
 
-        self._resp[self._action, self._url] = MockResponse(status_code, text, url)
+        self._resp[self._action, self._url] = MockResponse(status_code, text, url, content_type)
 
 
 class MockRequestsSession:
@@ -108,9 +137,9 @@ class MockRequestsSession:
 
         return self._history[-1]
 
-    def get(self, url, *args, **kwargs):
+    def get(self, url, *args, timeout=None, **kwargs):
         """模拟的 get 方法。该方法会记录调用历史。"""
-        self._history.append(RequestHistory('get', url, None, None))
+        self._history.append(RequestHistory('get', url, None, None, timeout))
 
         resp = self._resp.get(('get', url))
         if resp is None:
@@ -118,9 +147,9 @@ class MockRequestsSession:
 
         return resp
 
-    def post(self, url, data=None, json=None, *args, **kwargs):
+    def post(self, url, data=None, json=None, *args, timeout=None, **kwargs):
         """模拟的 post 方法。该方法会记录调用历史。"""
-        self._history.append(RequestHistory('post', url, data, json))
+        self._history.append(RequestHistory('post', url, data, json, timeout))
 
         resp = self._resp.get(('post', url))
         if resp is None:
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+
+from bupt_ncov_report._test.constant import *
+from bupt_ncov_report.program_utils import *
+from bupt_ncov_report.pure_utils import *
+
+
+class Test_DataChecker(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.checker = DataChecker(DEFAULT_RULES, PureUtils())
+
+    def test_check_normal(self):
+        result = self.checker.check(POST_DATA_FINAL)
+        self.assertFalse(result.broken)
+        self.assertFalse(result.sick)
+
+    def test_check_brokenAndSick(self):
+        """一次检查同时得出破损的原因与生病的项；破损的属性不参与生病检查"""
+        data = POST_DATA_FINAL.copy()
+        del data['remark']
+        data['tw'] = 11
+        data['sfjcbh'] = 1
+
+        result = self.checker.check(data)
+        self.assertEqual(2, len(result.broken_reasons))
+        self.assertEqual(['「是否接触感染人群」，您填了「是」'], result.sick_reasons)
+
+    def test_check_sharedMessageOnce(self):
+        """sfsfbh 与 ismoved 的提示相同，只出现一次"""
+        data = POST_DATA_FINAL.copy()
+        data['sfsfbh'] = 1
+        data['ismoved'] = 1
+
+        self.assertEqual(1, len(self.checker.check(data).sick_reasons))
+
+    def test_init_badRule(self):
+        for rule in (
+                DataRule('tw', 'float'),
+                DataRule('tw', 'number'),
+                DataRule('tw', 'number', (1, 10), 'hot'),
+                DataRule('remark', 'any', None, '> 3'),
+        ):
+            with self.assertRaises(ValueError, msg=str(rule)) as _asRa:
+                DataChecker([rule], PureUtils())
+
+
+class Test_LoadRules(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rules_fd, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(rules_fd)
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+
+    def write(self, rules) -> None:
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f, ensure_ascii=False)
+
+    def test_loadRules_roundTrip(self):
+        self.write([rule._asdict() for rule in DEFAULT_RULES])
+        self.assertEqual(DEFAULT_RULES, load_rules(self.path))
+
+    def test_loadRules_changeRules(self):
+        """修改规则文件即可改变检查结果"""
+        self.write([{'field': 'tw', 'kind': 'number', 'range': [1, 10], 'sick': '> 2', 'message': '体温'}])
+        checker = DataChecker(load_rules(self.path), PureUtils())
+
+        self.assertEqual(['体温'], checker.check(POST_DATA_FINAL).sick_reasons)
+
+    def test_loadRules_badFormat(self):
+        for rules in ({'field': 'tw'}, [{'kind': 'any'}], [{'field': 'tw', 'kind': 'any', 'unknown': 1}]):
+            self.write(rules)
+            with self.assertRaises(ValueError) as _asRa:
+                load_rules(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from bupt_ncov_report.constant import *
+from bupt_ncov_report.program import *
+
+
+class Test_Deadline(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.deadline = Deadline(20, {PHASE.LOGIN: 15}, clock=lambda: self.now)
+
+    def test_timeoutFor_minOfBudgetAndRemaining(self):
+        self.assertEqual(15, self.deadline.timeout_for(PHASE.LOGIN))
+        # 没有预算的阶段只受总时限限制
+        self.assertEqual(20, self.deadline.timeout_for(PHASE.FETCH))
+
+        self.now = 12
+        self.assertEqual(8, self.deadline.timeout_for(PHASE.LOGIN))
+
+    def test_timeoutFor_expired(self):
+        self.now = 20
+        self.assertTrue(self.deadline.expired())
+        with self.assertRaises(DeadlineExceeded) as asRa:
+            self.deadline.timeout_for(PHASE.SUBMIT)
+        self.assertEqual(PHASE.SUBMIT, asRa.exception.phase)
+
+    def test_noTotal(self):
+        deadline = Deadline(None)
+
+        self.assertFalse(deadline.expired())
+        self.assertEqual(TIMEOUT_SECOND, deadline.timeout_for(NOTIFY))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,13 @@
 import os
 import tempfile
 import unittest
-from typing import Any, Dict
+from unittest import mock
+from typing import Optional
 
 from bupt_ncov_report import *
 from bupt_ncov_report._test.constant import *
 from bupt_ncov_report._test.mock import *
+from kv_config_reader import ConfigSchemaItem, compile_schema
 
 LOGIN_PAGE_URL = r'https://app.bupt.edu.cn/uc/wap/login'
 LOGIN_API_RESP = r'''{"e":0,"m":"操作成功","d":{}}'''
@@ -109,7 +111,18 @@ def log_written_tester(self: unittest.TestCase, log_path: str, written_text: str
     self.assertIn(written_text, text)
 
 
-def generate_config(stop_when_sick: bool) -> Dict[str, Any]:
+# 只含 Program 需要的配置项的配置类
+TestConfig = compile_schema({
+    name: ConfigSchemaItem(description=name, for_short='', default=None, type=type_)
+    for name, type_ in (
+        ('BUPT_SSO_USER', str), ('BUPT_SSO_PASS', str), ('TG_BOT_TOKEN', str), ('TG_CHAT_ID', str),
+        ('SERVER_CHAN_SCKEY', str), ('STOP_WHEN_SICK', bool), ('BNR_LOG_PATH', str),
+        ('BNR_LOG_MAX_BYTES', int), ('BNR_LOG_BACKUP_COUNT', int), ('BNR_DEADLINE', int),
+    )
+}, class_name='TestConfig', base=ProgramConfig)
+
+
+def generate_config(stop_when_sick: bool) -> ProgramConfig:
     """
     生成 config。会返回完美 config，启用所有功能。
     会调用 tempfile 以生成临时日志文件。其中的 BNR_LOG_PATH 是合法的日志地址。
@@ -120,17 +133,15 @@ def generate_config(stop_when_sick: bool) -> Dict[str, Any]:
     log_fd, log_path = tempfile.mkstemp(suffix='.log')
     os.close(log_fd)
 
-    config = {
-        'BUPT_SSO_USER': '2020114514',
-        'BUPT_SSO_PASS': '114514',
-        'TG_BOT_TOKEN': TG_TOKEN,
-        'TG_CHAT_ID': '1145141919810',
-        'BNR_LOG_PATH': log_path,
-        'STOP_WHEN_SICK': stop_when_sick,
-        'SERVER_CHAN_SCKEY': SCKEY,
-    }
-
-    return config
+    return TestConfig(
+        BUPT_SSO_USER='2020114514',
+        BUPT_SSO_PASS='114514',
+        TG_BOT_TOKEN=TG_TOKEN,
+        TG_CHAT_ID='1145141919810',
+        BNR_LOG_PATH=log_path,
+        STOP_WHEN_SICK=stop_when_sick,
+        SERVER_CHAN_SCKEY=SCKEY,
+    ).validate()
 
 
 def register_respond_to_mock(session: MockRequestsSession, login_success: bool, is_sick: bool) -> None:
@@ -227,6 +238,34 @@ class TestFeature_Normal(unittest.TestCase):
         setup_testCase(self, login_success=True, stop_when_sick=True, is_sick=False)
         self._expected_behavior()
 
+    def test_declaredEncoding(self):
+        """Content-Type 没有声明 charset 时，不使用 requests 默认的 ISO-8859-1"""
+        for content_type, encoding in (
+                ('text/html; charset=utf-8', 'utf-8'),
+                ('text/html; charset=GBK', 'GBK'),
+                ('text/html', None),
+                ('', None),
+        ):
+            res = MockResponse(200, REPORT_PAGE_HTML, REPORT_PAGE, content_type)
+            self.assertEqual(encoding, Program._declared_encoding(res), msg=content_type)
+
+    def test_undeclaredUtf8_noGuess(self):
+        """未声明 charset 的 UTF-8 页面直接按字节串提取，不猜测编码"""
+        config = generate_config(stop_when_sick=True)
+        self.sess = MockRequestsSession()
+        register_respond_to_mock(self.sess, login_success=True, is_sick=False)
+        self.sess.when(action='GET', url=REPORT_PAGE).respond(text=REPORT_PAGE_HTML, content_type='text/html')
+
+        prog = Program(config=config, program_utils=ProgramUtils(PureUtils()), session=self.sess, notifiers=[])
+        with mock.patch.object(
+                MockResponse, 'apparent_encoding', new_callable=mock.PropertyMock, return_value='utf-8',
+        ) as apparent_encoding:
+            prog.main()
+
+        self.assertEqual(0, prog.get_exit_status())
+        correctly_post_report_data_tester(self, self.sess)
+        apparent_encoding.assert_not_called()
+
     def tearDown(self) -> None:
         print('--- 当前测试完成 ---')
 
@@ -293,5 +332,161 @@ class TestFeature_FailWhenRunning(unittest.TestCase):
         print('--- 当前测试完成 ---')
 
 
+class ListRecorder(IRecorder):
+    """把运行结果存在 list 中的 IRecorder，用于测试。"""
+
+    def __init__(self):
+        self.outcomes = []
+
+    def record(self, outcome: RunOutcome) -> None:
+        self.outcomes.append(outcome)
+
+
+class TestFeature_RecordAndRetry(unittest.TestCase):
+
+    def _run(self, *, login_success: bool, retry_policy=None) -> None:
+        self.config = generate_config(stop_when_sick=True)
+        self.sess = MockRequestsSession()
+        register_respond_to_mock(self.sess, login_success=login_success, is_sick=False)
+
+        self.recorder = ListRecorder()
+        self.phases = []
+        self.prog = Program(
+            config=self.config,
+            program_utils=ProgramUtils(PureUtils()),
+            session=self.sess,
+            notifiers=[],
+            recorders=[self.recorder],
+            retry_policy=retry_policy,
+            on_phase=self.phases.append,
+        )
+        self.prog.main()
+
+    def test_recordSuccess(self):
+        self._run(login_success=True)
+
+        self.assertEqual(1, len(self.recorder.outcomes))
+        outcome = self.recorder.outcomes[0]
+        self.assertEqual('2020114514', outcome.user)
+        self.assertTrue(outcome.success)
+        self.assertEqual(PHASE.DONE, outcome.phase)
+        self.assertIsNone(outcome.error_class)
+        self.assertEqual([PHASE.LOGIN, PHASE.FETCH, PHASE.VERIFY, PHASE.SUBMIT], [p for p, _ in outcome.timings])
+        self.assertEqual((200, 200, 200), outcome.status_codes)
+
+    def test_recordFailure_withRetry(self):
+        self._run(login_success=False, retry_policy=RetryPolicy(times=2, interval=0))
+
+        # 登录失败时会在获取上报页时被重定向，共运行 3 次，只记录 1 次结果
+        self.assertEqual(3, len(self.sess.find_history(LOGIN_API)))
+        self.assertEqual(1, len(self.recorder.outcomes))
+        outcome = self.recorder.outcomes[0]
+        self.assertFalse(outcome.success)
+        self.assertEqual(PHASE.FETCH, outcome.phase)
+        self.assertEqual('RuntimeError', outcome.error_class)
+        self.assertEqual([PHASE.LOGIN, PHASE.FETCH], [p for p, _ in outcome.timings])
+        self.assertEqual(1, self.prog.get_exit_status())
+
+    def test_reportPhases(self):
+        """每进入一个阶段都通过 on_phase 报告"""
+        self._run(login_success=False, retry_policy=RetryPolicy(times=1, interval=0))
+
+        self.assertEqual([PHASE.LOGIN, PHASE.FETCH] * 2, self.phases)
+
+    def tearDown(self) -> None:
+        print('--- 当前测试完成 ---')
+
+
+class TestFeature_PreLogin(unittest.TestCase):
+
+    def _run(self, *, login_success: bool) -> None:
+        self.config = generate_config(stop_when_sick=True)
+        self.sess = MockRequestsSession()
+        register_respond_to_mock(self.sess, login_success=login_success, is_sick=False)
+
+        self.recorder = ListRecorder()
+        self.prog = Program(
+            config=self.config,
+            program_utils=ProgramUtils(PureUtils()),
+            session=self.sess,
+            notifiers=[],
+            recorders=[self.recorder],
+            logged_in=True,
+        )
+        self.prog.main()
+
+    def test_loggedIn_skipLogin(self):
+        """session 已经预先登录时，不再访问登录 API"""
+        self._run(login_success=True)
+
+        not_visit_url_tester(self, self.sess, LOGIN_API)
+        correctly_post_report_data_tester(self, self.sess)
+        outcome = self.recorder.outcomes[0]
+        self.assertTrue(outcome.success)
+        self.assertEqual([PHASE.FETCH, PHASE.VERIFY, PHASE.SUBMIT], [p for p, _ in outcome.timings])
+
+    def test_loggedInExpired_loginAgain(self):
+        """预先登录的会话失效时（上报页面被重定向），重新登录一次"""
+        self._run(login_success=False)
+
+        correctly_login_tester(self, self.sess)
+        self.assertEqual(2, len(self.sess.find_history(REPORT_PAGE)))
+        not_visit_url_tester(self, self.sess, REPORT_API)
+        self.assertEqual(1, self.prog.get_exit_status())
+
+    def tearDown(self) -> None:
+        print('--- 当前测试完成 ---')
+
+
+class TestFeature_Deadline(unittest.TestCase):
+
+    def _run(self, deadline: Optional[int]) -> None:
+        self.config = generate_config(stop_when_sick=True).replace(BNR_DEADLINE=deadline)
+        self.sess = MockRequestsSession()
+        register_respond_to_mock(self.sess, login_success=True, is_sick=False)
+
+        self.recorder = ListRecorder()
+        self.prog = Program(
+            config=self.config,
+            program_utils=ProgramUtils(PureUtils()),
+            session=self.sess,
+            notifiers=[TelegramNotifier(token=TG_TOKEN, chat_id='114514', session=self.sess)],
+            recorders=[self.recorder],
+            retry_policy=RetryPolicy(times=2, interval=0),
+        )
+        self.prog.main()
+
+    def test_everyRequestHasTimeout(self):
+        """每个请求的超时时间不超过该阶段的预算与剩余时间"""
+        self._run(deadline=10)
+
+        history = self.sess.history()
+        self.assertEqual(4, len(history))
+        for request in history:
+            self.assertIsNotNone(request.timeout, msg=request.url)
+            self.assertLessEqual(request.timeout, 10, msg=request.url)
+        self.assertEqual(0, self.prog.get_exit_status())
+        self.assertEqual((('TelegramNotifier', True),), self.recorder.outcomes[0].notifications)
+
+    def test_deadlineExceeded(self):
+        """超出总时限时不再重试，但仍发送一条简短的失败通知；状态码与一般的失败不同"""
+        self._run(deadline=0)
+
+        history = self.sess.history()
+        self.assertEqual([f'https://api.telegram.org/bot{TG_TOKEN}/sendMessage'], [h.url for h in history])
+        self.assertEqual(NOTIFY_GRACE_SECONDS, history[0].timeout)
+        self.assertIn('总时限', history[0].json['text'])
+        self.assertNotIn('Traceback', history[0].json['text'])
+
+        outcome = self.recorder.outcomes[0]
+        self.assertFalse(outcome.success)
+        self.assertEqual('DeadlineExceeded', outcome.error_class)
+        self.assertEqual((('TelegramNotifier', True),), outcome.notifications)
+        self.assertEqual(Program.EXIT_DEADLINE_EXCEEDED, self.prog.get_exit_status())
+
+    def tearDown(self) -> None:
+        print('--- 当前测试完成 ---')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import types
+import unittest
+
+import bupt_ncov_report
+import kv_config_reader
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 包名 -> 其下所有导出名字的子包
+SUBPACKAGES = {
+    bupt_ncov_report: (
+        'constant', 'lru_cache', 'metrics', 'notifier', 'preconnect', 'predef', 'process_pool', 'program',
+        'program_utils', 'pure_utils', 'recorder', 'redactor', 'session_pool', 'sharding', 'status_table', 'work_queue',
+    ),
+    kv_config_reader: (
+        '_util.lazy', 'compiler', 'filler', 'predef', 'public_util', 'roster',
+    ),
+}
+
+
+class Test_LazyImport(unittest.TestCase):
+
+    def test_exportsComplete(self):
+        """按需导入的名字与各子包导出的名字一致，且都能取到"""
+        for package, subpackages in SUBPACKAGES.items():
+            # 用 import * 得到各子包导出的名字，与原先的 __init__.py 的行为一致
+            namespace = {}
+            for sub in subpackages:
+                exec(f'from {package.__name__}.{sub} import *', namespace)
+            expected = {
+                name for name, value in namespace.items()
+                if not name.startswith('_') and not isinstance(value, types.ModuleType)
+            }
+
+            if sys.version_info >= (3, 7):
+                self.assertEqual(expected, set(package.__all__), msg=package.__name__)
+            for name in expected:
+                self.assertIsNotNone(getattr(package, name), msg=name)
+
+    def test_unknownName(self):
+        with self.assertRaises(AttributeError) as _asRa:
+            getattr(bupt_ncov_report, 'NoSuchThing')
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'Python 3.7 以下不支持按需导入')
+    def test_mainDoesNotImportUnusedModules(self):
+        """导入 main 时不导入未配置的 notifier、filler 等模块"""
+        proc = subprocess.run(
+            [sys.executable, '-c', 'import sys, main; print("\\n".join(sys.modules))'],
+            cwd=REPO_ROOT, stdout=subprocess.PIPE, universal_newlines=True, check=True,
+        )
+        modules = set(proc.stdout.split())
+
+        for name in (
+                'argparse', 'gzip', 'html', 'sqlite3', 'configparser',
+                'bupt_ncov_report.notifier.telegram', 'bupt_ncov_report.notifier.server_chan',
+                'kv_config_reader.filler.json_filler', 'kv_config_reader.roster.roster',
+        ):
+            self.assertNotIn(name, modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from bupt_ncov_report._util.log_writer import *
+
+
+class Test_AsyncLogWriter(unittest.TestCase):
+
+    def setUp(self) -> None:
+        log_fd, self.log_path = tempfile.mkstemp(suffix='.log')
+        os.close(log_fd)
+
+        self.writer = AsyncLogWriter()
+        self.logger = logging.getLogger('bupt_ncov_report-LogWriterTest')
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.logger.addHandler(self.writer.queue_handler())
+
+    def tearDown(self) -> None:
+        self.writer.stop()
+        self.logger.handlers.clear()
+        os.remove(self.log_path)
+
+    def read_log(self) -> str:
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_drain(self):
+        """drain 返回后，队列中的日志都已经写入文件"""
+        self.writer.add_target(self.log_path, BatchFileHandler(self.log_path, encoding='utf-8'))
+
+        for i in range(1000):
+            self.logger.info(f'line {i}')
+        self.writer.drain()
+
+        lines = self.read_log().splitlines()
+        self.assertEqual(1000, len(lines))
+        self.assertEqual('line 999', lines[-1])
+
+    def test_addTarget_idempotent(self):
+        """同名的输出目标只添加一次"""
+        self.writer.add_target(self.log_path, BatchFileHandler(self.log_path, encoding='utf-8'))
+        self.writer.add_target(self.log_path, BatchFileHandler(self.log_path, encoding='utf-8'))
+
+        self.logger.info('only once')
+        self.writer.drain()
+
+        self.assertEqual(1, self.read_log().count('only once'))
+
+    def test_exception(self):
+        """异常的调用栈随日志一起写出"""
+        self.writer.add_target(self.log_path, BatchFileHandler(self.log_path, encoding='utf-8'))
+
+        try:
+            raise ValueError('bupt_ncov_report-LogWriterTest')
+        except ValueError:
+            self.logger.exception('failed')
+        self.writer.drain()
+
+        self.assertIn('ValueError: bupt_ncov_report-LogWriterTest', self.read_log())
+
+    @unittest.skipUnless(hasattr(os, 'fork'), '需要 fork')
+    def test_fork(self):
+        """父进程的后台线程已经启动后 fork，子进程的日志照常写出，父进程未 flush 的日志不重复写出"""
+        self.writer.add_target(self.log_path, BatchFileHandler(self.log_path, encoding='utf-8'))
+        self.logger.info('parent')
+
+        def child() -> None:
+            self.logger.info('child')
+            self.writer.drain()
+
+        process = multiprocessing.get_context('fork').Process(target=child)
+        process.start()
+        process.join(10)
+
+        self.assertEqual(0, process.exitcode)
+        self.assertEqual(['parent', 'child'], self.read_log().splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from bupt_ncov_report.lru_cache import *
+
+
+class Test_LruCache(unittest.TestCase):
+
+    def test_getOrCreate_reuse(self):
+        cache: LruCache[str, list] = LruCache(2)
+
+        first = cache.get_or_create('a', list)
+        self.assertIs(first, cache.get_or_create('a', list))
+        self.assertEqual(1, len(cache))
+
+    def test_getOrCreate_evictLeastRecentlyUsed(self):
+        evicted = []
+        cache: LruCache[str, str] = LruCache(2, on_evict=evicted.append)
+
+        cache.get_or_create('a', lambda: 'A')
+        cache.get_or_create('b', lambda: 'B')
+        cache.get_or_create('a', lambda: 'A2')  # a 变为最近使用
+        cache.get_or_create('c', lambda: 'C')
+
+        self.assertEqual(['B'], evicted)
+        self.assertEqual('A', cache.get_or_create('a', lambda: 'A3'))
+        self.assertEqual(2, len(cache))
+
+    def test_clear(self):
+        evicted = []
+        cache: LruCache[str, str] = LruCache(2, on_evict=evicted.append)
+        cache.get_or_create('a', lambda: 'A')
+        cache.clear()
+
+        self.assertEqual(['A'], evicted)
+        self.assertEqual(0, len(cache))
+
+    def test_init_badMaxsize(self):
+        with self.assertRaises(ValueError) as _asRa:
+            LruCache(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import unittest
+import urllib.error
+import urllib.request
+
+from bupt_ncov_report.constant import *
+from bupt_ncov_report.metrics import *
+from bupt_ncov_report.recorder import *
+
+
+def make_outcome(success: bool, login: float = 0.3) -> RunOutcome:
+    return RunOutcome(
+        user='2020114514',
+        date='2020-06-19',
+        phase=PHASE.DONE if success else PHASE.LOGIN,
+        success=success,
+        error_class=None if success else 'RuntimeError',
+        duration=1.0,
+        timings=((PHASE.LOGIN, login), (PHASE.FETCH, 0.5)),
+        notifications=(('TelegramNotifier', success),),
+    )
+
+
+class Test_Metrics(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.metrics = Metrics(buckets=(0.5, 1.0))
+
+    def test_render(self):
+        self.metrics.record(make_outcome(True))
+        self.metrics.record(make_outcome(False, login=2.0))
+        self.metrics.account_started()
+
+        lines = self.metrics.render().splitlines()
+        for line in (
+                'bnr_in_flight_accounts 1',
+                'bnr_runs_total{result="success"} 1',
+                'bnr_runs_total{result="failure"} 1',
+                'bnr_phase_duration_seconds_bucket{phase="login",le="0.5"} 1',
+                'bnr_phase_duration_seconds_bucket{phase="login",le="1.0"} 1',
+                'bnr_phase_duration_seconds_bucket{phase="login",le="+Inf"} 2',
+                'bnr_phase_duration_seconds_sum{phase="login"} 2.3',
+                'bnr_phase_duration_seconds_count{phase="login"} 2',
+                'bnr_phase_duration_seconds_bucket{phase="fetch",le="0.5"} 2',
+                'bnr_phase_duration_seconds_count{phase="submit"} 0',
+                'bnr_notifications_total{notifier="TelegramNotifier",result="failure"} 1',
+                'bnr_notifications_total{notifier="TelegramNotifier",result="success"} 1',
+        ):
+            self.assertIn(line, lines)
+
+    def test_status(self):
+        self.assertIsNone(self.metrics.status()['last_run'])
+
+        self.metrics.account_started()
+        self.metrics.record(make_outcome(False))
+        self.metrics.account_finished()
+
+        status = self.metrics.status()
+        self.assertEqual(0, status['in_flight'])
+        self.assertEqual({'success': 0, 'failure': 1}, status['runs'])
+        self.assertEqual('RuntimeError', status['last_run']['error_class'])
+        # 不含账号
+        self.assertNotIn('2020114514', json.dumps(status))
+
+
+class Test_MetricsServer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.metrics = Metrics()
+        self.server = MetricsServer(self.metrics, port=0)
+        self.server.start()
+        host, port = self.server.address
+        self.base = f'http://{host}:{port}'
+
+    def tearDown(self) -> None:
+        self.server.close()
+
+    def get(self, path: str):
+        # 不经过环境变量中配置的代理
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        return opener.open(self.base + path, timeout=5)
+
+    def test_healthz(self):
+        with self.get('/healthz') as resp:
+            self.assertEqual(200, resp.status)
+            self.assertEqual(b'ok\n', resp.read())
+
+    def test_metrics(self):
+        self.metrics.record(make_outcome(True))
+
+        with self.get('/metrics') as resp:
+            self.assertTrue(resp.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+            self.assertIn('bnr_runs_total{result="success"} 1', resp.read().decode('utf-8'))
+
+    def test_status(self):
+        with self.get('/status') as resp:
+            self.assertEqual(0, json.loads(resp.read())['in_flight'])
+
+    def test_notFound(self):
+        with self.assertRaises(urllib.error.HTTPError) as asRa:
+            self.get('/nothing')
+        self.assertEqual(404, asRa.exception.code)
+        asRa.exception.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
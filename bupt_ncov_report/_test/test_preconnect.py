@@ -0,0 +1,137 @@
+import http.server
+import socket
+import socketserver
+import threading
+import unittest
+
+import requests
+
+from bupt_ncov_report.preconnect import *
+
+
+class FakeResolver:
+    """记录调用次数的解析函数；fail 为 True 时抛出异常。"""
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, host, port, family=0, type=0, proto=0, flags=0):
+        self.calls += 1
+        if self.fail:
+            raise socket.gaierror('fake failure')
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port))]
+
+
+class Test_DnsCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.resolver = FakeResolver()
+        self.cache = DnsCache(60, resolver=self.resolver, clock=lambda: self.now)
+        self.cache.add_hosts(['app.bupt.edu.cn'])
+
+    def test_getaddrinfo_cached(self):
+        first = self.cache.getaddrinfo('app.bupt.edu.cn', 443)
+        self.assertEqual(first, self.cache.getaddrinfo('app.bupt.edu.cn', 443))
+        self.assertEqual(1, self.resolver.calls)
+
+        # 过期后重新解析
+        self.now = 60
+        self.cache.getaddrinfo('app.bupt.edu.cn', 443)
+        self.assertEqual(2, self.resolver.calls)
+
+    def test_getaddrinfo_unknownHostNotCached(self):
+        self.cache.getaddrinfo('example.com', 443)
+        self.cache.getaddrinfo('example.com', 443)
+        self.assertEqual(2, self.resolver.calls)
+
+    def test_getaddrinfo_staleOnFailure(self):
+        first = self.cache.getaddrinfo('app.bupt.edu.cn', 443)
+        self.now = 60
+        self.resolver.fail = True
+
+        self.assertEqual(first, self.cache.getaddrinfo('app.bupt.edu.cn', 443))
+        with self.assertRaises(OSError) as _asRa:
+            self.cache.getaddrinfo('app.bupt.edu.cn', 80)
+
+    def test_contains(self):
+        self.assertIn('app.bupt.edu.cn', self.cache)
+        self.assertNotIn('example.com', self.cache)
+
+
+class _CountingHandler(http.server.BaseHTTPRequestHandler):
+    """对 HEAD 请求返回空响应，并记录建立的连接数（每个连接一个实例）。"""
+
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self) -> None:
+        type(self).connections += 1
+        super().setup()
+
+    def do_HEAD(self) -> None:
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class Test_Preconnect(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.handler = type('Handler', (_CountingHandler,), {'connections': 0})
+        self.server = _Server(('127.0.0.1', 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+        self.session = requests.Session()
+        self.session.trust_env = False
+
+    def tearDown(self) -> None:
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_preconnect_openOnce(self):
+        self.assertEqual(2, preconnect(self.session, [self.url], 2))
+        self.assertEqual(2, self.handler.connections)
+
+        # 池中已有可用的连接，不再重复建立
+        self.assertEqual(2, preconnect(self.session, [self.url], 2))
+        self.assertEqual(2, self.handler.connections)
+
+        # 之后的请求直接使用池中的连接
+        self.session.head(self.url)
+        self.assertEqual(2, self.handler.connections)
+
+    def test_preconnect_failure(self):
+        """连接失败只打日志，不计入"""
+        self.server.server_close()
+        with self.assertLogs('bupt_ncov_report.preconnect', 'WARNING') as _asLo:
+            self.assertEqual(0, preconnect(self.session, [self.url], 1, timeout=1))
+
+    def test_dnsCachingAdapter(self):
+        """挂载了 DnsCachingAdapter 的 Session 经过缓存解析登记过的主机，不影响 socket.getaddrinfo"""
+        resolver = FakeResolver()
+        cache = DnsCache(60, resolver=resolver)
+        cache.add_hosts(['bnr-test.invalid'])
+        self.session.mount('http://', DnsCachingAdapter(cache))
+
+        original = socket.getaddrinfo
+        url = self.url.replace('127.0.0.1', 'bnr-test.invalid')
+        self.assertEqual(2, preconnect(self.session, [url], 2))
+        self.assertEqual(200, self.session.head(url).status_code)
+
+        self.assertEqual(1, resolver.calls)
+        self.assertIs(original, socket.getaddrinfo)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+import unittest
+import urllib.request
+from unittest import mock
+
+from bupt_ncov_report.process_pool import *
+
+
+def report_pid(task: int) -> int:
+    """返回工作进程的 pid，用于判断任务在哪个工作进程中运行"""
+    return os.getpid()
+
+
+def misbehave(task: str) -> int:
+    if task == 'crash':
+        os._exit(3)
+    if task == 'hang':
+        time.sleep(60)
+    if task == 'raise':
+        raise ValueError('bad account')
+    return 0
+
+
+class Test_ProcessPool(unittest.TestCase):
+
+    def test_run_allTasks(self):
+        with ProcessPool(report_pid, workers=2) as pool:
+            outcomes = sorted(pool.run(range(10)))
+
+        self.assertEqual(list(range(10)), [outcome.task_index for outcome in outcomes])
+        self.assertEqual(list(range(10)), [outcome.task for outcome in outcomes])
+        for outcome in outcomes:
+            self.assertIsNone(outcome.error)
+            self.assertEqual(outcome.pid, outcome.status)
+            self.assertNotEqual(os.getpid(), outcome.status)
+
+    def test_run_reuseWorkers(self):
+        """工作进程是预先启动、复用的"""
+        with ProcessPool(report_pid, workers=2) as pool:
+            pids = {outcome.status for outcome in pool.run(range(10))}
+
+        self.assertLessEqual(len(pids), 2)
+
+    def test_recycle_maxTasks(self):
+        with ProcessPool(report_pid, workers=1, max_tasks=2) as pool:
+            pids = [outcome.status for outcome in sorted(pool.run(range(6)))]
+
+        self.assertEqual(3, len(set(pids)))
+        self.assertEqual(pids[0], pids[1])
+
+    def test_recycle_maxRss(self):
+        with ProcessPool(report_pid, workers=1, max_rss=1) as pool:
+            pids = [outcome.status for outcome in pool.run(range(3))]
+
+        self.assertEqual(3, len(set(pids)))
+
+    def test_isolation(self):
+        """一个任务使工作进程崩溃、超时或抛出异常，不影响其它任务"""
+        tasks = ['ok', 'crash', 'ok', 'hang', 'raise', 'ok']
+        with ProcessPool(misbehave, workers=2, task_timeout=1) as pool:
+            outcomes = sorted(pool.run(tasks))
+
+        self.assertEqual([0, None, 0, None, None, 0], [outcome.status for outcome in outcomes])
+        self.assertIn('退出码 3', outcomes[1].error)
+        self.assertIn('1 秒', outcomes[3].error)
+        self.assertEqual('ValueError: bad account', outcomes[4].error)
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), '不支持 fork 时，lambda 不能被 pickle')
+    def test_initializerFinalizer(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'log')
+
+            def append(line: str) -> None:
+                with open(path, 'a') as f:
+                    f.write(line + '\n')
+
+            with ProcessPool(report_pid, workers=1, max_tasks=1,
+                             initializer=lambda: append('start'), finalizer=lambda: append('stop')) as pool:
+                list(pool.run(range(2)))
+
+            # 每个任务一个工作进程，最后还有一个空闲的工作进程
+            with open(path) as f:
+                self.assertEqual(['start'] * 3 + ['stop'] * 3, sorted(f.read().split()))
+
+    def test_currentRss(self):
+        rss = current_rss()
+        if rss is not None:
+            self.assertGreater(rss, 0)
+
+    def test_invalidArguments(self):
+        with self.assertRaises(ValueError) as _asRa:
+            ProcessPool(report_pid, workers=0)
+
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), '需要 fork，工作进程才能继承 mock')
+class Test_RunInProcessPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        import main
+        from kv_config_reader import initialize_config
+
+        self.main = main
+        self.config = initialize_config(main.CONFIG_SCHEMA)
+        self.config.update(BNR_PROCESS_WORKERS=2, BNR_METRICS_PORT=free_port())
+
+    def tearDown(self) -> None:
+        if self.main._warm_cache is not None:
+            self.main._warm_cache.close()
+            self.main._warm_cache = None
+
+    def test_metricsPort(self):
+        """设置了 BNR_METRICS_PORT 时，工作进程不再占用端口，各账号的结果计入主进程的指标"""
+        warm_cache = self.main.prepare_batch(self.config)
+        accounts = [
+            (i, self.main.AccountConfig(BUPT_SSO_USER=f'20201145{i:02d}', BUPT_SSO_PASS='password'))
+            for i in range(3)
+        ]
+
+        with mock.patch.object(self.main, 'run_tracked_account', lambda *args: 0):
+            status = self.main.run_in_process_pool(self.config, iter(accounts), None, None, warm_cache.metrics)
+
+        self.assertEqual(0, status)
+        host, port = warm_cache.metrics_server.address
+        with urllib.request.urlopen(f'http://{host}:{port}/status', timeout=5) as res:
+            summary = json.loads(res.read().decode('utf-8'))
+        self.assertEqual({'success': 3, 'failure': 0}, summary['runs'])
+        self.assertEqual(0, summary['in_flight'])
+
+    def test_workerErrorClass(self):
+        self.assertIsNone(self.main.worker_error_class(None))
+        self.assertEqual('ValueError', self.main.worker_error_class('ValueError: bad account'))
+        self.assertEqual('WorkerError', self.main.worker_error_class('工作进程异常退出（退出码 1）'))
+
+
+if __name__ == '__main__':
+    unittest.main()
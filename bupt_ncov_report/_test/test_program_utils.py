@@ -1,3 +1,4 @@
+import re
 import unittest
 
 from bupt_ncov_report._test.constant import *
@@ -66,6 +67,117 @@ class Test_ProgramUtils_SimpleFunc(unittest.TestCase):
             self.u.extract_old_new_data(self.SHORT_HTML)
 
 
+class Test_ProgramUtils_LayoutCache(unittest.TestCase):
+    """测试记录上报页面结构的功能。"""
+
+    def setUp(self) -> None:
+        self.cache = LayoutCache()
+        self.u = ProgramUtils(PureUtils(), self.cache)
+
+    def test_scanPageLayout_sameStructure(self):
+        """数据不同但结构相同的页面指纹相同；键集合不同时指纹不同"""
+        fingerprint = scan_page_layout(REPORT_PAGE_HTML).fingerprint
+
+        self.assertEqual(fingerprint, scan_page_layout(REPORT_PAGE_HTML_OF_SICK_PEOPLE).fingerprint)
+        self.assertEqual(fingerprint, scan_page_layout(REPORT_PAGE_HTML.replace('"tw": "3"', '"tw": "4"')).fingerprint)
+        self.assertNotEqual(fingerprint, scan_page_layout(REPORT_PAGE_HTML.replace('"tw": ', '"tw2": ')).fingerprint)
+        self.assertNotEqual(fingerprint, scan_page_layout(REPORT_PAGE_HTML.replace('new Vue', 'new Vue2')).fingerprint)
+
+    def test_extractPostData_knownLayout(self):
+        """第一次完整检查后记为已知结构，之后走快速路径，结果相同"""
+        self.assertEqual(POST_DATA_FINAL, self.u.extract_post_data(REPORT_PAGE_HTML))
+        self.assertTrue(self.cache.is_known_good(scan_page_layout(REPORT_PAGE_HTML).fingerprint))
+
+        # 快速路径不再调用 extract_old_new_data
+        self.u.extract_old_new_data = None
+        self.assertEqual(POST_DATA_FINAL, self.u.extract_post_data(REPORT_PAGE_HTML))
+
+    def test_extractPostData_unknownLayoutFlaggedOnce(self):
+        """未知结构每批只提示一次"""
+        with self.assertLogs('bupt_ncov_report.program_utils', 'INFO') as logs:
+            self.u.extract_post_data(REPORT_PAGE_HTML)
+            self.cache.start_batch()
+            self.u.extract_post_data(REPORT_PAGE_HTML_OF_SICK_PEOPLE.replace('"tw": ', '"tw": 1, "new": '))
+            self.u.extract_post_data(REPORT_PAGE_HTML.replace('"tw": ', '"tw": 1, "new": '))
+
+        self.assertEqual(2, len(logs.output))
+
+    def test_extractPostData_badLayoutFailFast(self):
+        """本批中解析失败过的结构直接失败"""
+        broken_html = REPORT_PAGE_HTML.replace('"id": 114514, ', '')
+        with self.assertRaises(RuntimeError) as _asRa:
+            self.u.extract_post_data(broken_html)
+
+        self.u.extract_old_new_data = None
+        with self.assertRaises(RuntimeError) as asRa:
+            self.u.extract_post_data(broken_html)
+        self.assertIn('本批中解析失败', str(asRa.exception))
+
+
+class Test_ProgramUtils_Bytes(unittest.TestCase):
+    """测试直接处理字节串的提取函数。"""
+
+    def setUp(self) -> None:
+        self.u = ProgramUtils(PureUtils())
+
+    def test_findObjectSlice_sameAsRegex(self):
+        """find_object_slice 与正则表达式的匹配结果相同"""
+        cases = (
+            REPORT_PAGE_HTML,
+            # 同一行有多个后缀时，取到最后一个
+            'var def = {"a": 1}; var b = {"c": 2};\n',
+            # 第一次出现时所在行没有后缀，取下一次出现
+            'var def = {"a": 1}\nvar def = {"b": 2};',
+            # 后缀在下一行，匹配不到
+            'var def = {"a": 1}\n};',
+            '',
+        )
+        for html in cases:
+            match = re.search(r'var def = (\{.+\});', html)
+            data_slice = find_object_slice(html.encode('utf-8'), NEW_DATA_MARKER)
+            if match is None:
+                self.assertIsNone(data_slice, msg=html)
+            else:
+                self.assertIsNotNone(data_slice, msg=html)
+                self.assertEqual(match.group(1), html.encode('utf-8')[data_slice[0]:data_slice[1]].decode(), msg=html)
+
+    def test_extractPostDataFromBytes_sameAsStr(self):
+        """字节串与字符串的提取结果相同"""
+        content = REPORT_PAGE_HTML.encode('utf-8')
+        self.assertEqual(self.u.extract_old_new_data(REPORT_PAGE_HTML), self.u.extract_old_new_data_from_bytes(content))
+        self.assertEqual(POST_DATA_FINAL, self.u.extract_post_data_from_bytes(content))
+
+        cached = ProgramUtils(PureUtils(), LayoutCache())
+        self.assertEqual(POST_DATA_FINAL, cached.extract_post_data_from_bytes(content))
+        self.assertEqual(POST_DATA_FINAL, cached.extract_post_data_from_bytes(content))
+
+    def test_extractCheckedPostData_checkOnce(self):
+        """无论页面结构是否已知，每次提取都只检查一次上报参数，且检查结果可以直接传给 verify_data 与 check_data_sick"""
+        checked = []
+
+        class CountingChecker(DataChecker):
+            def check(self, data):
+                checked.append(data)
+                return super().check(data)
+
+        u = ProgramUtils(PureUtils(), LayoutCache(), CountingChecker(DEFAULT_RULES, PureUtils()))
+        for page in (REPORT_PAGE_HTML, REPORT_PAGE_HTML.encode('utf-8'), REPORT_PAGE_HTML):
+            checked.clear()
+            post_data, check = u.extract_checked_post_data(page)
+            u.check_data_sick(u.verify_data(post_data, check), check)
+
+            self.assertEqual(POST_DATA_FINAL, post_data)
+            self.assertFalse(check.broken)
+            self.assertEqual(1, len(checked))
+
+    def test_extractOldNewDataFromBytes_missing(self):
+        """找不到数据或数据太短时要抛出异常"""
+        with self.assertRaises(ValueError) as _asRa:
+            self.u.extract_old_new_data_from_bytes(b'<html></html>')
+        with self.assertRaises(ValueError) as _asRa:
+            self.u.extract_old_new_data_from_bytes(Test_ProgramUtils_SimpleFunc.SHORT_HTML.encode('utf-8'))
+
+
 class Test_ProgramUtils_StopWhenSick(unittest.TestCase):
     """测试与「生病时停止有关」的函数。"""
 
@@ -69,6 +69,37 @@ class Test_PureUtils(unittest.TestCase):
         self.assertTrue(PureUtils.looks_falsy([0]))
         self.assertTrue(PureUtils.looks_falsy(None))
 
+    def test_looksFalsy_sameAsGeneric(self):
+        """快速路径的结果与通用实现相同"""
+        values = (
+            '', ' ', '0', ' 0 ', '00', '1', '2', 'false', 'False', 'FALSE ', 'true', 'null', '\t0\n', '０',
+            0, 1, -1, 2, True, False, 0.0, -0.0, 0.5, float('nan'), float('inf'),
+            None, [], [0], [0.0], [False], [1], [0, 0], [[]], ['0'],
+            {}, {'a': 0}, (), (0,), set(), b'', b'0', 1j, 0j, object,
+        )
+
+        for x in values:
+            # 第二次调用时字符串的结果来自缓存
+            for _ in range(2):
+                self.assertEqual(PureUtils._looks_falsy_generic(x), PureUtils.looks_falsy(x), msg=repr(x))
+                self.assertEqual(not PureUtils._looks_falsy_generic(x), PureUtils.looks_truthy(x), msg=repr(x))
+
+    def test_looksFalsy_subclass(self):
+        """str、int 的子类不走快速路径"""
+
+        class WeirdStr(str):
+            def lower(self):
+                return '0'
+
+        class WeirdInt(int):
+            def __eq__(self, other):
+                return other == '0'
+
+            __hash__ = int.__hash__
+
+        self.assertTrue(PureUtils.looks_falsy(WeirdStr('1')))
+        self.assertTrue(PureUtils.looks_falsy(WeirdInt(1)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,141 @@
+import json
+import os
+import tempfile
+import unittest
+
+from bupt_ncov_report.constant import *
+from bupt_ncov_report.recorder import *
+
+
+class Test_ResultHistory(unittest.TestCase):
+
+    def setUp(self) -> None:
+        db_fd, self.db_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(db_fd)
+        self.history = ResultHistory(self.db_path)
+
+    def tearDown(self) -> None:
+        self.history.close()
+        os.remove(self.db_path)
+
+    def test_failedUsers_onlyLatestOutcome(self):
+        """只有最近一次运行失败的账号才算失败"""
+        self.history.record(RunOutcome('alice', '2020-06-18', PHASE.LOGIN, False, 'RuntimeError', 1.0))
+        self.history.record(RunOutcome('alice', '2020-06-19', PHASE.DONE, True, None, 1.0))
+        self.history.record(RunOutcome('bob', '2020-06-18', PHASE.DONE, True, None, 1.0))
+        self.history.record(RunOutcome('bob', '2020-06-19', PHASE.FETCH, False, 'ValueError', 2.0))
+        self.history.record(RunOutcome('carol', '2020-06-17', PHASE.SUBMIT, False, 'RuntimeError', 3.0))
+
+        self.assertEqual(['bob', 'carol'], self.history.failed_users())
+        self.assertEqual(['bob'], self.history.failed_users(since='2020-06-18'))
+        self.assertEqual([], self.history.failed_users(since='2020-06-20'))
+
+    def test_lastOutcome(self):
+        outcome = RunOutcome('alice', '2020-06-19', PHASE.FETCH, False, 'ValueError', 2.5)
+        self.history.record(outcome)
+
+        self.assertEqual(outcome, self.history.last_outcome('alice'))
+        self.assertIsNone(self.history.last_outcome('bob'))
+
+    def test_persistence(self):
+        """重新打开数据库后历史仍在"""
+        self.history.record(RunOutcome('alice', '2020-06-19', PHASE.LOGIN, False, 'RuntimeError', 1.0))
+        self.history.close()
+
+        self.history = ResultHistory(self.db_path)
+        self.assertEqual(['alice'], self.history.failed_users())
+
+
+class Test_JsonlResultSink(unittest.TestCase):
+    OUTCOME = RunOutcome(
+        'alice', '2020-06-19', PHASE.FETCH, False, 'RuntimeError', 1.5,
+        timings=((PHASE.LOGIN, 0.25), (PHASE.FETCH, 1.25)),
+        status_codes=(200, 302),
+    )
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'results.jsonl')
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def read_lines(self, path=None):
+        if path is None:
+            path = os.path.join(self.dir.name, f'results.{beijing_date()}.jsonl')
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_record_format(self):
+        sink = JsonlResultSink(self.path)
+        sink.record(self.OUTCOME)
+        sink.flush()
+
+        self.assertEqual([{
+            'user_hash': hash_user('alice'),
+            'date': '2020-06-19',
+            'phase': PHASE.FETCH,
+            'success': False,
+            'error_class': 'RuntimeError',
+            'duration': 1.5,
+            'timings': {PHASE.LOGIN: 0.25, PHASE.FETCH: 1.25},
+            'status_codes': [200, 302],
+        }], self.read_lines())
+
+        self.assertNotIn('alice', json.dumps(self.read_lines()))
+
+    def test_hashKey(self):
+        """设置了密钥时使用 HMAC，与无密钥的摘要不同"""
+        sink = JsonlResultSink(self.path, hash_key='pepper')
+        sink.record(self.OUTCOME)
+        sink.flush()
+
+        user_hash = self.read_lines()[0]['user_hash']
+        self.assertEqual(hash_user('alice', 'pepper'), user_hash)
+        self.assertNotEqual(hash_user('alice'), user_hash)
+        self.assertNotEqual(hash_user('alice', 'salt'), user_hash)
+
+    def test_record_batched(self):
+        """攒满一批才写入文件"""
+        sink = JsonlResultSink(self.path, batch_size=3)
+        sink.record(self.OUTCOME)
+        sink.record(self.OUTCOME)
+        self.assertEqual([], os.listdir(self.dir.name))
+
+        sink.record(self.OUTCOME)
+        self.assertEqual(3, len(self.read_lines()))
+
+    def test_rotate_bySize(self):
+        sink = JsonlResultSink(self.path, batch_size=1, max_bytes=1)
+        sink.record(self.OUTCOME)
+        sink.record(self.OUTCOME)
+
+        self.assertEqual(1, len(self.read_lines()))
+        self.assertEqual(1, len(self.read_lines(sink.path_for(beijing_date(), 1))))
+
+    def test_rotate_byDate(self):
+        """文件名带有日期；昨天的文件不再写入，也不被重命名"""
+        sink = JsonlResultSink(self.path)
+        yesterday = sink.path_for('2020-06-19')
+        with open(yesterday, 'w', encoding='utf-8') as f:
+            f.write('{}\n')
+
+        sink.record(self.OUTCOME)
+        sink.flush()
+
+        self.assertEqual(1, len(self.read_lines()))
+        self.assertEqual([{}], self.read_lines(yesterday))
+
+    def test_multipleSinks(self):
+        """多个 sink（如多个进程）写同一个 path 时，结果都写入同一个文件，不互相覆盖"""
+        sinks = [JsonlResultSink(self.path, batch_size=1, max_bytes=4096) for _ in range(3)]
+        for _ in range(10):
+            for sink in sinks:
+                sink.record(self.OUTCOME)
+
+        lines = self.read_lines() + self.read_lines(sinks[0].path_for(beijing_date(), 1))
+        self.assertEqual(30, len(lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
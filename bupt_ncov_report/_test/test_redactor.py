@@ -0,0 +1,91 @@
+import json
+import logging
+import sys
+import unittest
+
+from bupt_ncov_report.redactor import *
+
+
+class Test_Redactor(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.redactor = Redactor(secrets=['p@ss.word', 'SCU1234'])
+
+    def test_redact_secrets(self):
+        self.assertEqual(
+            f'password={REDACTED}, url=https://sc.ftqq.com/{REDACTED}.send',
+            self.redactor.redact('password=p@ss.word, url=https://sc.ftqq.com/SCU1234.send'),
+        )
+
+    def test_redact_fields(self):
+        """JSON 与 Python repr 中的敏感字段都被抹去，其它字段不变"""
+        post_data = {
+            'address': '北京市海淀区',
+            'geo_api_info': json.dumps({'formattedAddress': '北京市海淀区'}),
+            'id': 1234,
+            'tw': '3',
+        }
+
+        for text in (json.dumps(post_data), json.dumps(post_data, ensure_ascii=False), repr(post_data)):
+            redacted = self.redactor.redact(text)
+            self.assertNotIn('北京市海淀区', redacted)
+            self.assertNotIn('\\u5317', redacted)
+            self.assertNotIn('1234', redacted)
+            self.assertIn('tw', redacted)
+            self.assertIn('3', redacted)
+
+    def test_redact_longerSecretFirst(self):
+        """一个秘密是另一个的前缀时，整个较长的秘密被抹去"""
+        self.redactor.add_secrets(['SCU1234567'])
+        self.assertEqual(f'key={REDACTED}', self.redactor.redact('key=SCU1234567'))
+
+    def test_redact_manySecrets(self):
+        """大量秘密（含正则表达式的特殊字符、互为前缀）都能被完整抹去"""
+        secrets = [f'{i}.pass+word[{i % 7}]' for i in range(300)] + ['secret', 'secret1', 'secret12']
+        redactor = Redactor(secrets, fields=())
+
+        for secret in secrets:
+            self.assertEqual(f'<{REDACTED}>', redactor.redact(f'<{secret}>'))
+
+    def test_redact_shortSecret(self):
+        """过短的秘密被忽略，不会破坏日期等内容"""
+        redactor = Redactor(['1', '2020'], fields=())
+        self.assertEqual('2020-01-01', redactor.redact('2020-01-01'))
+
+    def test_scopedSecrets(self):
+        """离开 with 语句块后秘密被移除；同一个秘密被添加两次时，两次都移除后才被移除"""
+        redactor = Redactor(fields=())
+
+        with redactor.scoped_secrets(['password-1']):
+            with redactor.scoped_secrets(['password-1', None]):
+                self.assertEqual(REDACTED, redactor.redact('password-1'))
+            self.assertEqual(REDACTED, redactor.redact('password-1'))
+        self.assertEqual('password-1', redactor.redact('password-1'))
+
+    def test_redact_nothingToRedact(self):
+        redactor = Redactor(fields=())
+        redactor.add_secrets([None, ''])
+        self.assertEqual('"address": "x"', redactor.redact('"address": "x"'))
+
+
+class Test_RedactionFilter(unittest.TestCase):
+
+    def test_filter(self):
+        """消息、参数与异常调用栈都被处理"""
+        filter_ = RedactionFilter(Redactor(secrets=['p@ss.word']))
+
+        try:
+            raise RuntimeError('您输入的密码为 p@ss.word')
+        except RuntimeError:
+            record = logging.LogRecord(
+                'bupt_ncov_report-RedactTest', logging.ERROR, __file__, 0,
+                'password: %s', ('p@ss.word',), exc_info=sys.exc_info(),
+            )
+
+        self.assertTrue(filter_.filter(record))
+        self.assertEqual(f'password: {REDACTED}', record.getMessage())
+        self.assertNotIn('p@ss.word', logging.Formatter().format(record))
+
+
+if __name__ == '__main__':
+    unittest.main()
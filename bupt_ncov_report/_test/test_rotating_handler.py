@@ -0,0 +1,94 @@
+import datetime
+import glob
+import gzip
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from bupt_ncov_report._util.rotating_handler import *
+
+
+def make_record(msg: str) -> logging.LogRecord:
+    return logging.LogRecord('bupt_ncov_report-RotateTest', logging.INFO, __file__, 0, msg, None, None)
+
+
+class Test_CompressingRotatingFileHandler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'bnr.log')
+
+    def tearDown(self) -> None:
+        self.handler.close()
+        self.dir.cleanup()
+
+    def archives(self):
+        return sorted(glob.glob(f'{self.path}.*.gz'))
+
+    def test_rotate_bySize(self):
+        """超过大小后轮换并压缩，只保留 backup_count 个压缩文件"""
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=100, backup_count=2, encoding='utf-8')
+
+        for i in range(10):
+            self.handler.emit(make_record(f'{i:02d}' * 30))
+        self.handler.flush_batch()
+        self.handler.wait_compressed()
+
+        archives = self.archives()
+        self.assertEqual(2, len(archives))
+        with gzip.open(archives[-1], 'rt', encoding='utf-8') as f:
+            self.assertEqual('08' * 30 + '\n', f.read())
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual('09' * 30 + '\n', f.read())
+
+    def test_rotate_byDate(self):
+        """文件的日期不是今天时轮换"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('yesterday\n')
+        yesterday = time.mktime((datetime.date.today() - datetime.timedelta(days=1)).timetuple())
+        os.utime(self.path, (yesterday, yesterday))
+
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=0, backup_count=7, encoding='utf-8')
+        self.handler.emit(make_record('today'))
+        self.handler.flush_batch()
+        self.handler.wait_compressed()
+
+        self.assertEqual(1, len(self.archives()))
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual('today\n', f.read())
+
+    def test_close_waitsForCompression(self):
+        """轮换后立即 close，也不留下 .gz.tmp 与未压缩的文件"""
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=100, backup_count=3, encoding='utf-8')
+
+        for i in range(5):
+            self.handler.emit(make_record(f'{i:02d}' * 30))
+        self.handler.close()
+
+        self.assertEqual(3, len(self.archives()))
+        self.assertEqual([self.path, *self.archives()], sorted(glob.glob(f'{self.path}*')))
+
+    def test_recoverLeftovers(self):
+        """上次运行留下的未压缩文件被压缩并计入 backup_count，.gz.tmp 被删除"""
+        for stamp in ('2020-01-01_000000_000000', '2020-01-02_000000_000000', '2020-01-02_000000_000000.1'):
+            with open(f'{self.path}.{stamp}', 'w', encoding='utf-8') as f:
+                f.write(f'{stamp}\n')
+        with open(f'{self.path}.2020-01-03_000000_000000.gz.tmp', 'wb') as f:
+            f.write(b'partial')
+        with open(f'{self.path}.unrelated', 'w', encoding='utf-8') as f:
+            f.write('keep\n')
+
+        self.handler = CompressingRotatingFileHandler(self.path, max_bytes=0, backup_count=2, encoding='utf-8')
+        self.handler.wait_compressed()
+
+        self.assertEqual([
+            f'{self.path}.2020-01-02_000000_000000.1.gz',
+            f'{self.path}.2020-01-02_000000_000000.gz',
+        ], self.archives())
+        self.assertEqual([*self.archives(), f'{self.path}.unrelated'], sorted(glob.glob(f'{self.path}.*')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import datetime
+import unittest
+
+from bupt_ncov_report.session_pool import *
+
+
+class FakeClock:
+    """可以手动调整的时钟，用于测试过期。"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Test_SessionPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.evicted = []
+        self.pool: SessionPool[str] = SessionPool(2, 60, on_evict=self.evicted.append, clock=self.clock)
+
+    def test_take_once(self):
+        self.pool.put('a', 'A')
+
+        self.assertEqual('A', self.pool.take('a'))
+        self.assertIsNone(self.pool.take('a'))
+        self.assertEqual([], self.evicted)
+
+    def test_take_expired(self):
+        self.pool.put('a', 'A')
+        self.clock.now = 60
+
+        self.assertIsNone(self.pool.take('a'))
+        self.assertEqual(['A'], self.evicted)
+
+    def test_put_evictOldest(self):
+        self.pool.put('a', 'A')
+        self.pool.put('b', 'B')
+        self.pool.put('a', 'A2')  # 替换 a，a 变为最新
+        self.pool.put('c', 'C')
+
+        self.assertEqual(['A', 'B'], self.evicted)
+        self.assertEqual('A2', self.pool.take('a'))
+        self.assertEqual(1, len(self.pool))
+
+    def test_full(self):
+        self.assertEqual(2, self.pool.maxsize)
+        self.pool.put('a', 'A')
+        self.assertFalse(self.pool.full())
+        self.pool.put('b', 'B')
+        self.assertTrue(self.pool.full())
+
+        self.pool.take('a')
+        self.assertFalse(self.pool.full())
+
+    def test_prune(self):
+        self.pool.put('a', 'A')
+        self.clock.now = 30
+        self.pool.put('b', 'B')
+        self.clock.now = 70
+
+        self.assertEqual(1, self.pool.prune())
+        self.assertEqual(['A'], self.evicted)
+        self.assertEqual('B', self.pool.take('b'))
+
+    def test_clear(self):
+        self.pool.put('a', 'A')
+        self.pool.clear()
+
+        self.assertEqual(['A'], self.evicted)
+        self.assertEqual(0, len(self.pool))
+
+
+class Test_TimeWindow(unittest.TestCase):
+
+    def test_parse(self):
+        window = TimeWindow.parse('06:30-06:55')
+
+        self.assertEqual(datetime.time(6, 30), window.start)
+        self.assertEqual(datetime.time(6, 55), window.end)
+        for text in ('06:30', '6:30-nope', '07:00-06:30'):
+            with self.assertRaises(ValueError, msg=text) as _asRa:
+                TimeWindow.parse(text)
+
+    def test_contains(self):
+        window = TimeWindow.parse('06:30-06:55')
+
+        self.assertTrue(window.contains(datetime.time(6, 30)))
+        self.assertTrue(window.contains(datetime.time(6, 54, 59)))
+        self.assertFalse(window.contains(datetime.time(6, 55)))
+        self.assertFalse(window.contains(datetime.time(7, 0)))
+
+    def test_secondsUntilEnd(self):
+        window = TimeWindow.parse('06:30-06:55')
+
+        self.assertEqual(300, window.seconds_until_end(datetime.time(6, 50)))
+        self.assertEqual(0, window.seconds_until_end(datetime.time(7, 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
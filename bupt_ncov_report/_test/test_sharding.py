@@ -0,0 +1,47 @@
+import collections
+import unittest
+
+from bupt_ncov_report.sharding import *
+
+USERS = [f'2020{i:06d}' for i in range(3000)]
+
+
+class Test_Sharding(unittest.TestCase):
+
+    def test_jumpHash_range(self):
+        for key in range(1000):
+            self.assertEqual(0, jump_hash(key, 1))
+            self.assertIn(jump_hash(key, 7), range(7))
+
+        with self.assertRaises(ValueError) as _asRa:
+            jump_hash(1, 0)
+
+    def test_shardOf_balanced(self):
+        counts = collections.Counter(shard_of(user, 5) for user in USERS)
+
+        self.assertEqual(set(range(5)), set(counts))
+        for count in counts.values():
+            self.assertAlmostEqual(600, count, delta=100)
+
+    def test_shardOf_addNodeMovesFew(self):
+        """分片数从 5 增加到 6 时，只有约 1/6 的账号移动，且都移动到新的分片"""
+        moved = [user for user in USERS if shard_of(user, 5) != shard_of(user, 6)]
+
+        self.assertAlmostEqual(len(USERS) / 6, len(moved), delta=100)
+        self.assertEqual({5}, {shard_of(user, 6) for user in moved})
+
+    def test_shardSpec_partition(self):
+        """各节点选出的账号互不重复，合起来是完整的账号列表"""
+        specs = [ShardSpec(i, 4).validate() for i in range(4)]
+
+        for user in USERS:
+            self.assertEqual(1, sum(spec.owns(user) for spec in specs), msg=user)
+
+    def test_shardSpec_validate(self):
+        for index, count in ((0, 0), (-1, 3), (3, 3)):
+            with self.assertRaises(ValueError, msg=(index, count)) as _asRa:
+                ShardSpec(index, count).validate()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import multiprocessing
+import subprocess
+import sys
+import unittest
+import uuid
+
+from bupt_ncov_report.constant import *
+from bupt_ncov_report.status_table import *
+
+
+def write_slot(name: str, index: int) -> None:
+    """在另一个进程中打开状态表并写入"""
+    table = StatusTable.attach(name)
+    try:
+        table.set(index, PHASE.SUBMIT)
+    finally:
+        table.close()
+
+
+@unittest.skipIf(sys.version_info < (3, 8), 'multiprocessing.shared_memory 需要 Python 3.8 以上')
+class Test_StatusTable(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.table = StatusTable.create(f'bnr-test-{uuid.uuid4().hex[:8]}', 4)
+
+    def tearDown(self) -> None:
+        self.table.close()
+
+    def test_initiallyQueued(self):
+        self.assertEqual(4, len(self.table))
+        self.assertEqual(QUEUED, self.table.get(3))
+        self.assertEqual(4, self.table.counts()[QUEUED])
+        self.assertFalse(self.table.finished())
+
+    def test_setAndCount(self):
+        self.table.set(0, PHASE.LOGIN)
+        self.table.finish(1, True)
+        self.table.finish(2, False)
+        self.table.skip(3)
+
+        self.assertEqual(PHASE.LOGIN, self.table.get(0))
+        self.assertEqual(
+            {QUEUED: 0, PHASE.LOGIN: 1, PHASE.FETCH: 0, PHASE.VERIFY: 0, PHASE.SUBMIT: 0,
+             PHASE.DONE: 1, FAILED: 1, SKIPPED: 1},
+            self.table.counts(),
+        )
+        self.assertEqual(
+            '完成 3/4（成功 1，失败 1，跳过 1），进行中 1（login 1，fetch 0，verify 0，submit 0），排队 0',
+            format_progress(self.table.counts()),
+        )
+
+        self.table.finish(0, True)
+        self.assertTrue(self.table.finished())
+
+    def test_otherProcess(self):
+        """其它进程按名字打开状态表，写入的状态对本进程立即可见；其退出后状态表仍然存在"""
+        process = multiprocessing.get_context('spawn').Process(target=write_slot, args=(self.table.name, 2))
+        process.start()
+        process.join()
+
+        self.assertEqual(0, process.exitcode)
+        self.assertEqual(PHASE.SUBMIT, self.table.get(2))
+
+        other = StatusTable.attach(self.table.name)
+        try:
+            self.assertEqual(PHASE.SUBMIT, other.get(2))
+        finally:
+            other.close()
+
+    def test_reader(self):
+        self.table.finish(0, True)
+        self.table.finish(1, True)
+        self.table.skip(2)
+        self.table.finish(3, False)
+
+        proc = subprocess.run(
+            [sys.executable, '-m', 'bupt_ncov_report.status_table', self.table.name],
+            stdout=subprocess.PIPE, universal_newlines=True, check=True,
+        )
+        self.assertIn('完成 4/4（成功 2，失败 1，跳过 1）', proc.stdout)
+
+    def test_unknownState(self):
+        with self.assertRaises(KeyError) as _asRa:
+            self.table.set(0, PHASE.INIT)
+
+
+if __name__ == '__main__':
+    unittest.main()
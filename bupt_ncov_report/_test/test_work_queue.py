@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from bupt_ncov_report.work_queue import *
+
+
+class FakeClock:
+    """可以手动调整的时钟，用于测试租约过期。"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Test_WorkQueue(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'queue.sqlite3')
+        self.clock = FakeClock()
+        self.queue = self.open_queue()
+
+    def tearDown(self) -> None:
+        self.queue.close()
+        self.tmpdir.cleanup()
+
+    def open_queue(self) -> WorkQueue:
+        return WorkQueue(self.path, visibility_timeout=60, max_attempts=2, clock=self.clock)
+
+    def test_walMode(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            self.assertEqual('wal', conn.execute('PRAGMA journal_mode').fetchone()[0])
+        finally:
+            conn.close()
+
+    def test_lease_ack(self):
+        self.assertEqual(2, self.queue.enqueue([{'BUPT_SSO_USER': 'a'}, {'BUPT_SSO_USER': 'b'}]))
+
+        lease = self.queue.lease()
+        self.assertEqual({'BUPT_SSO_USER': 'a'}, lease.payload)
+        self.assertEqual(1, lease.attempts)
+        self.assertTrue(self.queue.ack(lease))
+
+        self.assertEqual({'BUPT_SSO_USER': 'b'}, self.queue.lease().payload)
+        self.assertEqual({'ready': 0, 'waiting': 1, 'dead': 0}, self.queue.counts())
+
+    def test_lease_emptyQueue(self):
+        self.assertIsNone(self.queue.lease())
+        self.assertIsNone(self.queue.next_visible_in())
+
+    def test_lease_invisibleUntilTimeout(self):
+        self.queue.enqueue([{'BUPT_SSO_USER': 'a'}])
+        self.queue.lease()
+
+        self.assertIsNone(self.queue.lease())
+        self.assertEqual(60, self.queue.next_visible_in())
+
+    def test_lease_expiredReturnsToQueue(self):
+        """领取任务的进程崩溃时，租约到期后任务回到队列；旧的租约不能再确认"""
+        self.queue.enqueue([{'BUPT_SSO_USER': 'a'}])
+        crashed = self.queue.lease()
+        self.clock.now += 60
+
+        lease = self.queue.lease()
+        self.assertEqual(crashed.job_id, lease.job_id)
+        self.assertEqual(2, lease.attempts)
+        self.assertFalse(self.queue.ack(crashed))
+        self.assertTrue(self.queue.ack(lease))
+
+    def test_lease_expiredTooManyTimes(self):
+        self.queue.enqueue([{'BUPT_SSO_USER': 'a'}])
+        self.queue.lease()
+        self.clock.now += 60
+        self.queue.lease()
+        self.clock.now += 60
+
+        self.assertIsNone(self.queue.lease())
+        self.assertEqual([DeadLetter(1, {'BUPT_SSO_USER': 'a'}, 2, '租约过期')], self.queue.dead_letters())
+
+    def test_nack_retryThenDead(self):
+        self.queue.enqueue([{'BUPT_SSO_USER': 'a'}])
+
+        self.assertTrue(self.queue.nack(self.queue.lease(), 'first', delay=10))
+        self.assertIsNone(self.queue.lease())
+        self.clock.now += 10
+
+        self.assertTrue(self.queue.nack(self.queue.lease(), 'second'))
+        self.assertIsNone(self.queue.lease())
+        self.assertIsNone(self.queue.next_visible_in())
+        self.assertEqual([DeadLetter(1, {'BUPT_SSO_USER': 'a'}, 2, 'second')], self.queue.dead_letters())
+        self.assertEqual({'ready': 0, 'waiting': 0, 'dead': 1}, self.queue.counts())
+
+    def test_requeueDead(self):
+        self.queue.enqueue([{'BUPT_SSO_USER': 'a'}])
+        self.queue.nack(self.queue.lease())
+        self.queue.nack(self.queue.lease())
+
+        self.assertEqual(1, self.queue.requeue_dead())
+        self.assertEqual(1, self.queue.lease().attempts)
+
+    def test_multipleConnections(self):
+        """多个进程（各自的连接）不会领取到同一个任务"""
+        other = self.open_queue()
+        try:
+            self.queue.enqueue({'BUPT_SSO_USER': str(i)} for i in range(3))
+
+            leased = [self.queue.lease(), other.lease(), self.queue.lease(), other.lease()]
+            self.assertIsNone(leased[-1])
+            self.assertEqual({'0', '1', '2'}, {lease.payload['BUPT_SSO_USER'] for lease in leased[:-1]})
+            self.assertTrue(other.ack(leased[1]))
+        finally:
+            other.close()
+
+    def test_invalidArguments(self):
+        with self.assertRaises(ValueError) as _asRa:
+            WorkQueue(self.path, visibility_timeout=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
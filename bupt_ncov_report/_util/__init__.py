@@ -0,0 +1,17 @@
+import sys
+from typing import TYPE_CHECKING
+
+from kv_config_reader import install_lazy_exports
+
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    from .log_writer import *
+    from .rotating_handler import *
+else:
+    # 导入本包（各子包的 __init__.py 都要用 install_lazy_exports）时不导入日志相关的模块
+    install_lazy_exports(globals(), {
+        'AsyncLogWriter': '.log_writer',
+        'BatchFileHandler': '.log_writer',
+        'BatchStreamHandler': '.log_writer',
+        'get_log_writer': '.log_writer',
+        'CompressingRotatingFileHandler': '.rotating_handler',
+    })
@@ -0,0 +1,224 @@
+__all__ = (
+    'AsyncLogWriter',
+    'BatchFileHandler',
+    'BatchStreamHandler',
+    'get_log_writer',
+)
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import weakref
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """
+    emit 时不立即 flush 的 StreamHandler，由 AsyncLogWriter 在处理完一批日志后调用 flush_batch 统一 flush。
+    """
+
+    def flush(self) -> None:
+        pass
+
+    def flush_batch(self) -> None:
+        super().flush()
+
+    def close(self) -> None:
+        self.flush_batch()
+        super().close()
+
+
+class BatchFileHandler(logging.FileHandler):
+    """
+    emit 时不立即 flush 的 FileHandler；见 BatchStreamHandler。
+    """
+
+    def flush(self) -> None:
+        pass
+
+    def flush_batch(self) -> None:
+        super().flush()
+
+    def close(self) -> None:
+        self.flush_batch()
+        super().close()
+
+
+# 所有 AsyncLogWriter；fork 前后逐个处理，见 _before_fork、_after_fork_in_child
+_instances: 'weakref.WeakSet[AsyncLogWriter]' = weakref.WeakSet()
+
+
+class AsyncLogWriter:
+    """
+    在后台线程中写日志。
+
+    调用方的线程只需把日志记录放进队列（通过 QueueHandler），不会在 handler 的锁上互相等待，也不会被磁盘 I/O 阻塞。
+    唯一的后台线程从队列中批量取出日志，逐条交给各个输出目标，每批结束后才 flush 一次。
+    输出目标以名字区分（如 'stdout' 或日志文件的绝对路径），同一目标只会添加一次。
+
+    fork 出的子进程（如 ProcessPool 的工作进程）没有父进程的后台线程。fork 前会先写完父进程队列中的日志，
+    fork 后在子进程中重新初始化队列与锁，并为继承的输出目标启动子进程自己的后台线程；
+    Python 3.6 没有 os.register_at_fork，改为在子进程中第一次调用 has_target、add_target 或 drain 时重新初始化。
+    """
+
+    # 每批最多处理的日志条数
+    BATCH_SIZE = 256
+
+    def __init__(self) -> None:
+        self.queue: 'queue.Queue[Optional[logging.LogRecord]]' = queue.Queue()
+        self._targets: Dict[str, logging.Handler] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        _instances.add(self)
+
+    def queue_handler(self) -> QueueHandler:
+        """生成一个把日志放进本对象队列的 handler，用于挂到 logger 上。"""
+        return QueueHandler(self.queue)
+
+    def has_target(self, name: str) -> bool:
+        self._check_fork()
+        with self._lock:
+            return name in self._targets
+
+    def add_target(self, name: str, handler: logging.Handler) -> None:
+        """
+        添加一个输出目标；同名目标已经存在时不做任何事。
+        :param name: 目标的名字
+        :param handler: 真正写日志的 handler，建议使用 BatchStreamHandler 或 BatchFileHandler
+        :return: None
+        """
+        self._check_fork()
+        with self._lock:
+            if name in self._targets:
+                handler.close()
+                return
+            self._targets[name] = handler
+
+        self._start()
+
+    def drain(self) -> None:
+        """
+        阻塞，直到队列中已有的日志都被写出并 flush。
+        用于程序结束前，或需要立即读取日志文件时。
+        """
+        self._check_fork()
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.join()
+
+    def stop(self) -> None:
+        """写完队列中的日志后停止后台线程，并关闭所有输出目标。"""
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+        with self._lock:
+            for handler in self._targets.values():
+                handler.close()
+            self._targets.clear()
+
+    def _check_fork(self) -> None:
+        """在 fork 出的子进程中第一次使用时重新初始化；Python 3.7 以上已经在 fork 后立即完成。"""
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+
+    def _reset_after_fork(self) -> None:
+        """
+        在 fork 出的子进程中重新初始化队列与锁，并为继承的输出目标启动本进程的后台线程。
+        队列对象保持不变，已挂在 logger 上的 QueueHandler 仍然指向它；其中父进程尚未写出的日志被丢弃，由父进程写出。
+        """
+        self._pid = os.getpid()
+        queue.Queue.__init__(self.queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        if len(self._targets) > 0:
+            self._start()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='bnr-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Optional[logging.LogRecord]] = [self.queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = self._write(batch)
+            for _ in batch:
+                self.queue.task_done()
+            if stopping:
+                return
+
+    def _write(self, batch: List[Optional[logging.LogRecord]]) -> bool:
+        """
+        将一批日志写到所有输出目标，然后 flush。
+        :return: 这批日志中是否有停止标记
+        """
+        stopping = False
+        with self._lock:
+            handlers = list(self._targets.values())
+
+        for record in batch:
+            if record is None:
+                stopping = True
+                continue
+            for handler in handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+        for handler in handlers:
+            flush_batch = getattr(handler, 'flush_batch', handler.flush)
+            try:
+                flush_batch()
+            except Exception:
+                # 与 Handler.handleError 一致：写日志出错不应影响程序运行
+                pass
+
+        return stopping
+
+
+_writer: Optional[AsyncLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _before_fork() -> None:
+    # 先写出并 flush 队列中的日志，子进程继承的输出目标中没有未 flush 的内容，不会重复写出
+    for writer in list(_instances):
+        writer.drain()
+
+
+def _after_fork_in_child() -> None:
+    global _writer_lock
+
+    _writer_lock = threading.Lock()
+    for writer in list(_instances):
+        writer._reset_after_fork()
+
+
+# Python 3.6 没有 os.register_at_fork；见 AsyncLogWriter._check_fork
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_before_fork, after_in_child=_after_fork_in_child)
+
+
+def get_log_writer() -> AsyncLogWriter:
+    """
+    取出整个进程共用的 AsyncLogWriter；第一次调用时创建，并注册在退出时写完剩余日志。
+    """
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = AsyncLogWriter()
+            atexit.register(_writer.stop)
+        return _writer
@@ -0,0 +1,165 @@
+__all__ = (
+    'CompressingRotatingFileHandler',
+)
+
+import datetime
+import glob
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+from typing import Optional
+
+from .log_writer import *
+
+
+class CompressingRotatingFileHandler(BatchFileHandler):
+    """
+    按大小与日期轮换的日志文件 handler，适用于长期运行的程序。
+
+    写入一条日志前，如果文件将超过 max_bytes，或者文件的日期（本地时间）不是今天，
+    就把它重命名为「原文件名.日期_时间」，然后写入新文件。
+    被轮换出去的文件由后台线程压缩为 .gz，写日志的线程不会等待压缩；
+    压缩后只保留最新的 backup_count 个 .gz 文件，更早的被删除。
+    close 时等待压缩完毕；上次运行中途退出时留下的未压缩文件与 .gz.tmp 在下次建立 handler 时补压缩或删除。
+    """
+
+    # 轮换出去的文件名的后缀，见 _do_rollover
+    ROTATED_SUFFIX = re.compile(r'\.\d{4}-\d{2}-\d{2}_\d{6}_\d{6}(\.\d+)?')
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, encoding: Optional[str] = None):
+        """
+        :param filename: 日志文件路径
+        :param max_bytes: 文件超过该大小后轮换；0 表示只按日期轮换
+        :param backup_count: 最多保留的压缩文件个数
+        :param encoding: 文件编码
+        """
+        if max_bytes < 0 or backup_count < 0:
+            raise ValueError('max_bytes 与 backup_count 不能为负数')
+
+        super().__init__(filename, encoding=encoding)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self._file_date = self._date_of_file(self.baseFilename)
+        self._compress_queue: 'queue.Queue[Optional[str]]' = queue.Queue()
+        self._compressor: Optional[threading.Thread] = None
+        self._recover()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self._should_rollover(record):
+                self._do_rollover()
+        except Exception:
+            self.handleError(record)
+            return
+
+        super().emit(record)
+
+    def wait_compressed(self) -> None:
+        """阻塞，直到已经轮换出去的文件都压缩完毕。"""
+        self._compress_queue.join()
+
+    def close(self) -> None:
+        # 等待压缩完毕再返回；压缩线程是 daemon 线程，否则进程退出时会留下 .gz.tmp 与未压缩的文件
+        if self._compressor is not None and self._compressor.is_alive():
+            self._compress_queue.put(None)
+            self._compressor.join()
+        self._compressor = None
+        super().close()
+
+    def _should_rollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+
+        if self._file_date != datetime.date.today():
+            if self.stream.tell() > 0:
+                return True
+            self._file_date = datetime.date.today()
+
+        if self.max_bytes > 0:
+            msg = f'{self.format(record)}{self.terminator}'
+            if self.stream.tell() + len(msg.encode(self.encoding or 'utf-8')) > self.max_bytes:
+                # 单条日志超过 max_bytes 时，仍写入空文件，避免无限轮换
+                return self.stream.tell() > 0
+
+        return False
+
+    def _do_rollover(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        # 文件名中带有轮换时间，按文件名排序即按时间排序
+        stamp = datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S_%f')
+        rotated = f'{self.baseFilename}.{stamp}'
+        index = 1
+        while os.path.exists(rotated) or os.path.exists(f'{rotated}.gz'):
+            rotated = f'{self.baseFilename}.{stamp}.{index}'
+            index += 1
+
+        os.replace(self.baseFilename, rotated)
+        self._file_date = datetime.date.today()
+        self.stream = self._open()
+
+        self._enqueue_compress(rotated)
+
+    def _recover(self) -> None:
+        """删除上次运行留下的 .gz.tmp，并重新压缩没有压缩完的轮换文件。"""
+        prefix = glob.escape(self.baseFilename)
+        for path in glob.glob(f'{prefix}.*.gz.tmp'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        for path in sorted(glob.glob(f'{prefix}.*')):
+            if self.ROTATED_SUFFIX.fullmatch(path[len(self.baseFilename):]):
+                self._enqueue_compress(path)
+
+    def _enqueue_compress(self, path: str) -> None:
+        self._compress_queue.put(path)
+        if self._compressor is None or not self._compressor.is_alive():
+            self._compressor = threading.Thread(target=self._compress_loop, name='bnr-log-compressor', daemon=True)
+            self._compressor.start()
+
+    def _compress_loop(self) -> None:
+        while True:
+            path = self._compress_queue.get()
+            if path is None:
+                self._compress_queue.task_done()
+                return
+            try:
+                self._compress(path)
+                self._apply_retention()
+            except OSError:
+                # 压缩失败时保留未压缩的文件，不影响写日志
+                pass
+            finally:
+                self._compress_queue.task_done()
+
+    @staticmethod
+    def _compress(path: str) -> None:
+        # 只在第一次轮转时导入 gzip（及其依赖的 zlib），不拖慢冷启动
+        import gzip
+
+        with open(path, 'rb') as src, gzip.open(f'{path}.gz.tmp', 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+
+        os.replace(f'{path}.gz.tmp', f'{path}.gz')
+        os.remove(path)
+
+    def _apply_retention(self) -> None:
+        archives = sorted(glob.glob(f'{glob.escape(self.baseFilename)}.*.gz'))
+        for path in archives[:max(len(archives) - self.backup_count, 0)]:
+            os.remove(path)
+
+    @staticmethod
+    def _date_of_file(path: str) -> datetime.date:
+        """已有文件的修改日期；文件不存在时为今天。"""
+        try:
+            return datetime.date.fromtimestamp(os.path.getmtime(path))
+        except OSError:
+            return datetime.date.today()
@@ -1,2 +1,3 @@
 from .constant import *
 from .headers import *
+from .phase import *
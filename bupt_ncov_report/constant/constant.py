@@ -1,3 +1,5 @@
+import datetime
+
 # 上报网站的 API 的地址
 LOGIN_API = 'https://app.bupt.edu.cn/uc/wap/login/check'
 REPORT_PAGE = 'https://app.bupt.edu.cn/ncov/wap/default/index'
@@ -6,3 +8,6 @@ REPORT_API = 'https://app.bupt.edu.cn/ncov/wap/default/save'
 # 不能再短了，再短肯定是出 bug 了
 REASONABLE_LENGTH = 24
 TIMEOUT_SECOND = 15
+
+# 北京时间（UTC+8）。上报网站按北京时间的日期判断「今天是否已上报」
+BEIJING_TZ = datetime.timezone(datetime.timedelta(hours=8))
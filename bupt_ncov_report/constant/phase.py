@@ -0,0 +1,11 @@
+# 一次上报运行所经过的阶段，用于记录「运行到了哪一步」
+class PHASE:
+    INIT = 'init'
+    LOGIN = 'login'
+    FETCH = 'fetch'
+    VERIFY = 'verify'
+    SUBMIT = 'submit'
+    DONE = 'done'
+
+    def __init__(self) -> None:
+        raise NotImplementedError
@@ -0,0 +1,71 @@
+__all__ = (
+    'LruCache',
+)
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, List, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class LruCache(Generic[K, V]):
+    """
+    有容量上限的 LRU 缓存，线程安全。
+    用于在云函数容器被复用时，保留 Session 等创建成本较高的对象；超出容量时淘汰最久未使用的项。
+    """
+
+    def __init__(self, maxsize: int, on_evict: Optional[Callable[[V], None]] = None):
+        """
+        :param maxsize: 最多缓存的项数
+        :param on_evict: 项被淘汰或缓存被清空时调用，可用于释放资源（如关闭 Session）
+        """
+        if maxsize <= 0:
+            raise ValueError('maxsize 必须大于 0')
+
+        self._maxsize = maxsize
+        self._on_evict = on_evict
+        self._items: 'OrderedDict[K, V]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: K, factory: Callable[[], V]) -> V:
+        """
+        取出 key 对应的项；不存在时调用 factory 创建并缓存。
+        :param key: 键
+        :param factory: 创建新项的函数
+        :return: 缓存的项
+        """
+        evicted: List[V] = []
+
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                return value
+
+            value = factory()
+            self._items[key] = value
+            while len(self._items) > self._maxsize:
+                evicted.append(self._items.popitem(last=False)[1])
+
+        self._evict(evicted)
+        return value
+
+    def clear(self) -> None:
+        """清空缓存，并对每一项调用 on_evict。"""
+        with self._lock:
+            evicted = list(self._items.values())
+            self._items.clear()
+
+        self._evict(evicted)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _evict(self, values: List[V]) -> None:
+        if self._on_evict is None:
+            return
+
+        for value in values:
+            self._on_evict(value)
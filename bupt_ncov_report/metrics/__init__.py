@@ -0,0 +1,15 @@
+import sys
+from typing import TYPE_CHECKING
+
+from .._util import install_lazy_exports
+
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    from .metrics import *
+    from .server import *
+else:
+    # server 导入 http.server，只在用到时导入
+    install_lazy_exports(globals(), {
+        'PHASE_BUCKETS': '.metrics',
+        'Metrics': '.metrics',
+        'MetricsServer': '.server',
+    })
@@ -0,0 +1,156 @@
+__all__ = (
+    'PHASE_BUCKETS',
+    'Metrics',
+)
+
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..constant import *
+from ..recorder.base import *
+
+# 各阶段耗时直方图的桶的上界（秒）；请求的超时时间为 TIMEOUT_SECOND
+PHASE_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, TIMEOUT_SECOND, 30.0, 60.0)
+
+# 直方图中出现的阶段；没有运行过的阶段也输出，以免时间序列时有时无
+_TIMED_PHASES = (PHASE.LOGIN, PHASE.FETCH, PHASE.VERIFY, PHASE.SUBMIT)
+
+
+class _Histogram:
+    """累积的直方图，与 Prometheus 的 histogram 相同。"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # 每个桶（不累积）的计数；最后一个为 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def copy(self) -> '_Histogram':
+        other = _Histogram(self.buckets)
+        other.counts = list(self.counts)
+        other.sum = self.sum
+        return other
+
+
+class Metrics(IRecorder):
+    """
+    进程内的运行指标，线程安全：各阶段耗时的直方图、正在运行的账号数、运行结果与各 notifier 发送通知的结果的计数。
+    作为 IRecorder 交给 Program，在每个账号运行结束时更新；render 输出 Prometheus 文本格式，status 输出概况。
+
+    更新与读取只在持有锁时复制或加减几个数字，格式化在锁外进行，因此读取不会阻塞运行中的账号。
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = PHASE_BUCKETS):
+        """
+        :param buckets: 各阶段耗时直方图的桶的上界（秒），从小到大排列
+        """
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self._started_at = time.time()
+        self._in_flight = 0
+        # 是否成功 -> 次数
+        self._runs: Dict[bool, int] = {True: 0, False: 0}
+        self._phases: Dict[str, _Histogram] = {phase: _Histogram(buckets) for phase in _TIMED_PHASES}
+        # (notifier 类名, 是否成功) -> 次数
+        self._notifications: Dict[Tuple[str, bool], int] = {}
+        self._last_outcome: Optional[RunOutcome] = None
+        self._last_outcome_at: Optional[float] = None
+
+    def account_started(self) -> None:
+        """一个账号开始运行。"""
+        with self._lock:
+            self._in_flight += 1
+
+    def account_finished(self) -> None:
+        """一个账号运行结束（无论成功与否）。"""
+        with self._lock:
+            self._in_flight -= 1
+
+    def record(self, outcome: RunOutcome) -> None:
+        with self._lock:
+            self._runs[outcome.success] += 1
+            for phase, seconds in outcome.timings:
+                if phase not in self._phases:
+                    self._phases[phase] = _Histogram(self._buckets)
+                self._phases[phase].observe(seconds)
+            for notification in outcome.notifications:
+                self._notifications[notification] = self._notifications.get(notification, 0) + 1
+            self._last_outcome = outcome
+            self._last_outcome_at = time.time()
+
+    def render(self) -> str:
+        """
+        以 Prometheus 文本格式（0.0.4）输出所有指标。
+        :return: 文本，以换行结尾
+        """
+        with self._lock:
+            in_flight = self._in_flight
+            runs = dict(self._runs)
+            phases = {phase: histogram.copy() for phase, histogram in self._phases.items()}
+            notifications = dict(self._notifications)
+
+        lines: List[str] = [
+            '# HELP bnr_start_time_seconds 进程开始记录指标的时间（Unix 时间戳）',
+            '# TYPE bnr_start_time_seconds gauge',
+            f'bnr_start_time_seconds {self._started_at:.3f}',
+            '# HELP bnr_in_flight_accounts 正在运行的账号数',
+            '# TYPE bnr_in_flight_accounts gauge',
+            f'bnr_in_flight_accounts {in_flight}',
+            '# HELP bnr_runs_total 运行结束的账号数',
+            '# TYPE bnr_runs_total counter',
+            f'bnr_runs_total{{result="success"}} {runs[True]}',
+            f'bnr_runs_total{{result="failure"}} {runs[False]}',
+            '# HELP bnr_phase_duration_seconds 每个账号最后一次尝试中各阶段的耗时',
+            '# TYPE bnr_phase_duration_seconds histogram',
+        ]
+
+        for phase, histogram in phases.items():
+            cumulative = 0
+            for bound, count in zip([*map(_format_float, histogram.buckets), '+Inf'], histogram.counts):
+                cumulative += count
+                lines.append(f'bnr_phase_duration_seconds_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+            lines.append(f'bnr_phase_duration_seconds_sum{{phase="{phase}"}} {_format_float(histogram.sum)}')
+            lines.append(f'bnr_phase_duration_seconds_count{{phase="{phase}"}} {cumulative}')
+
+        lines.append('# HELP bnr_notifications_total 各 notifier 发送通知的次数')
+        lines.append('# TYPE bnr_notifications_total counter')
+        for (notifier, success), count in sorted(notifications.items()):
+            result = 'success' if success else 'failure'
+            lines.append(f'bnr_notifications_total{{notifier="{notifier}",result="{result}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def status(self) -> Dict[str, Any]:
+        """
+        运行概况，用于 /status。不含账号等敏感信息。
+        :return: dict，可编码为 JSON
+        """
+        with self._lock:
+            last_outcome, last_outcome_at = self._last_outcome, self._last_outcome_at
+            result: Dict[str, Any] = {
+                'uptime_seconds': round(time.time() - self._started_at, 3),
+                'in_flight': self._in_flight,
+                'runs': {'success': self._runs[True], 'failure': self._runs[False]},
+            }
+
+        result['last_run'] = None
+        if last_outcome is not None:
+            result['last_run'] = {
+                'finished_at': last_outcome_at,
+                'phase': last_outcome.phase,
+                'success': last_outcome.success,
+                'error_class': last_outcome.error_class,
+                'duration': round(last_outcome.duration, 3),
+            }
+        return result
+
+
+def _format_float(value: float) -> str:
+    """与 Prometheus 的客户端库相同，整数也带一位小数，如 le="1.0"。"""
+    return repr(float(value))
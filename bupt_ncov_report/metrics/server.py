@@ -0,0 +1,100 @@
+__all__ = (
+    'MetricsServer',
+)
+
+import json
+import logging
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Callable, Dict, Tuple
+
+from .metrics import *
+
+logger = logging.getLogger(__name__)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """每个请求一个线程；与 Python 3.7 起的 http.server.ThreadingHTTPServer 相同。"""
+
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """处理 /healthz、/metrics 与 /status 三个路径。"""
+
+    # 由 MetricsServer 设置：路径 -> (Content-Type, 生成响应内容的函数)
+    routes: Dict[str, Tuple[str, Callable[[], str]]] = {}
+
+    def do_GET(self) -> None:
+        route = self.routes.get(self.path.split('?', 1)[0])
+        if route is None:
+            self._respond(404, 'text/plain; charset=utf-8', 'not found\n')
+            return
+
+        content_type, render = route
+        try:
+            body = render()
+        except Exception:
+            logger.exception(f'生成 {self.path} 的内容时发生异常：')
+            self._respond(500, 'text/plain; charset=utf-8', 'internal error\n')
+            return
+
+        self._respond(200, content_type, body)
+
+    def _respond(self, status: int, content_type: str, body: str) -> None:
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # 默认写到 stderr；抓取很频繁，只打调试日志
+        logger.debug(format % args)
+
+
+class MetricsServer:
+    """
+    在后台线程中提供运行指标的 HTTP 服务（只用标准库）：
+
+    - /healthz：进程存活时返回 200 ok；
+    - /metrics：Prometheus 文本格式的指标，见 Metrics.render；
+    - /status：JSON 格式的运行概况，见 Metrics.status。
+
+    每个请求在单独的线程中处理，只在复制指标时短暂持有 Metrics 的锁，不会阻塞上报。
+    """
+
+    def __init__(self, metrics: Metrics, host: str = '127.0.0.1', port: int = 0):
+        """
+        :param metrics: 要提供的指标
+        :param host: 监听的地址；默认只允许本机访问
+        :param port: 监听的端口；0 表示由系统分配
+        """
+        routes: Dict[str, Tuple[str, Callable[[], str]]] = {
+            '/healthz': ('text/plain; charset=utf-8', lambda: 'ok\n'),
+            '/metrics': ('text/plain; version=0.0.4; charset=utf-8', metrics.render),
+            '/status': ('application/json', lambda: json.dumps(metrics.status(), ensure_ascii=False) + '\n'),
+        }
+        handler = type('MetricsHandler', (_Handler,), {'routes': routes})
+
+        self._server = _ThreadingHTTPServer((host, port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='bnr-metrics', daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """实际监听的 (地址, 端口)。"""
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def start(self) -> None:
+        self._thread.start()
+        logger.info(f'运行指标服务监听于 http://{self.address[0]}:{self.address[1]}/')
+
+    def close(self) -> None:
+        """停止服务并关闭端口。"""
+        if self._thread.is_alive():
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
@@ -1,3 +1,15 @@
-from .base import *
-from .server_chan import *
-from .telegram import *
+import sys
+from typing import TYPE_CHECKING
+
+from .._util import install_lazy_exports
+
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    from .base import *
+    from .server_chan import *
+    from .telegram import *
+else:
+    install_lazy_exports(globals(), {
+        'INotifier': '.base',
+        'ServerChanNotifier': '.server_chan',
+        'TelegramNotifier': '.telegram',
+    })
@@ -22,10 +22,11 @@ class INotifier(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def notify(self, *, success: bool, msg: Optional[str]) -> None:
+    def notify(self, *, success: bool, msg: Optional[str], timeout: Optional[float] = None) -> None:
         """
         通过该平台通知用户操作成功的消息。失败时将抛出各种异常。
         :param success: 表示是否成功
         :param msg: 成功时表示服务器的返回值，失败时表示失败原因；None 表示没有上述内容
+        :param timeout: 请求的超时时间（秒）；None 表示 TIMEOUT_SECOND
         :return: None
         """
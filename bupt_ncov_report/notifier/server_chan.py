@@ -13,6 +13,8 @@ from ..constant import *
 
 class ServerChanNotifier(INotifier):
     PLATFORM_NAME = 'Server 酱'
+    # API 所在的站点；可用于预先建立连接
+    API_ORIGIN = 'https://sc.ftqq.com'
 
     def __init__(self, *, sckey: str, sess: requests.Session):
         """
@@ -22,7 +24,7 @@ class ServerChanNotifier(INotifier):
         self._sckey = sckey
         self._sess = sess
 
-    def notify(self, *, success: bool, msg: Optional[str]) -> None:
+    def notify(self, *, success: bool, msg: Optional[str], timeout: Optional[float] = None) -> None:
         """发送消息。"""
 
         # Server 不允许短时间重复发送相同内容，故加上时间
@@ -43,12 +45,12 @@ class ServerChanNotifier(INotifier):
 
         # 调用 Server 酱接口发送消息
         sc_res_raw = self._sess.post(
-            f'https://sc.ftqq.com/{self._sckey}.send',
+            f'{self.API_ORIGIN}/{self._sckey}.send',
             data={
                 'text': f'bupt_ncov_report运行{title}',
                 'desp': f'({time_str}) {body}',
             },
-            timeout=TIMEOUT_SECOND,
+            timeout=timeout if timeout is not None else TIMEOUT_SECOND,
         )
 
         # 处理可能出现的异常情况
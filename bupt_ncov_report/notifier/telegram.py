@@ -16,6 +16,8 @@ logger = logging.getLogger(__name__)
 
 class TelegramNotifier(INotifier):
     PLATFORM_NAME = 'Telegram 机器人'
+    # API 所在的站点；可用于预先建立连接
+    API_ORIGIN = 'https://api.telegram.org'
 
     def __init__(self, *, token: str, chat_id: str, session: requests.Session):
         """
@@ -26,7 +28,7 @@ class TelegramNotifier(INotifier):
         self._chat_id = chat_id
         self._sess = session
 
-    def notify(self, *, success: bool, msg: Optional[str]) -> None:
+    def notify(self, *, success: bool, msg: Optional[str], timeout: Optional[float] = None) -> None:
         PREFIX = '[bupt-ncov-report] '
 
         if msg is not None:
@@ -37,18 +39,18 @@ class TelegramNotifier(INotifier):
         else:
             body = '<b>成功</b>' if success else '<b>失败</b>'
 
-        self._send(f'{PREFIX}{body}')
+        self._send(f'{PREFIX}{body}', timeout if timeout is not None else TIMEOUT_SECOND)
 
-    def _send(self, msg: Optional[str]) -> None:
+    def _send(self, msg: Optional[str], timeout: float) -> None:
         """发送消息。"""
         tg_res_raw = self._sess.post(
-            f'https://api.telegram.org/bot{self._token}/sendMessage',
+            f'{self.API_ORIGIN}/bot{self._token}/sendMessage',
             json={
                 'chat_id': self._chat_id,
                 'text': msg,
                 'parse_mode': 'HTML',
             },
-            timeout=TIMEOUT_SECOND,
+            timeout=timeout,
         )
 
         # 处理可能出现的异常情况
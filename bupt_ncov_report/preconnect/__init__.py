@@ -0,0 +1 @@
+from .preconnect import *
@@ -0,0 +1,190 @@
+__all__ = (
+    'DnsCache',
+    'DnsCachingAdapter',
+    'preconnect',
+)
+
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from ..constant import *
+
+logger = logging.getLogger(__name__)
+
+# getaddrinfo 的返回值
+_AddrInfo = List[Tuple[Any, ...]]
+
+
+class DnsCache:
+    """
+    缓存 DNS 解析结果的 getaddrinfo，线程安全。
+
+    只缓存通过 add_hosts 登记过的主机（上报网站与通知平台），其它主机照常解析。
+    结果在 ttl 秒内有效；过期后重新解析，若重新解析失败，则沿用过期的结果。
+    只有挂载了 DnsCachingAdapter 的 Session 建立连接时才经过本缓存，不影响进程中的其它代码。
+    """
+
+    def __init__(
+            self,
+            ttl: float,
+            resolver: Optional[Callable[..., _AddrInfo]] = None,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param ttl: 解析结果的有效时间（秒）
+        :param resolver: 真正进行解析的函数，签名与 socket.getaddrinfo 相同；None 表示 socket.getaddrinfo
+        :param clock: 返回当前时间（秒）的函数，用于判断是否过期
+        """
+        if ttl <= 0:
+            raise ValueError('ttl 必须大于 0')
+
+        self._ttl = ttl
+        self._resolver = resolver if resolver is not None else socket.getaddrinfo
+        self._clock = clock
+        self._hosts: Set[str] = set()
+        # (getaddrinfo 的参数) -> (解析时间, 结果)
+        self._entries: Dict[Tuple[Any, ...], Tuple[float, _AddrInfo]] = {}
+        self._lock = threading.Lock()
+
+    def add_hosts(self, hosts: Iterable[str]) -> None:
+        """
+        登记要缓存的主机。
+        :param hosts: 主机名，如 app.bupt.edu.cn
+        :return: None
+        """
+        with self._lock:
+            self._hosts.update(hosts)
+
+    def __contains__(self, host: object) -> bool:
+        """主机是否登记过。"""
+        return host in self._hosts
+
+    def getaddrinfo(
+            self,
+            host: Any,
+            port: Any,
+            family: int = 0,
+            type: int = 0,
+            proto: int = 0,
+            flags: int = 0,
+    ) -> _AddrInfo:
+        """与 socket.getaddrinfo 相同；登记过的主机返回缓存的结果。"""
+        if host not in self._hosts:
+            return self._resolver(host, port, family, type, proto, flags)
+
+        key = (host, port, family, type, proto, flags)
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is not None and now - entry[0] < self._ttl:
+            return list(entry[1])
+
+        try:
+            result = self._resolver(host, port, family, type, proto, flags)
+        except OSError:
+            if entry is None:
+                raise
+            logger.debug(f'重新解析 {host} 失败，沿用过期的解析结果')
+            return list(entry[1])
+
+        with self._lock:
+            self._entries[key] = (now, result)
+        return list(result)
+
+
+def _caching_connection_class(base: Type[HTTPConnection], dns_cache: DnsCache) -> Type[HTTPConnection]:
+    """生成建立连接时经过 dns_cache 解析主机名的 urllib3 连接类。"""
+
+    def _new_conn(self: Any) -> socket.socket:
+        # urllib3 建立 TCP 连接时解析 _dns_host（host 仍用于 Host 头、SNI 与证书校验）。
+        # 登记过的主机临时换成缓存中的第一个地址；未登记的主机照常解析
+        dns_host = self._dns_host
+        if dns_host not in dns_cache:
+            return base._new_conn(self)
+
+        addr_info = dns_cache.getaddrinfo(dns_host, self.port, 0, socket.SOCK_STREAM)
+        self._dns_host = addr_info[0][4][0]
+        try:
+            return base._new_conn(self)
+        finally:
+            self._dns_host = dns_host
+
+    return type(f'DnsCaching{base.__name__}', (base,), {'_new_conn': _new_conn})
+
+
+class DnsCachingAdapter(HTTPAdapter):
+    """
+    建立连接时经过 DnsCache 解析主机名的 HTTPAdapter。
+    只影响挂载了本 adapter 的 Session；经过代理的请求由代理解析，不经过缓存。
+    """
+
+    def __init__(self, dns_cache: DnsCache, **kwargs: Any):
+        """
+        :param dns_cache: DNS 缓存
+        :param kwargs: 传给 HTTPAdapter，如 pool_maxsize
+        """
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+
+        pool_classes = {}
+        for scheme, pool_class, connection_class in (
+                ('http', HTTPConnectionPool, HTTPConnection),
+                ('https', HTTPSConnectionPool, HTTPSConnection),
+        ):
+            pool_classes[scheme] = type(f'DnsCaching{pool_class.__name__}', (pool_class,), {
+                'ConnectionCls': _caching_connection_class(connection_class, self.dns_cache),
+            })
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+
+def preconnect(session: requests.Session, urls: Iterable[str], count: int, timeout: float = TIMEOUT_SECOND) -> int:
+    """
+    为每个 URL 所在的站点预先建立 count 个连接（包括 DNS 解析、TCP 与 TLS 握手），放进 session 所用的连接池。
+    之后 session（以及挂载了同一个 HTTPAdapter 的其它 Session）发出的请求可以直接使用这些连接，不再等待握手。
+
+    通过 session 并行发出 count 个 HEAD 请求：各请求的响应在全部请求完成之前都不读取，
+    因此各自占用不同的连接；之后读完响应，连接回到池中。池中已有的、仍然可用的连接会被复用，不会重复建立。
+    请求失败只打日志。
+
+    :param session: 发出请求的 Session
+    :param urls: URL，如 https://app.bupt.edu.cn；只用到其中的协议、主机与端口
+    :param count: 每个站点的连接数；超过 HTTPAdapter 的 pool_maxsize 的连接用完后会被丢弃
+    :param timeout: 每个请求的超时时间（秒）
+    :return: 预先建立（或确认可用）的连接数
+    """
+    origins = []
+    for url in urls:
+        parts = urlsplit(url)
+        origins += [f'{parts.scheme}://{parts.netloc}/'] * count
+
+    if len(origins) == 0:
+        return 0
+
+    def head(origin: str) -> Optional[requests.Response]:
+        try:
+            return session.head(origin, timeout=timeout, allow_redirects=False, stream=True)
+        except requests.RequestException as e:
+            logger.warning(f'预先连接 {origin} 失败：{type(e).__name__}: {e}')
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(len(origins), 16), thread_name_prefix='bnr-preconnect') as executor:
+        responses = [res for res in executor.map(head, origins) if res is not None]
+
+    # 读完（空的）响应后，连接回到池中；直接 close 未读完的响应会关闭连接
+    for res in responses:
+        _ = res.content
+        res.close()
+
+    return len(responses)
@@ -0,0 +1 @@
+from .process_pool import *
@@ -0,0 +1,280 @@
+__all__ = (
+    'TaskOutcome',
+    'ProcessPool',
+    'current_rss',
+)
+
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Generic, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar, cast
+
+T = TypeVar('T')
+
+
+def current_rss() -> Optional[int]:
+    """
+    本进程当前占用的物理内存（字节）。
+    Linux 下读取 /proc/self/statm；其它支持 resource 模块的平台返回峰值（ru_maxrss）；都不支持时返回 None。
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 下单位为字节，其它平台为 KiB
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class TaskOutcome(NamedTuple):
+    """一个任务在工作进程中的运行结果。"""
+
+    # 任务在输入中的序号（从 0 开始）
+    task_index: int
+    task: Any
+    # 任务函数的返回值；任务函数抛出异常、工作进程崩溃或超时时为 None
+    status: Optional[int]
+    # 出错时的说明；正常返回时为 None
+    error: Optional[str]
+    # 运行该任务的工作进程的 pid
+    pid: Optional[int]
+
+
+class _Worker:
+    """父进程中记录的一个工作进程。"""
+
+    def __init__(self, process: Any, conn: Connection):
+        self.process = process
+        self.conn = conn
+        # 正在运行的任务：(序号, 任务, 开始时间)；空闲时为 None
+        self.running: Optional[Tuple[int, Any, float]] = None
+
+
+def _worker_main(
+        conn: Connection,
+        func: Callable[[Any], int],
+        max_tasks: int,
+        max_rss: Optional[int],
+        initializer: Optional[Callable[[], None]],
+        finalizer: Optional[Callable[[], None]],
+) -> None:
+    """
+    工作进程的主循环：逐个接收任务并运行，把结果发回父进程。
+    运行了 max_tasks 个任务、或占用内存超过 max_rss 后，在结果中注明即将退出，然后退出，由父进程补充新的工作进程。
+    """
+    if initializer is not None:
+        initializer()
+
+    done = 0
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+
+            task_index, task = message
+            status: Optional[int] = None
+            error: Optional[str] = None
+            try:
+                status = func(task)
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+
+            done += 1
+            rss = current_rss() if max_rss is not None else None
+            retiring = done >= max_tasks or (rss is not None and max_rss is not None and rss > max_rss)
+            conn.send((task_index, status, error, retiring))
+            if retiring:
+                break
+    finally:
+        if finalizer is not None:
+            finalizer()
+        conn.close()
+
+
+class ProcessPool(Generic[T]):
+    """
+    预先启动（fork）的工作进程池，用于隔离各个任务。
+
+    - 工作进程在创建本类时一次性启动，之后复用于多个任务；支持 fork 的平台上使用 fork，工作进程直接继承父进程已经导入的模块；
+    - 工作进程运行了 max_tasks 个任务、或占用内存超过 max_rss 后退出，由新的工作进程替换，以免内存泄漏累积；
+    - 任务与结果通过管道传递，结果只有 (序号, 状态码, 错误信息, 是否退出) 四项；
+    - 某个任务使工作进程崩溃、或运行超过 task_timeout 秒（此时工作进程被杀死）时，只有该任务失败，其它任务照常运行。
+
+    func、initializer 与 finalizer 在工作进程中调用；不支持 fork 的平台上，它们与任务都必须能被 pickle。
+    """
+
+    def __init__(
+            self,
+            func: Callable[[T], int],
+            workers: int,
+            max_tasks: int = 100,
+            max_rss: Optional[int] = None,
+            task_timeout: Optional[float] = None,
+            initializer: Optional[Callable[[], None]] = None,
+            finalizer: Optional[Callable[[], None]] = None,
+    ):
+        """
+        :param func: 任务函数，返回状态码
+        :param workers: 工作进程数
+        :param max_tasks: 每个工作进程最多运行的任务数
+        :param max_rss: 工作进程占用内存（字节）超过该值后退出；None 表示不限
+        :param task_timeout: 每个任务的时限（秒）；None 表示不限
+        :param initializer: 工作进程启动后、运行任务前调用
+        :param finalizer: 工作进程退出前调用，如写出缓冲中的数据
+        """
+        if workers <= 0 or max_tasks <= 0:
+            raise ValueError('workers 与 max_tasks 必须大于 0')
+
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self._args = (func, max_tasks, max_rss, initializer, finalizer)
+        self._task_timeout = task_timeout
+        self._retired: List[Any] = []
+        self._workers = [self._spawn() for _ in range(workers)]
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, *self._args),
+            name='bnr-worker',
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        """用新的工作进程替换已经退出（或将要退出）的工作进程。"""
+        worker.conn.close()
+        self._retired = [process for process in self._retired if process.exitcode is None]
+        self._retired.append(worker.process)
+
+        new_worker = self._spawn()
+        self._workers[self._workers.index(worker)] = new_worker
+        return new_worker
+
+    def run(self, tasks: Iterable[T]) -> Iterator[TaskOutcome]:
+        """
+        在工作进程中运行各个任务。任务是逐个从 tasks 中取出的，不会一次性读入内存。
+        :param tasks: 任务
+        :return: 生成器，按完成的顺序生成各任务的结果
+        """
+        pending = enumerate(tasks)
+        exhausted = False
+
+        while True:
+            # 给空闲的工作进程分配任务
+            for worker in list(self._workers):
+                if exhausted:
+                    break
+                if worker.running is not None:
+                    continue
+
+                item = next(pending, None)
+                if item is None:
+                    exhausted = True
+                    break
+
+                # 空闲的工作进程也可能已经退出（如被系统杀死）
+                if not worker.process.is_alive():
+                    worker = self._replace(worker)
+                try:
+                    worker.conn.send(item)
+                except OSError:
+                    worker = self._replace(worker)
+                    worker.conn.send(item)
+                worker.running = (item[0], item[1], time.monotonic())
+
+            busy = [worker for worker in self._workers if worker.running is not None]
+            if len(busy) == 0:
+                return
+
+            ready = wait(
+                [worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                timeout=self._wait_timeout(busy),
+            )
+            for worker in busy:
+                outcome = self._collect(worker, ready)
+                if outcome is not None:
+                    yield outcome
+
+    def _wait_timeout(self, busy: List[_Worker]) -> Optional[float]:
+        if self._task_timeout is None:
+            return None
+
+        earliest = min(cast(Tuple[int, Any, float], worker.running)[2] for worker in busy)
+        return max(earliest + self._task_timeout - time.monotonic(), 0.0)
+
+    def _collect(self, worker: _Worker, ready: List[Any]) -> Optional[TaskOutcome]:
+        """取出工作进程的结果；工作进程崩溃或超时时替换它。任务还没有完成时返回 None。"""
+        task_index, task, started_at = cast(Tuple[int, Any, float], worker.running)
+        pid = worker.process.pid
+
+        if worker.conn in ready or worker.process.sentinel in ready:
+            try:
+                # 工作进程退出前可能已经发回了结果
+                if worker.conn.poll():
+                    _, status, error, retiring = worker.conn.recv()
+                    worker.running = None
+                    if retiring:
+                        self._replace(worker)
+                    return TaskOutcome(task_index, task, status, error, pid)
+            except (EOFError, OSError):
+                pass
+
+            worker.process.join()
+            worker.running = None
+            self._replace(worker)
+            return TaskOutcome(task_index, task, None, f'工作进程异常退出（退出码 {worker.process.exitcode}）', pid)
+
+        if self._task_timeout is not None and time.monotonic() - started_at >= self._task_timeout:
+            worker.process.kill()
+            worker.process.join()
+            worker.running = None
+            self._replace(worker)
+            return TaskOutcome(task_index, task, None, f'运行超过 {self._task_timeout} 秒，工作进程被终止', pid)
+
+        return None
+
+    def close(self, timeout: float = 10) -> None:
+        """
+        通知所有工作进程退出，并等待其退出；超过 timeout 秒仍未退出的工作进程被终止。
+        :param timeout: 等待的秒数
+        """
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+
+        end = time.monotonic() + timeout
+        for process in [worker.process for worker in self._workers] + self._retired:
+            process.join(max(end - time.monotonic(), 0))
+            if process.exitcode is None:
+                process.kill()
+                process.join()
+
+        for worker in self._workers:
+            worker.conn.close()
+        self._workers = []
+        self._retired = []
+
+    def __enter__(self) -> 'ProcessPool[T]':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
@@ -1 +1,4 @@
+from .config import *
+from .deadline import *
 from .program import *
+from .retry import *
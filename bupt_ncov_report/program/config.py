@@ -0,0 +1,39 @@
+__all__ = (
+    'ProgramConfig',
+)
+
+from typing import Optional
+
+from kv_config_reader import CompiledConfig
+
+
+def _check_telegram_config(config: CompiledConfig) -> None:
+    """检查两个 Telegram 参数是否同时填写。"""
+    if bool(config['TG_BOT_TOKEN']) != bool(config['TG_CHAT_ID']):
+        raise ValueError('TG_BOT_TOKEN 与 TG_CHAT_ID 必须同时填写。')
+
+
+class ProgramConfig(CompiledConfig):
+    """
+    Program 使用的配置。以本类为 base 调用 compile_schema，生成的类的实例可以传给 Program；
+    schema 中必须含有以下各项，也可以含有其它配置项。
+
+    传给 Program 之前须先调用 validate：必填项不为 None，Telegram 的两个参数同时填写。Program 不再重复检查。
+    """
+
+    __slots__ = ()
+
+    # validate 保证以下两项不为 None
+    BUPT_SSO_USER: str
+    BUPT_SSO_PASS: str
+    TG_BOT_TOKEN: Optional[str]
+    TG_CHAT_ID: Optional[str]
+    SERVER_CHAN_SCKEY: Optional[str]
+    STOP_WHEN_SICK: bool
+    BNR_LOG_PATH: Optional[str]
+    BNR_LOG_MAX_BYTES: Optional[int]
+    BNR_LOG_BACKUP_COUNT: Optional[int]
+    BNR_DEADLINE: Optional[int]
+
+    _required = ('BUPT_SSO_USER', 'BUPT_SSO_PASS')
+    _validators = (_check_telegram_config,)
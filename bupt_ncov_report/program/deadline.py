@@ -0,0 +1,82 @@
+__all__ = (
+    'NOTIFY',
+    'NOTIFY_GRACE_SECONDS',
+    'DEFAULT_BUDGETS',
+    'DeadlineExceeded',
+    'Deadline',
+)
+
+import math
+import time
+from typing import Callable, Dict, Mapping, Optional
+
+from ..constant import *
+
+# 发送通知的时间预算的键；发送通知不是 PHASE 中的阶段
+NOTIFY = 'notify'
+
+# 超出总时限后，仍用于发送失败通知的时间（秒）；见 Program.main
+NOTIFY_GRACE_SECONDS = 5.0
+
+# 各阶段中每个请求的时间预算（秒）
+DEFAULT_BUDGETS: Dict[str, float] = {
+    PHASE.LOGIN: TIMEOUT_SECOND,
+    PHASE.FETCH: TIMEOUT_SECOND,
+    PHASE.SUBMIT: TIMEOUT_SECOND,
+    NOTIFY: TIMEOUT_SECOND,
+}
+
+
+class DeadlineExceeded(Exception):
+    """一个账号的运行超出了总时限。"""
+
+    def __init__(self, phase: str):
+        """
+        :param phase: 超时时所在的阶段
+        """
+        super().__init__(f'运行超出了总时限（在 {phase} 阶段）。')
+        self.phase = phase
+
+
+class Deadline:
+    """
+    一个账号一次运行（含重试与发送通知）的截止时间。
+
+    每个请求的超时时间取「该阶段的时间预算」与「距截止时间的剩余时间」中较小的一个，
+    因此一个卡住的连接最多占用一个阶段的预算，整个运行也不会超过总时限。
+    """
+
+    def __init__(
+            self,
+            total: Optional[float],
+            budgets: Mapping[str, float] = DEFAULT_BUDGETS,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param total: 总时限（秒）；None 表示不限，此时只有各阶段的预算
+        :param budgets: 各阶段中每个请求的时间预算（秒）；没有列出的阶段只受总时限限制
+        :param clock: 返回当前时间（秒）的函数
+        """
+        self._budgets = budgets
+        self._clock = clock
+        self._end = clock() + total if total is not None else math.inf
+
+    def remaining(self) -> float:
+        """距截止时间的剩余秒数；已经超时时为 0。"""
+        return max(self._end - self._clock(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout_for(self, phase: str) -> float:
+        """
+        该阶段中一个请求的超时时间。
+        :param phase: 阶段，取值见 PHASE 与 NOTIFY
+        :return: 秒数
+        :raise DeadlineExceeded: 已经超时
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(phase)
+
+        return min(self._budgets.get(phase, math.inf), remaining)
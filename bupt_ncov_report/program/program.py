@@ -2,21 +2,35 @@ __all__ = (
     'Program',
 )
 
+import codecs
 import json
 import logging
+import os
 import sys
+import threading
+import time
 import traceback
-from typing import List, Mapping, Optional, cast
+from typing import Callable, ContextManager, List, Optional, Tuple, cast
 
 import requests
 
+from .._util.log_writer import *
+from .._util.rotating_handler import *
 from ..constant import *
-from ..notifier import *
+from ..notifier.base import *
 from ..predef import *
 from ..program_utils import *
+from ..recorder.base import *
+from ..redactor import *
+from .config import *
+from .deadline import *
+from .retry import *
 
 logger = logging.getLogger(__name__)
 
+# 扇出模式下多个 Program 会同时初始化 logger；见 Program._initialize_logger
+_logger_lock = threading.Lock()
+
 
 class Program:
     """
@@ -39,125 +53,221 @@ class Program:
         'Content-Type': HEADERS.CONTENT_TYPE_UTF8,
     }
 
+    # 运行失败时的状态码；超出总时限时的状态码与一般的失败不同
+    EXIT_FAILED = 1
+    EXIT_DEADLINE_EXCEEDED = 2
+
+    # 上报页面中必须出现的文字（UTF-8 编码）
+    REPORT_PAGE_TITLE = '每日上报'.encode('utf-8')
+
     def __init__(
             self, *,
-            config: Mapping[str, Optional[ConfigValue]],
+            config: ProgramConfig,
             program_utils: ProgramUtils,
             session: requests.Session,
             notifiers: List[INotifier],
+            recorders: Optional[List[IRecorder]] = None,
+            retry_policy: Optional[RetryPolicy] = None,
+            logged_in: bool = False,
+            on_phase: Optional[Callable[[str], None]] = None,
     ):
         """
-        :param config: 程序的配置
+        :param config: 程序的配置；须已经通过 validate 检查
         :param program_utils: 类的依赖（我好想要依赖注入啊）
         :param session: 类的依赖（求求大佬们写个好用的 Python 依赖注入库吧）
         :param notifiers: INotifier 子类，用于通知用户执行结果（用参数传依赖太恶心了啊跪谢）
+        :param recorders: IRecorder 子类，用于保存运行结果；None 表示不保存
+        :param retry_policy: 失败时的重试策略；None 表示不重试
+        :param logged_in: session 是否已经预先登录；是则第一次尝试时跳过登录
+        :param on_phase: 进入新的阶段时调用，参数为新的阶段；用于向外报告运行进度
         """
 
         self._prog_util = program_utils
         self._sess = session
         self._notifiers = notifiers
-
-        self._check_config(config)
+        self._recorders: List[IRecorder] = recorders if recorders is not None else []
+        self._retry_policy = retry_policy
+        self._logged_in = logged_in
+        self._on_phase = on_phase
 
         # 初始化整个 bupt_ncov_report 模块的根 logger
         self._initialize_logger(
             logging.getLogger('bupt_ncov_report'),
-            cast(Optional[str], config.get('BNR_LOG_PATH')),
+            config.BNR_LOG_PATH,
+            config.BNR_LOG_MAX_BYTES,
+            config.BNR_LOG_BACKUP_COUNT,
         )
 
-        self._conf: Mapping[str, Optional[ConfigValue]] = config
+        self._conf = config
         self._exit_status: int = 0
+        self._phase: str = PHASE.INIT
+        # 最后一次尝试中各阶段的耗时与各请求的状态码；见 RunOutcome
+        self._timings: List[Tuple[str, float]] = []
+        self._status_codes: List[int] = []
+        self._phase_start: float = 0.0
+        # 本次运行的截止时间；main 每次运行时重新计时
+        self._deadline = self._new_deadline()
 
     def get_exit_status(self) -> int:
         return self._exit_status
 
-    @staticmethod
-    def _check_config(config: Mapping[str, Optional[ConfigValue]]) -> None:
+    def get_phase(self) -> str:
+        """返回上一次运行到达的阶段，取值见 PHASE。"""
+        return self._phase
+
+    def _enter_phase(self, phase: str) -> None:
         """
-        检查程序配置是否正确；如不正确则抛出异常。
+        进入下一个阶段，并记录上一个阶段的耗时。
+        :param phase: 新的阶段，取值见 PHASE
         :return: None
         """
+        now = time.perf_counter()
+        if self._phase != PHASE.INIT:
+            self._timings.append((self._phase, now - self._phase_start))
 
-        # 检查 BUPT SSO 用户名、密码
-        for key in ('BUPT_SSO_USER', 'BUPT_SSO_PASS'):
-            if config[key] is None:
-                raise ValueError(f'配置 {key} 未设置。缺少此配置，该脚本无法自动登录北邮网站。')
+        self._phase = phase
+        self._phase_start = now
+        if self._on_phase is not None:
+            self._on_phase(phase)
+
+    def _scoped_secrets(self) -> ContextManager[None]:
+        """
+        日志与通知中不应出现密码、token 等秘密。登录与运行期间把它们加入进程共用的 Redactor，结束后移除，
+        使批量上报时正则表达式只含正在运行的账号的秘密。
+        """
+        return get_redactor().scoped_secrets(
+            (self._conf.BUPT_SSO_PASS, self._conf.TG_BOT_TOKEN, self._conf.SERVER_CHAN_SCKEY))
 
-        # 检查 Telegram 的环境变量是否已经设置
-        if (config['TG_BOT_TOKEN'] is None) != (config['TG_CHAT_ID'] is None):
-            raise ValueError('TG_BOT_TOKEN 和 TG_CHAT_ID 必须同时设置，否则程序无法正确运行。')
+    def _new_deadline(self) -> Deadline:
+        """按配置 BNR_DEADLINE 新建截止时间；未设置时只限制各阶段的预算。"""
+        return Deadline(self._conf.BNR_DEADLINE)
 
     @staticmethod
-    def _initialize_logger(logger: logging.Logger, log_file: Optional[str]) -> None:
+    def _initialize_logger(
+            logger: logging.Logger,
+            log_file: Optional[str],
+            max_bytes: Optional[int] = None,
+            backup_count: Optional[int] = None,
+    ) -> None:
         """
         初始化传入的 Logger 对象，
         将 INFO 以上的日志输出到屏幕，将所有日志存入文件。
+
+        日志由进程共用的 AsyncLogWriter 在后台线程中批量写出，调用方只需把日志放进队列。
+        多次调用时不会重复添加 QueueHandler 或输出目标（批量上报时每个账号都会新建 Program）；可以在多个线程中同时调用。
         :param logger: Logger 对象
         :param log_file: 日志文件路径
+        :param max_bytes: 设置后启用轮换模式：日志文件超过该大小或跨日时轮换并压缩，见 CompressingRotatingFileHandler
+        :param backup_count: 轮换模式下最多保留的压缩文件个数；None 表示 7 个
         :return: None
         """
-        logger.setLevel(logging.DEBUG)
+        with _logger_lock:
+            logger.setLevel(logging.DEBUG)
+            writer = get_log_writer()
+
+            # 抹去敏感信息后，将日志放进 writer 的队列
+            if not any(getattr(h, '_bnr_target', None) == 'queue' for h in logger.handlers):
+                qh = writer.queue_handler()
+                qh.addFilter(RedactionFilter(get_redactor()))
+                setattr(qh, '_bnr_target', 'queue')
+                logger.addHandler(qh)
+
+            # 将日志输出到控制台
+            if not writer.has_target('stdout'):
+                sh = BatchStreamHandler(sys.stdout)
+                sh.setLevel(logging.INFO)
+                sh.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+                writer.add_target('stdout', sh)
 
-        # 将日志输出到控制台
-        sh = logging.StreamHandler(sys.stdout)
-        sh.setLevel(logging.INFO)
-        sh.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
-        logger.addHandler(sh)
+            # 将日志输出到文件
+            if log_file and not writer.has_target(os.path.abspath(log_file)):
+                fh: logging.FileHandler
+                if max_bytes is not None:
+                    fh = CompressingRotatingFileHandler(
+                        log_file, max_bytes, backup_count if backup_count is not None else 7, encoding='utf-8')
+                else:
+                    fh = BatchFileHandler(log_file, encoding='utf-8')
+                fh.setLevel(logging.DEBUG)
+                fh.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+                writer.add_target(os.path.abspath(log_file), fh)
 
-        # 将日志输出到文件
-        if log_file:
-            fh = logging.FileHandler(log_file, encoding='utf-8')
-            fh.setLevel(logging.DEBUG)
-            fh.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-            logger.addHandler(fh)
+    def login(self) -> None:
+        """
+        登录北邮 nCoV 上报网站；登录后的 cookie 保存在 session 中。
+        可以在上报之前单独调用，预先登录（见 SessionPool）。
+        :return: None
+        """
+        with self._scoped_secrets():
+            self._enter_phase(PHASE.LOGIN)
+            logger.info('登录北邮 nCoV 上报网站')
+            login_res = self._sess.post(LOGIN_API, data={
+                'username': self._conf.BUPT_SSO_USER,
+                'password': self._conf.BUPT_SSO_PASS,
+            }, headers={
+                **self.COMMON_HEADERS,
+                **self.COMMON_POST_HEADERS,
+                'Referer': HEADERS.REFERER_LOGIN_API,
+            }, timeout=self._deadline.timeout_for(PHASE.LOGIN))
+            self._status_codes.append(login_res.status_code)
+            if login_res.status_code != 200:
+                logger.debug(f'登录页：\n'
+                             f'status code: {login_res.status_code}\n'
+                             f'url: {login_res.url}')
+                raise RuntimeError('登录 API 返回的 HTTP 状态码不是 200。')
 
     def do_ncov_report(self) -> str:
         """
         进行信息上报的工作函数，包含本脚本主要逻辑。
+        session 已经预先登录时，跳过登录；若上报页面被重定向（登录已失效），则重新登录一次。
         :return: 上报 API 的返回内容。
         """
+        self._phase = PHASE.INIT
+        self._timings = []
+        self._status_codes = []
+
+        # 预先登录的 session 只在第一次尝试中使用；重试时总是重新登录
+        logged_in, self._logged_in = self._logged_in, False
+
         # 登录北邮 nCoV 上报网站
-        logger.info('登录北邮 nCoV 上报网站')
-        login_res = self._sess.post(LOGIN_API, data={
-            'username': cast(str, self._conf['BUPT_SSO_USER']),
-            'password': cast(str, self._conf['BUPT_SSO_PASS']),
-        }, headers={
-            **self.COMMON_HEADERS,
-            **self.COMMON_POST_HEADERS,
-            'Referer': HEADERS.REFERER_LOGIN_API,
-        })
-        if login_res.status_code != 200:
-            logger.debug(f'登录页：\n'
-                         f'status code: {login_res.status_code}\n'
-                         f'url: {login_res.url}')
-            raise RuntimeError('登录 API 返回的 HTTP 状态码不是 200。')
+        if not logged_in:
+            self.login()
 
         # 获取上报页面的数据
-        report_page_res = self._sess.get(REPORT_PAGE, headers={
-            **self.COMMON_HEADERS,
-            'Accept': HEADERS.ACCEPT_HTML,
-        })
-        logger.debug(f'报告页：\n'
-                     f'status code: {report_page_res.status_code}\n'
-                     f'url: {report_page_res.url}')
+        report_page_res = self._fetch_report_page()
+        if logged_in and report_page_res.url != REPORT_PAGE:
+            logger.info('预先登录的会话已失效，重新登录')
+            self.login()
+            report_page_res = self._fetch_report_page()
+
         if report_page_res.status_code != 200:
             raise RuntimeError('上报页面的 HTTP 状态码不是 200。')
         if report_page_res.url != REPORT_PAGE:
             raise RuntimeError('访问上报页面时被重定向。一般来说原因是登录操作失败了；您的北邮账号和密码可能有误。')
-        page_html = report_page_res.text
-        if '每日上报' not in page_html:
-            raise RuntimeError('上报页面的 HTML 中没有找到「每日上报」，可能已经改版。')
 
         # 从上报页面中提取 POST 的参数
-        post_data = self._prog_util.extract_post_data(page_html)
+        # 页面声明为 UTF-8 或未声明 charset 时，先直接在字节串中查找，不解码整个页面
+        encoding = self._declared_encoding(report_page_res)
+        page_content = report_page_res.content
+        if (encoding is None or codecs.lookup(encoding).name == 'utf-8') and self.REPORT_PAGE_TITLE in page_content:
+            post_data, check = self._prog_util.extract_checked_post_data(page_content)
+        else:
+            # 未声明 charset，且字节串中没有 UTF-8 编码的标题时，才根据内容猜测编码（要检测整个页面，较慢）
+            if encoding is None:
+                encoding = report_page_res.apparent_encoding or 'utf-8'
+            page_html = page_content.decode(encoding, errors='replace')
+            if '每日上报' not in page_html:
+                raise RuntimeError('上报页面的 HTML 中没有找到「每日上报」，可能已经改版。')
+            post_data, check = self._prog_util.extract_checked_post_data(page_html)
         logger.debug(f'最终提交参数：{json.dumps(post_data)}')
 
-        # 检查上报参数有没有异常
-        if self._conf['STOP_WHEN_SICK']:
-            verified_data = self._prog_util.verify_data(post_data)
-            self._prog_util.check_data_sick(verified_data)
+        # 检查上报参数有没有异常；提取时已经检查过一次，直接使用其结果
+        if self._conf.STOP_WHEN_SICK:
+            self._enter_phase(PHASE.VERIFY)
+            verified_data = self._prog_util.verify_data(post_data, check)
+            self._prog_util.check_data_sick(verified_data, check)
 
         # 最终 POST
+        self._enter_phase(PHASE.SUBMIT)
         report_api_res = self._sess.post(
             REPORT_API,
             data=post_data,
@@ -166,28 +276,91 @@ class Program:
                 **self.COMMON_POST_HEADERS,
                 'Referer': HEADERS.REFERER_POST_API,
             },
+            timeout=self._deadline.timeout_for(PHASE.SUBMIT),
         )
+        self._status_codes.append(report_api_res.status_code)
         if report_api_res.status_code != 200:
             raise RuntimeError(f'上报 API 返回的 HTTP 状态码（{report_api_res.status_code}）不是 200。')
 
+        self._enter_phase(PHASE.DONE)
         return report_api_res.text
 
+    @staticmethod
+    def _declared_encoding(res: requests.Response) -> Optional[str]:
+        """
+        求出页面在 Content-Type 中声明的编码。
+        未声明 charset 时 requests 给出的编码不可信（text/* 时为 ISO-8859-1），返回 None。
+        :param res: 上报页面的 Response
+        :return: 编码名；未声明时为 None
+        """
+        if res.encoding and 'charset=' in res.headers.get('Content-Type', '').lower():
+            return res.encoding
+
+        return None
+
+    def _fetch_report_page(self) -> requests.Response:
+        """
+        获取上报页面。
+        :return: 上报页面的 Response
+        """
+        self._enter_phase(PHASE.FETCH)
+        report_page_res = self._sess.get(REPORT_PAGE, headers={
+            **self.COMMON_HEADERS,
+            'Accept': HEADERS.ACCEPT_HTML,
+        }, timeout=self._deadline.timeout_for(PHASE.FETCH))
+        self._status_codes.append(report_page_res.status_code)
+        logger.debug(f'报告页：\n'
+                     f'status code: {report_page_res.status_code}\n'
+                     f'url: {report_page_res.url}')
+        return report_page_res
+
     def main(self) -> str:
         """
         真正的主函数。
         该函数读取程序配置，并尝试调用工作函数；
         该函数随后获取工作函数的返回值或异常内容，通过 INotifier 发送给用户。
+        整个运行（含重试与发送通知）受 BNR_DEADLINE 限制；超出时不再重试，状态码为 EXIT_DEADLINE_EXCEEDED，
+        并在总时限之外用最多 NOTIFY_GRACE_SECONDS 秒发送一条简短的失败通知，使用户知道需要手动上报。
 
         :return: 通过 INotifier 发送的信息
         """
-        # 运行工作函数
-        logger.info('运行工作函数')
-        success = True
-        try:
-            res = self.do_ncov_report()
-        except:
-            success = False
-            res = traceback.format_exc()
+        with self._scoped_secrets():
+            return self._main()
+
+    def _main(self) -> str:
+        """main 的实现；调用时秘密已经加入 Redactor。"""
+        start_time = time.perf_counter()
+        attempts = 1 if self._retry_policy is None else 1 + self._retry_policy.times
+        self._deadline = self._new_deadline()
+
+        # 运行工作函数；失败时按照重试策略重新运行
+        success = False
+        deadline_exceeded = False
+        error_class: Optional[str] = None
+        res = ''
+        for attempt in range(attempts):
+            if attempt > 0:
+                interval = cast(RetryPolicy, self._retry_policy).interval
+                if self._deadline.remaining() <= interval:
+                    logger.info('剩余时间不足，不再重试')
+                    break
+                logger.info(f'{interval} 秒后进行第 {attempt} 次重试')
+                time.sleep(interval)
+
+            logger.info('运行工作函数')
+            try:
+                res = self.do_ncov_report()
+                success = True
+                error_class = None
+                break
+            except:
+                res = traceback.format_exc()
+                # 请求因剩余时间耗尽而超时，与 DeadlineExceeded 同样处理
+                if isinstance(sys.exc_info()[1], DeadlineExceeded) or self._deadline.expired():
+                    deadline_exceeded = True
+                    error_class = DeadlineExceeded.__name__
+                    break
+                error_class = type(sys.exc_info()[1]).__name__
 
         # 生成消息并打印到控制台
         if success:
@@ -195,14 +368,68 @@ class Program:
         else:
             logger.info(f'失败：发生如下异常：\n\n{res}')
 
-        # 将执行结果通过 INotifier 通知用户
+        # 将执行结果通过 INotifier 通知用户；超出总时限时只发送简短的失败通知
+        if deadline_exceeded:
+            notify_msg = f'{DeadlineExceeded(self._phase)}上报失败，请手动上报。'
+        else:
+            notify_msg = get_redactor().redact(res)
+        notifications: List[Tuple[str, bool]] = []
         for notifier in self._notifiers:
             logger.info(f'通过「{notifier.PLATFORM_NAME}」给用户发送通知')
+            notified = False
             try:
-                notifier.notify(success=success, msg=res)
+                notifier.notify(success=success, msg=notify_msg, timeout=self._notify_timeout())
+                notified = True
             except:
                 logger.exception(f'使用「{notifier.PLATFORM_NAME}」通知失败，发生异常：')
+            notifications.append((type(notifier).__name__, notified))
+
+        self._record(RunOutcome(
+            user=self._conf.BUPT_SSO_USER,
+            date=beijing_date(),
+            phase=self._phase,
+            success=success,
+            error_class=error_class,
+            duration=time.perf_counter() - start_time,
+            timings=self._current_timings(),
+            status_codes=tuple(self._status_codes),
+            notifications=tuple(notifications),
+        ))
 
-        if not success:
-            self._exit_status = 1
+        if deadline_exceeded:
+            self._exit_status = self.EXIT_DEADLINE_EXCEEDED
+        elif not success:
+            self._exit_status = self.EXIT_FAILED
+
+        # 等待后台线程写完日志，保证 main 返回后日志文件是完整的
+        get_log_writer().drain()
         return res
+
+    def _notify_timeout(self) -> float:
+        """发送一条通知的超时时间；超出总时限后为 NOTIFY_GRACE_SECONDS。"""
+        try:
+            return self._deadline.timeout_for(NOTIFY)
+        except DeadlineExceeded:
+            return NOTIFY_GRACE_SECONDS
+
+    def _current_timings(self) -> Tuple[Tuple[str, float], ...]:
+        """
+        返回最后一次尝试中各阶段的耗时。失败时，出错的阶段也计入（截至现在的耗时）。
+        :return: tuple，元素为 (阶段, 秒)
+        """
+        if self._phase in (PHASE.INIT, PHASE.DONE):
+            return tuple(self._timings)
+
+        return (*self._timings, (self._phase, time.perf_counter() - self._phase_start))
+
+    def _record(self, outcome: RunOutcome) -> None:
+        """
+        将运行结果交给各个 IRecorder 保存。保存失败只打日志，不影响运行结果。
+        :param outcome: 运行结果
+        :return: None
+        """
+        for recorder in self._recorders:
+            try:
+                recorder.record(outcome)
+            except:
+                logger.exception(f'保存运行结果失败（{type(recorder).__name__}），发生异常：')
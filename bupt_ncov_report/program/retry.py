@@ -0,0 +1,15 @@
+__all__ = (
+    'RetryPolicy',
+)
+
+from typing import NamedTuple
+
+
+class RetryPolicy(NamedTuple):
+    """
+    上报失败时的重试策略。
+    times 为失败后额外重试的次数（不含第一次运行）；interval 为两次运行之间等待的秒数。
+    """
+
+    times: int = 2
+    interval: float = 10.0
@@ -1 +1,3 @@
+from .data_rules import *
+from .page_layout import *
 from .program_utils import *
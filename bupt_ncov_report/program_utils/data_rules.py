@@ -0,0 +1,201 @@
+__all__ = (
+    'DataRule',
+    'DEFAULT_RULES',
+    'CheckResult',
+    'DataChecker',
+    'load_rules',
+)
+
+import json
+import operator
+import re
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from ..pure_utils import *
+
+
+class DataRule(NamedTuple):
+    """
+    一条上报数据的检查规则。
+
+    kind 决定数据是否破损：
+    - 'number'：值必须是 range 所表示的前闭后开区间内的整数（或可转换为整数的字符串）
+    - 'binary'：同 number，区间为 [0, 2)
+    - 'any'：属性必须存在，不限值
+
+    sick 决定数据是否表示生病，为以下之一；None 表示不检查：
+    - '> N'、'>= N'、'< N'、'<= N'、'== N'、'!= N'：将值转换为整数后与 N 比较
+    - 'truthy'：值看起来像 True（见 PureUtils.looks_truthy）
+    - 'nonblank'：值是非空白的字符串
+    message 为生病时的提示；多条规则的提示相同时，报告中只出现一次。
+    """
+
+    field: str
+    kind: str
+    range: Optional[Tuple[int, int]] = None
+    sick: Optional[str] = None
+    message: str = ''
+
+
+_MOVED_MESSAGE = '您可能昨天或今天去了别的地方，导致位置有变化；现在提交将导致数据异常，请您今天手动提交'
+
+DEFAULT_RULES = (
+    # `tw` 数据必须在 1 到 9 之间；>= 37°C 则为异常
+    DataRule('tw', 'number', (1, 10), '> 3', '您上一次填报了高于 37 度的体温'),
+    # `jcjgqr` 必须在 0 到 3 之间
+    DataRule('jcjgqr', 'number', (0, 4), '!= 0', '您当前状态为疑似感染/确诊感染/其他'),
+    DataRule('remark', 'any', None, 'nonblank', '您的「其他信息」一栏不为空'),
+    DataRule('sfsfbh', 'any', None, 'truthy', _MOVED_MESSAGE),
+    DataRule('ismoved', 'any', None, 'truthy', _MOVED_MESSAGE),
+    DataRule('zgfxdq', 'binary', None, 'truthy', '「是否在中高风险地区」，您填了「是」'),
+    DataRule('sfcxtz', 'binary', None, 'truthy', '「是否出现症状」，您填了「是」'),
+    DataRule('sfjcbh', 'binary', None, 'truthy', '「是否接触感染人群」，您填了「是」'),
+    DataRule('mjry', 'binary', None, 'truthy', '「是否接触‘密切接触’人员」，您填了「是」'),
+    DataRule('csmjry', 'binary', None, 'truthy', '「是否去过疫情场所」，您填了「是」'),
+    DataRule('sfcyglq', 'binary', None, 'truthy', '「是否处于观察期」，您填了「是」'),
+    DataRule('szsqsfybl', 'binary', None, 'truthy', '「所在社区是否有确诊病例」，您填了「是」'),
+    DataRule('sfcxzysx', 'binary', None, 'truthy', '「是否有值得注意的情况」，您填了「是」'),
+)
+
+
+class CheckResult(NamedTuple):
+    """DataChecker 的检查结果。"""
+
+    # 数据破损的原因；为空表示未破损
+    broken_reasons: List[str]
+    # 表示生病的项；为空表示没有异常。数据破损时，破损的属性不参与此项检查
+    sick_reasons: List[str]
+
+    @property
+    def broken(self) -> bool:
+        return len(self.broken_reasons) != 0
+
+    @property
+    def sick(self) -> bool:
+        return len(self.sick_reasons) != 0
+
+
+# 表示属性不存在
+_MISSING = object()
+
+_COMPARE_RE = re.compile(r'^(>=|<=|==|!=|>|<)\s*(-?\d+)$')
+_COMPARATORS: Dict[str, Callable[[int, int], bool]] = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# 编译后的规则：(属性名, 是否合法, 是否生病, 提示, 破损时的原因)
+_CompiledRule = Tuple[str, Callable[[Any], bool], Optional[Callable[[Any], bool]], str, str]
+
+
+class DataChecker:
+    """
+    按照 DataRule 检查上报数据是否破损、是否表示生病。
+
+    规则在建立实例时编译为一组函数；检查时只遍历一次规则，每个属性只读取一次，
+    同时得出破损的原因与生病的项。修改规则（如网页改版后）只需修改规则表，无需修改代码。
+    """
+
+    def __init__(self, rules: Iterable[DataRule], pure_utils: PureUtils):
+        """
+        :param rules: 规则
+        :param pure_utils: 类的依赖
+        """
+        self.pure_util = pure_utils
+        self.rules = tuple(rules)
+        self._compiled: Tuple[_CompiledRule, ...] = tuple(self._compile(rule) for rule in self.rules)
+
+    def check(self, data: Mapping[str, Any]) -> CheckResult:
+        """
+        检查上报数据。
+        :param data: 最终上报的数据
+        :return: CheckResult
+        """
+        broken: List[str] = []
+        sick: List[str] = []
+        seen_messages: Set[str] = set()
+
+        for field, is_valid, is_sick, message, broken_reason in self._compiled:
+            value = data.get(field, _MISSING)
+            if value is _MISSING or not is_valid(value):
+                broken.append(broken_reason)
+                continue
+
+            if is_sick is None or message in seen_messages:
+                continue
+            if is_sick(value):
+                sick.append(message)
+                seen_messages.add(message)
+
+        return CheckResult(broken, sick)
+
+    def _compile(self, rule: DataRule) -> _CompiledRule:
+        util = self.pure_util
+
+        # 是否合法
+        is_valid: Callable[[Any], bool]
+        if rule.kind in ('number', 'binary'):
+            value_range = rule.range if rule.kind == 'number' else (0, 2)
+            if value_range is None:
+                raise ValueError(f'规则 {rule.field}：number 类型的规则必须设置 range。')
+            is_valid = lambda value: util.is_number_data_in_range(value, value_range)
+            broken_reason = f'属性 {rule.field} 不在 [{value_range[0]}, {value_range[1]}) 内'
+        elif rule.kind == 'any':
+            is_valid = lambda value: True
+            broken_reason = f'缺少属性 {rule.field}'
+        else:
+            raise ValueError(f'规则 {rule.field}：未知的类型 {rule.kind}。')
+
+        # 是否生病
+        is_sick: Optional[Callable[[Any], bool]]
+        if rule.sick is None:
+            is_sick = None
+        elif rule.sick == 'truthy':
+            is_sick = util.looks_truthy
+        elif rule.sick == 'nonblank':
+            is_sick = lambda value: isinstance(value, str) and value.strip() != ''
+        else:
+            match = _COMPARE_RE.match(rule.sick.strip())
+            if match is None:
+                raise ValueError(f'规则 {rule.field}：无法识别生病条件 {rule.sick}。')
+            if rule.kind == 'any':
+                raise ValueError(f'规则 {rule.field}：比较大小的生病条件只能用于 number 或 binary 类型。')
+
+            compare, threshold = _COMPARATORS[match.group(1)], int(match.group(2))
+            is_sick = lambda value: compare(int(value), threshold)
+
+        return rule.field, is_valid, is_sick, rule.message, broken_reason
+
+
+def load_rules(path: str) -> Tuple[DataRule, ...]:
+    """
+    从 JSON 文件中读取规则。文件的内容是一个数组，每个元素是一个与 DataRule 的属性同名的对象，如：
+    [{"field": "tw", "kind": "number", "range": [1, 10], "sick": "> 3", "message": "您上一次填报了高于 37 度的体温"}]
+    :param path: 文件路径
+    :return: 规则
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        raw_rules = json.load(f)
+
+    if not isinstance(raw_rules, list):
+        raise ValueError(f'规则文件 {path} 的内容不是数组。')
+
+    rules = []
+    for i, raw in enumerate(raw_rules):
+        if not isinstance(raw, dict) or not set(raw) <= set(DataRule._fields) or not {'field', 'kind'} <= set(raw):
+            raise ValueError(f'规则文件 {path} 的第 {i + 1} 条规则格式错误。')
+
+        value_range = raw.get('range')
+        rules.append(DataRule(
+            field=raw['field'],
+            kind=raw['kind'],
+            range=(int(value_range[0]), int(value_range[1])) if value_range is not None else None,
+            sick=raw.get('sick'),
+            message=raw.get('message', ''),
+        ))
+
+    return tuple(rules)
@@ -0,0 +1,153 @@
+__all__ = (
+    'PageLayout',
+    'LayoutCache',
+    'NEW_DATA_MARKER',
+    'OLD_DATA_MARKER',
+    'find_object_slice',
+    'scan_page_layout',
+)
+
+import hashlib
+import re
+import threading
+from typing import Dict, NamedTuple, Optional, Set, Tuple, Union
+
+# def 与 oldInfo 变量在页面中的位置：(前缀, 后缀)。
+# 与 ProgramUtils.extract_old_new_data 中的正则表达式 r'var def = (\{.+\});' 与 r'oldInfo: (\{.+\}),' 相对应
+NEW_DATA_MARKER = (b'var def = {', b'};')
+OLD_DATA_MARKER = (b'oldInfo: {', b'},')
+
+# JSON 对象顶层的键。geo_api_info 等嵌套在字符串中的 JSON 的引号被转义了，不会被匹配
+_KEY_RE = re.compile(rb'"(\w+)"\s*:')
+# 脚本中的字符串、数字与空白；计算骨架时去掉它们，只保留代码的结构
+_LITERAL_RE = re.compile(rb'''"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b|\s+''')
+_SCRIPT_OPEN = b'<script'
+_SCRIPT_CLOSE = b'</script>'
+
+
+def find_object_slice(content: bytes, marker: Tuple[bytes, bytes]) -> Optional[Tuple[int, int]]:
+    """
+    在 UTF-8 编码的页面中，用字节串查找找出形如「前缀{...}后缀」的 JS 对象的位置，不需要解码整个页面。
+    与正则表达式「前缀({.+})后缀」的语义相同：对象与前后缀在同一行内，对象取到该行最后一个后缀之前。
+    :param content: 页面内容（UTF-8 编码）
+    :param marker: (前缀, 后缀)，前缀以 { 结尾，后缀以 } 开头
+    :return: 对象（含两侧花括号）的 [开始, 结束) 位置；没找到时返回 None
+    """
+    prefix, suffix = marker
+    pos = content.find(prefix)
+    while pos != -1:
+        start = pos + len(prefix) - 1
+        line_end = content.find(b'\n', start)
+        if line_end == -1:
+            line_end = len(content)
+
+        # 对象至少含有一个字符，即后缀最早从 start + 2 开始
+        end = content.rfind(suffix, start + 2, line_end)
+        if end != -1:
+            return start, end + 1
+
+        pos = content.find(prefix, pos + 1)
+
+    return None
+
+
+class PageLayout(NamedTuple):
+    """上报页面的结构。"""
+
+    # 结构指纹；结构相同的页面指纹相同，与各账号的具体数据无关
+    fingerprint: str
+    # def 与 oldInfo 变量的 JSON 文本；没找到时为 None
+    new_data: Optional[str]
+    old_data: Optional[str]
+
+
+def scan_page_layout(html: Union[str, bytes]) -> PageLayout:
+    """
+    扫描上报页面，计算其结构指纹。
+    指纹由 def 与 oldInfo 的键集合，以及含有 def 的脚本的骨架（去掉两个 JSON、字符串、数字与空白后的代码）决定。
+    本函数直接处理字节串，只解码 def 与 oldInfo 两段 JSON；传入 str 时先按 UTF-8 编码。
+    :param html: 上报页面的 HTML
+    :return: PageLayout
+    """
+    content = html.encode('utf-8') if isinstance(html, str) else html
+    new_slice = find_object_slice(content, NEW_DATA_MARKER)
+    old_slice = find_object_slice(content, OLD_DATA_MARKER)
+
+    digest = hashlib.sha1()
+    for data_slice in (new_slice, old_slice):
+        keys = sorted(set(_KEY_RE.findall(content[data_slice[0]:data_slice[1]]))) if data_slice is not None else []
+        digest.update(b','.join(keys) + b'\n')
+
+    # 脚本的骨架：取含有 def 的脚本，把两个 JSON 挖掉
+    script_start, script_end = 0, len(content)
+    if new_slice is not None:
+        open_pos = content.rfind(_SCRIPT_OPEN, 0, new_slice[0])
+        close_pos = content.find(_SCRIPT_CLOSE, new_slice[1])
+        if open_pos != -1 and close_pos != -1:
+            script_start, script_end = open_pos, close_pos
+
+    holes = sorted(data_slice for data_slice in (new_slice, old_slice) if data_slice is not None)
+    pos = script_start
+    for hole_start, hole_end in holes:
+        if script_start <= hole_start and hole_end <= script_end and pos <= hole_start:
+            digest.update(_LITERAL_RE.sub(b'', content[pos:hole_start]) + b'{}')
+            pos = hole_end
+    digest.update(_LITERAL_RE.sub(b'', content[pos:script_end]))
+
+    return PageLayout(
+        fingerprint=digest.hexdigest()[:16],
+        new_data=content[new_slice[0]:new_slice[1]].decode('utf-8') if new_slice is not None else None,
+        old_data=content[old_slice[0]:old_slice[1]].decode('utf-8') if old_slice is not None else None,
+    )
+
+
+class LayoutCache:
+    """
+    记录见过的上报页面结构（以指纹区分），线程安全。
+
+    - 已知正确的结构：之前完整检查过、能正确提取数据的结构。同样结构的页面可以跳过重复的检查，直接提取数据。
+    - 未知的结构：每批只报告一次（flag_unknown 只在第一次返回 True），而不是每个账号都报告一次。
+    - 解析失败的结构：同一批中，同样结构的页面直接失败，不再重复解析。
+
+    已知正确的结构在整个进程中保留；其它记录在 start_batch 时清空。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._good: Set[str] = set()
+        self._flagged: Set[str] = set()
+        # 指纹 -> 第一次解析失败时的错误信息
+        self._bad: Dict[str, str] = {}
+
+    def start_batch(self) -> None:
+        """开始新的一批上报。"""
+        with self._lock:
+            self._flagged.clear()
+            self._bad.clear()
+
+    def is_known_good(self, fingerprint: str) -> bool:
+        return fingerprint in self._good
+
+    def mark_good(self, fingerprint: str) -> None:
+        with self._lock:
+            self._good.add(fingerprint)
+            self._bad.pop(fingerprint, None)
+
+    def flag_unknown(self, fingerprint: str) -> bool:
+        """
+        标记一个未知的结构。
+        :return: 本批中第一次标记该结构时返回 True
+        """
+        with self._lock:
+            if fingerprint in self._flagged:
+                return False
+            self._flagged.add(fingerprint)
+            return True
+
+    def get_bad(self, fingerprint: str) -> Optional[str]:
+        """返回该结构在本批中解析失败时的错误信息；没有失败过时返回 None。"""
+        return self._bad.get(fingerprint)
+
+    def mark_bad(self, fingerprint: str, error: str) -> None:
+        with self._lock:
+            self._bad.setdefault(fingerprint, error)
@@ -4,39 +4,144 @@ __all__ = (
 
 import json
 import logging
-from typing import Any, Dict, List, Tuple, cast
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, cast
 
 from ..constant import *
 from ..predef import *
 from ..pure_utils import *
+from .data_rules import *
+from .page_layout import *
 
 logger = logging.getLogger(__name__)
 
 
+# 需要从 new dict 中提取如下数据
+PICK_PROPS = (
+    'id', 'uid', 'date', 'created',
+)
+
+
 class ProgramUtils:
     """关系到疫情上报网站的具体逻辑的工具函数。"""
 
     def __init__(
             self,
             pure_utils: PureUtils,
+            layout_cache: Optional[LayoutCache] = None,
+            data_checker: Optional[DataChecker] = None,
     ):
+        """
+        :param pure_utils: 类的依赖
+        :param layout_cache: 记录见过的上报页面结构；None 表示不记录，每次都完整检查
+        :param data_checker: 检查上报数据的规则；None 表示使用 DEFAULT_RULES
+        """
         self.pure_util = pure_utils
+        self.layout_cache = layout_cache
+        self.data_checker = data_checker if data_checker is not None else DataChecker(DEFAULT_RULES, pure_utils)
 
     def extract_post_data(self, html: str) -> Dict[str, Any]:
         """
         从上报页面的 HTML 中，提取出上报 API 所需要填写的参数。
         该函数获取页面上 def 与 oldInfo 变量的值，将其正确混合后返回。
 
+        设置了 layout_cache 时，先计算页面的结构指纹：
+        已知正确的结构跳过重复的检查直接提取；未知的结构每批只警告一次；本批中解析失败过的结构直接失败。
+
         :param html: 上报页 HTML
         :return: dict 类型，可用于最终上报时提交的参数
         """
-        old_dict, new_dict = self.extract_old_new_data(html)
+        return self._extract_post_data(
+            html,
+            lambda: self._mix_checked(*self.extract_old_new_data(html)),
+        )[0]
+
+    def extract_post_data_from_bytes(self, content: bytes) -> Dict[str, Any]:
+        """
+        与 extract_post_data 相同，但直接处理 UTF-8 编码的页面内容（如 requests 的 Response.content）：
+        用字节串查找定位 def 与 oldInfo，只解码这两段 JSON，不需要解码整个页面。
+
+        :param content: 上报页 HTML，UTF-8 编码
+        :return: dict 类型，可用于最终上报时提交的参数
+        """
+        return self._extract_post_data(
+            content,
+            lambda: self._mix_checked(*self.extract_old_new_data_from_bytes(content)),
+        )[0]
+
+    def extract_checked_post_data(self, page: Union[str, bytes]) -> Tuple[Dict[str, Any], CheckResult]:
+        """
+        提取上报参数，并用 data_checker 检查一次；检查结果可以传给 verify_data 与 check_data_sick，不必重复检查。
+        :param page: 上报页 HTML；为 bytes 时按 extract_post_data_from_bytes 处理，否则按 extract_post_data 处理
+        :return: 元组，(上报参数, 检查结果)
+        """
+        if isinstance(page, bytes):
+            post_data, check = self._extract_post_data(
+                page,
+                lambda: self._mix_checked(*self.extract_old_new_data_from_bytes(page)),
+            )
+        else:
+            post_data, check = self._extract_post_data(
+                page,
+                lambda: self._mix_checked(*self.extract_old_new_data(page)),
+            )
+
+        return post_data, check if check is not None else self.data_checker.check(post_data)
+
+    def _extract_post_data(
+            self,
+            html: Union[str, bytes],
+            extract_checked: Callable[[], Dict[str, Any]],
+    ) -> Tuple[Dict[str, Any], Optional[CheckResult]]:
+        """
+        extract_post_data 与 extract_post_data_from_bytes 的实现。
+        :param html: 上报页 HTML
+        :param extract_checked: 完整检查并提取上报参数的函数
+        :return: 元组，(上报参数, 检查结果)；未知结构的页面需要检查上报参数，其它情况下不检查，检查结果为 None
+        """
+        if self.layout_cache is None:
+            return extract_checked(), None
+
+        layout = scan_page_layout(html)
+        if self.layout_cache.is_known_good(layout.fingerprint):
+            return self._extract_post_data_known(layout), None
+
+        error = self.layout_cache.get_bad(layout.fingerprint)
+        if error is not None:
+            raise RuntimeError(f'上报页面的结构（指纹 {layout.fingerprint}）与本批中解析失败的页面相同，'
+                               f'可能网页已经改版。第一次解析失败的原因：\n{error}')
+
+        if self.layout_cache.flag_unknown(layout.fingerprint):
+            logger.info(f'上报页面的结构（指纹 {layout.fingerprint}）是未知的，将完整检查；本批中不再重复提示')
+
+        try:
+            post_data = extract_checked()
+        except Exception as e:
+            self.layout_cache.mark_bad(layout.fingerprint, f'{type(e).__name__}: {e}')
+            logger.warning(f'上报页面的结构（指纹 {layout.fingerprint}）解析失败，可能网页已经改版；'
+                           f'本批中同样结构的页面将直接失败')
+            raise
+
+        check = self.data_checker.check(post_data)
+        if not check.broken:
+            self.layout_cache.mark_good(layout.fingerprint)
+        return post_data, check
+
+    @staticmethod
+    def _extract_post_data_known(layout: PageLayout) -> Dict[str, Any]:
+        """
+        从已知正确的结构的页面中提取上报参数。
+        该结构已经完整检查过（包括 PICK_PROPS 存在、数据长度合理），因此只需解析并混合。
+        """
+        old_dict = json.loads(cast(str, layout.old_data))
+        new_dict = json.loads(cast(str, layout.new_data))
+        for prop in PICK_PROPS:
+            old_dict[prop] = new_dict[prop]
 
-        # 需要从 new dict 中提取如下数据
-        PICK_PROPS = (
-            'id', 'uid', 'date', 'created',
-        )
+        return cast(Dict[str, Any], old_dict)
 
+    @staticmethod
+    def _mix_checked(old_dict: Dict[str, Any], new_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """将 new dict 中的 PICK_PROPS 混合进 old dict；缺少属性时抛出异常。"""
         for prop in PICK_PROPS:
             val = new_dict.get(prop, ...)
             if val is ...:
@@ -58,6 +163,28 @@ class ProgramUtils:
         new_data = self.pure_util.match_re_group1(r'var def = (\{.+\});', html)
         old_data = self.pure_util.match_re_group1(r'oldInfo: (\{.+\}),', html)
 
+        return self._parse_old_new(old_data, new_data)
+
+    def extract_old_new_data_from_bytes(self, content: bytes) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        与 extract_old_new_data 相同，但直接处理 UTF-8 编码的页面内容，只解码 def 与 oldInfo 两段 JSON。
+
+        :param content: 上报页面的 HTML，UTF-8 编码
+        :return: 元组，(old_dict, new_dict)
+        """
+        data = []
+        for marker in (OLD_DATA_MARKER, NEW_DATA_MARKER):
+            data_slice = find_object_slice(content, marker)
+            if data_slice is None:
+                raise ValueError(f'在页面中没找到 {marker[0].decode()}...{marker[1].decode()}。'
+                                 f'\n请阅读脚本文档中的「使用前提」部分。')
+            data.append(content[data_slice[0]:data_slice[1]].decode('utf-8'))
+
+        return self._parse_old_new(data[0], data[1])
+
+    @staticmethod
+    def _parse_old_new(old_data: str, new_data: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """检查 old data 与 new data 的长度，并解析为 dict。"""
         # 检查数据是否足够长
         if len(old_data) < REASONABLE_LENGTH or len(new_data) < REASONABLE_LENGTH:
             raise ValueError('获取到的数据过短。请阅读脚本文档的「使用前提」部分。')
@@ -67,106 +194,52 @@ class ProgramUtils:
 
     def is_data_broken(self, data: Dict[str, Any]) -> bool:
         """
-        检查最终上报数据内容是否破损（指出现不可能出现的值）
-        （如果破损，可能是上报页面改版。）
+        检查最终上报数据内容是否破损（指缺少属性，或出现不可能出现的值）
+        （如果破损，可能是上报页面改版。）规则见 data_checker。
         :param data: 最终上报的数据
         :return: True/False 表示是/否破损
         """
-        # self.pure_util 太长了
-        util = self.pure_util
-
-        MUST_EXIST_PROPERTIES = (
-            'tw', 'jcjgqr', 'remark', 'sfsfbh', 'ismoved',
-        )
-        for prop in MUST_EXIST_PROPERTIES:
-            if prop not in data:
-                return True
-
-        # `tw` 数据必须在 1 到 9 之间
-        if not util.is_number_data_in_range(data.get('tw'), (1, 10)):
-            return True
-
-        # `jcjgqr` 必须在 0 到 3 之间
-        if not util.is_number_data_in_range(data.get('jcjgqr'), (0, 4)):
-            return True
-
-        # 值为 0 或 1 的属性
-        BINARY_PROPERTIES = (
-            'zgfxdq', 'sfcxtz', 'sfjcbh', 'mjry',
-            'csmjry', 'sfcyglq', 'szsqsfybl', 'sfcxzysx',
-        )
+        return self.data_checker.check(data).broken
 
-        for prop in BINARY_PROPERTIES:
-            if not util.is_number_data_in_range(data.get(prop), (0, 2)):
-                return True
-
-        return False
-
-    def verify_data(self, data: Dict[str, Any]) -> VerifiedData:
+    def verify_data(self, data: Dict[str, Any], check: Optional[CheckResult] = None) -> VerifiedData:
         """
         验证 data 是否是破损的；如果 data 未破损，则原样返回。此处使用类型系统保证正确性。
         :param data: 最终上报数据
+        :param check: data 的检查结果（见 extract_checked_post_data）；None 表示在此检查
         :return: data 本身
         """
-        if self.is_data_broken(data):
+        if check is None:
+            check = self.data_checker.check(data)
+        if check.broken:
             raise RuntimeError('要上报的数据似乎是破损的，可能网页已经改版。'
                                '此时无法使用 STOP_WHEN_SICK 功能；上报失败，请手动上报。')
 
         # 仅用于类型检查器的类型转换
         return cast(VerifiedData, data)
 
-    def data_sick_report(self, data: VerifiedData) -> List[str]:
+    def data_sick_report(self, data: VerifiedData, check: Optional[CheckResult] = None) -> List[str]:
         """
         检测当前数据中表示生病的项，生成「生病项报告」。
-        如：体温 38.5°C，「其他信息」不为空，接触过疑似确诊人群等。
+        如：体温 38.5°C，「其他信息」不为空，接触过疑似确诊人群等。规则见 data_checker。
 
         :param data: 最终上报的数据，必须经过检查确定其未破损
+        :param check: data 的检查结果；None 表示在此检查
         :return: str 数组，其中每一条为一个异常项。无异常则为空 list
         """
+        if check is None:
+            check = self.data_checker.check(data)
+        return check.sick_reasons
 
-        abnormal_items = []
-
-        # 体温：>= 37°C 则为异常
-        body_temp = int(data['tw'])
-        if body_temp > 3:
-            abnormal_items.append('您上一次填报了高于 37 度的体温')
-
-        current_situation = int(data['jcjgqr'])
-        if current_situation != 0:
-            abnormal_items.append('您当前状态为疑似感染/确诊感染/其他')
-
-        if isinstance(data['remark'], str) and data['remark'].strip() != '':
-            abnormal_items.append('您的「其他信息」一栏不为空')
-
-        if self.pure_util.looks_truthy(data['sfsfbh']) or self.pure_util.looks_truthy(data['ismoved']):
-            abnormal_items.append('您可能昨天或今天去了别的地方，导致位置有变化；现在提交将导致数据异常，请您今天手动提交')
-
-        BINARY_PROPERTIES = {
-            'zgfxdq': '是否在中高风险地区',
-            'sfcxtz': '是否出现症状',
-            'sfjcbh': '是否接触感染人群',
-            'mjry': '是否接触‘密切接触’人员',
-            'csmjry': '是否去过疫情场所',
-            'sfcyglq': '是否处于观察期',
-            'szsqsfybl': '所在社区是否有确诊病例',
-            'sfcxzysx': '是否有值得注意的情况',
-        }
-
-        for prop, desc in BINARY_PROPERTIES.items():
-            if self.pure_util.looks_truthy(data[prop]):
-                abnormal_items.append(f'「{desc}」，您填了「是」')
-
-        return abnormal_items
-
-    def check_data_sick(self, data: VerifiedData) -> None:
+    def check_data_sick(self, data: VerifiedData, check: Optional[CheckResult] = None) -> None:
         """
         如果提交的数据表明用户生病，则抛出异常。
 
         :param data: 最终提交数据，必须经过检查确定其未破损
+        :param check: data 的检查结果；None 表示在此检查
         :return: None
         """
         # 获取生病列表
-        sick_list = self.data_sick_report(data)
+        sick_list = self.data_sick_report(data, check)
         if len(sick_list) == 0:
             return
 
@@ -3,7 +3,14 @@ __all__ = (
 )
 
 import re
-from typing import Any, Tuple
+from typing import Any, Dict, Tuple
+
+# looks_falsy 中，经过 lower() 与 strip() 后看起来像 False 的字符串
+_FALSY_STRINGS = frozenset(('', '0', 'false'))
+
+# looks_falsy 对字符串的结果的缓存；预先填入上报网站常见的值
+_STR_FALSY_CACHE: Dict[str, bool] = {s: s in _FALSY_STRINGS for s in ('', '0', '1', '2', '3', 'false', 'true')}
+_STR_FALSY_CACHE_SIZE = 1024
 
 
 class PureUtils:
@@ -57,9 +64,36 @@ class PureUtils:
         >>> PureUtils.looks_falsy([0])
         True
 
+        str、int、float、bool、None 与 list 走快速路径，结果与 _looks_falsy_generic 相同；
+        字符串的结果会被缓存（上报网站发送的值只有 '0'、'1' 等少数几种）。
+
         :param x: 几乎任意参数
         :return: 如果看起来像 False，则返回 True
         """
+        x_type = type(x)
+
+        if x_type is str:
+            result = _STR_FALSY_CACHE.get(x)
+            if result is None:
+                result = x.lower().strip() in _FALSY_STRINGS
+                if len(_STR_FALSY_CACHE) < _STR_FALSY_CACHE_SIZE:
+                    _STR_FALSY_CACHE[x] = result
+            return result
+
+        if x_type is int or x_type is bool or x_type is float:
+            return bool(x == 0)
+
+        if x is None:
+            return True
+
+        if x_type is list:
+            return len(x) == 0 or x == [0]
+
+        return PureUtils._looks_falsy_generic(x)
+
+    @staticmethod
+    def _looks_falsy_generic(x: Any) -> bool:
+        """looks_falsy 的通用实现，用于快速路径以外的类型。"""
         FALSY_OBJECTS = (
             '0', 'false', 'False', [0],
         )
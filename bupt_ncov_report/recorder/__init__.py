@@ -0,0 +1,19 @@
+import sys
+from typing import TYPE_CHECKING
+
+from .._util import install_lazy_exports
+
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    from .base import *
+    from .history import *
+    from .jsonl_sink import *
+else:
+    install_lazy_exports(globals(), {
+        'RunOutcome': '.base',
+        'IRecorder': '.base',
+        'beijing_date': '.base',
+        'beijing_now': '.base',
+        'ResultHistory': '.history',
+        'JsonlResultSink': '.jsonl_sink',
+        'hash_user': '.jsonl_sink',
+    })
@@ -0,0 +1,68 @@
+__all__ = (
+    'RunOutcome',
+    'IRecorder',
+    'beijing_date',
+    'beijing_now',
+)
+
+import datetime
+from abc import ABCMeta, abstractmethod
+from typing import NamedTuple, Optional, Tuple
+
+from ..constant import *
+
+
+def beijing_now() -> datetime.datetime:
+    """返回当前的北京时间。"""
+    return datetime.datetime.now(BEIJING_TZ)
+
+
+def beijing_date() -> str:
+    """
+    返回北京时间的当前日期。
+    :return: 形如 2020-06-19 的字符串
+    """
+    return beijing_now().date().isoformat()
+
+
+class RunOutcome(NamedTuple):
+    """一个账号的一次上报运行的结果。"""
+
+    # 北邮账号
+    user: str
+    # 运行时的北京时间日期，形如 2020-06-19
+    date: str
+    # 运行到达的阶段，取值见 PHASE
+    phase: str
+    success: bool
+    # 失败时的异常类名；成功时为 None
+    error_class: Optional[str]
+    # 运行耗时（秒）
+    duration: float
+    # 最后一次尝试中各阶段的耗时（秒），形如 (('login', 0.3), ('fetch', 0.5))
+    timings: Tuple[Tuple[str, float], ...] = ()
+    # 最后一次尝试中各 HTTP 请求的状态码，按请求顺序排列
+    status_codes: Tuple[int, ...] = ()
+    # 各 notifier 发送通知的结果，形如 (('TelegramNotifier', True),)
+    notifications: Tuple[Tuple[str, bool], ...] = ()
+
+
+class IRecorder(metaclass=ABCMeta):
+    """
+    用于记录每次运行结果的基类。
+    Program 在每个账号运行结束后调用 IRecorder 的子类，保存运行结果。
+    """
+
+    @abstractmethod
+    def record(self, outcome: RunOutcome) -> None:
+        """
+        保存一次运行的结果。失败时将抛出各种异常。
+        :param outcome: 运行结果
+        :return: None
+        """
+
+    def flush(self) -> None:
+        """
+        将缓冲中的运行结果写出。不缓冲的子类无需重写本函数。
+        :return: None
+        """
@@ -0,0 +1,101 @@
+__all__ = (
+    'ResultHistory',
+)
+
+import sqlite3
+import threading
+from typing import List, Optional
+
+from .base import *
+
+
+class ResultHistory(IRecorder):
+    """
+    将每次运行结果存入 SQLite 数据库的历史记录。
+
+    run_outcome 表保存全部历史；latest_outcome 表以账号为主键，只保存每个账号最近一次的结果，
+    并在 (success, date) 上建立索引。因此查询「哪些账号失败了」只需走索引，
+    不需要扫描完整的账号列表或日志文件。
+    """
+
+    _SCHEMA = (
+        '''CREATE TABLE IF NOT EXISTS run_outcome (
+            user TEXT NOT NULL,
+            date TEXT NOT NULL,
+            phase TEXT NOT NULL,
+            success INTEGER NOT NULL,
+            error_class TEXT,
+            duration REAL NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_run_outcome_user_date ON run_outcome (user, date)',
+        '''CREATE TABLE IF NOT EXISTS latest_outcome (
+            user TEXT PRIMARY KEY,
+            date TEXT NOT NULL,
+            phase TEXT NOT NULL,
+            success INTEGER NOT NULL,
+            error_class TEXT,
+            duration REAL NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_latest_outcome_success_date ON latest_outcome (success, date)',
+    )
+
+    def __init__(self, path: str):
+        """
+        :param path: SQLite 数据库文件路径；不存在时自动创建
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+        with self._lock, self._conn:
+            for sql in self._SCHEMA:
+                self._conn.execute(sql)
+
+    def record(self, outcome: RunOutcome) -> None:
+        """将运行结果写入历史，并更新该账号的最近一次结果。"""
+        row = (
+            outcome.user, outcome.date, outcome.phase,
+            int(outcome.success), outcome.error_class, outcome.duration,
+        )
+
+        with self._lock, self._conn:
+            self._conn.execute('INSERT INTO run_outcome VALUES (?, ?, ?, ?, ?, ?)', row)
+            self._conn.execute('INSERT OR REPLACE INTO latest_outcome VALUES (?, ?, ?, ?, ?, ?)', row)
+
+    def failed_users(self, since: Optional[str] = None) -> List[str]:
+        """
+        查询最近一次运行失败的账号。
+        :param since: 形如 2020-06-19 的日期；只返回该日期（含）之后失败的账号。None 表示不限日期
+        :return: 账号列表
+        """
+        with self._lock:
+            if since is None:
+                cursor = self._conn.execute(
+                    'SELECT user FROM latest_outcome WHERE success = 0 ORDER BY user')
+            else:
+                cursor = self._conn.execute(
+                    'SELECT user FROM latest_outcome WHERE success = 0 AND date >= ? ORDER BY user',
+                    (since,),
+                )
+
+            return [row[0] for row in cursor]
+
+    def last_outcome(self, user: str) -> Optional[RunOutcome]:
+        """
+        查询某账号最近一次的运行结果。
+        :param user: 北邮账号
+        :return: 运行结果；没有记录时返回 None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT user, date, phase, success, error_class, duration FROM latest_outcome WHERE user = ?',
+                (user,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return RunOutcome(row[0], row[1], row[2], bool(row[3]), row[4], row[5])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,138 @@
+__all__ = (
+    'JsonlResultSink',
+    'hash_user',
+)
+
+import hashlib
+import hmac
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from .base import *
+
+
+def hash_user(user: str, key: Optional[str] = None) -> str:
+    """
+    生成账号的摘要，使结果文件中不出现明文账号，同时仍能按账号聚合。
+
+    学号的取值范围很小，没有密钥的摘要可以被逐个尝试所有学号还原，只是假名；
+    设置了 key 时使用 HMAC-SHA256，不知道 key 的人无法还原。
+    :param user: 北邮账号
+    :param key: HMAC 的密钥；None 表示使用无密钥的 SHA-256
+    :return: 16 位十六进制字符串
+    """
+    if key is None:
+        return hashlib.sha256(user.encode('utf-8')).hexdigest()[:16]
+    return hmac.new(key.encode('utf-8'), user.encode('utf-8'), hashlib.sha256).hexdigest()[:16]
+
+
+class JsonlResultSink(IRecorder):
+    """
+    将每次运行结果以 JSON Lines 格式写入文件，每个账号的每次运行一行，便于下游程序分析。
+
+    每行的字段固定为 user_hash、date、phase、success、error_class、duration、timings、status_codes，
+    其中账号只保存摘要（见 hash_user）。
+
+    结果先缓存在内存中，攒满 batch_size 行或调用 flush 时才一次性追加到文件。
+    进程退出前没有调用 flush 时（如进程崩溃），缓存中的行会丢失；在可能崩溃的工作进程中应设 batch_size 为 1，
+    或在每个账号结束后调用 flush。
+
+    结果写入文件名带有日期（北京时间）的文件，如 path 为 results.jsonl 时写入 results.2020-06-19.jsonl；
+    文件超过 max_bytes 后改写 results.2020-06-19.1.jsonl、results.2020-06-19.2.jsonl……
+    轮换时不重命名文件，因此多个进程可以同时写同一个 path：每次只追加整批的行，各进程按日期与大小选出同一个文件。
+    """
+
+    def __init__(
+            self, path: str, batch_size: int = 64, max_bytes: int = 16 * 1024 * 1024, hash_key: Optional[str] = None,
+    ):
+        """
+        :param path: 结果文件路径；实际写入的文件名中插入了日期与序号，见上
+        :param batch_size: 缓存多少行后写入文件
+        :param max_bytes: 文件超过该大小后改写下一个序号的文件；0 表示不按大小轮换
+        :param hash_key: 计算账号摘要的密钥；见 hash_user
+        """
+        if batch_size <= 0:
+            raise ValueError('batch_size 必须大于 0')
+
+        self._root, self._ext = os.path.splitext(path)
+        self._batch_size = batch_size
+        self._max_bytes = max_bytes
+        self._hash_key = hash_key
+
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        # 上次写入的文件的日期与序号；该文件满了之后才查看下一个序号
+        self._date = ''
+        self._index = 0
+
+    def path_for(self, date: str, index: int = 0) -> str:
+        """
+        求出某一天的第 index 个结果文件的路径。
+        :param date: 日期（北京时间），如 2020-06-19
+        :param index: 序号；0 表示当天的第一个文件
+        :return: 文件路径
+        """
+        if index == 0:
+            return f'{self._root}.{date}{self._ext}'
+        return f'{self._root}.{date}.{index}{self._ext}'
+
+    def to_json(self, outcome: RunOutcome) -> str:
+        """将运行结果转换为一行紧凑的 JSON。"""
+        row: Dict[str, Any] = {
+            'user_hash': hash_user(outcome.user, self._hash_key),
+            'date': outcome.date,
+            'phase': outcome.phase,
+            'success': outcome.success,
+            'error_class': outcome.error_class,
+            'duration': round(outcome.duration, 3),
+            'timings': {phase: round(seconds, 3) for phase, seconds in outcome.timings},
+            'status_codes': list(outcome.status_codes),
+        }
+        return json.dumps(row, ensure_ascii=False, separators=(',', ':'))
+
+    def record(self, outcome: RunOutcome) -> None:
+        line = self.to_json(outcome)
+
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self._batch_size:
+                self._write_buffer()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_buffer()
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write_buffer(self) -> None:
+        """将缓存的行写入文件；调用方必须持有 self._lock。"""
+        if len(self._buffer) == 0:
+            return
+
+        # 整批一次 write，以追加模式打开，多个进程同时写入时各批不会交错
+        with open(self._current_path(), 'a', encoding='utf-8') as f:
+            f.write('\n'.join(self._buffer) + '\n')
+
+        self._buffer.clear()
+
+    def _current_path(self) -> str:
+        """求出本批要写入的文件：今天的、没有超过 max_bytes 的序号最小的文件。"""
+        date = beijing_date()
+        if date != self._date:
+            self._date = date
+            self._index = 0
+
+        while True:
+            path = self.path_for(date, self._index)
+            if self._max_bytes <= 0:
+                return path
+            try:
+                if os.path.getsize(path) < self._max_bytes:
+                    return path
+            except OSError:
+                # 文件不存在
+                return path
+            self._index += 1
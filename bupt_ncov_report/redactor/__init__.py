@@ -0,0 +1 @@
+from .redactor import *
@@ -0,0 +1,234 @@
+__all__ = (
+    'SENSITIVE_FIELDS',
+    'REDACTED',
+    'MIN_SECRET_LENGTH',
+    'Redactor',
+    'RedactionFilter',
+    'get_redactor',
+)
+
+import contextlib
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, Match, Optional, Pattern, Tuple, cast
+
+logger = logging.getLogger(__name__)
+
+# 上报参数中含有个人信息的字段：住址、定位信息、用户 id 等
+SENSITIVE_FIELDS = (
+    'address', 'area', 'city', 'province', 'geo_api_info',
+    'id', 'uid', 'created_uid',
+)
+
+# 替换敏感内容的文字
+REDACTED = '***'
+
+# 短于该长度的秘密不被抹去：如秘密为 '1' 时，日期、状态码等都会被破坏
+MIN_SECRET_LENGTH = 6
+
+# 字段值：双引号字符串、单引号字符串（Python repr），或不带引号的数字、null 等
+_VALUE_RE = r'''(?:"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^,}\s]+)'''
+
+
+class Redactor:
+    """
+    从文本中抹去敏感信息：配置中的密码、token 等秘密，以及上报参数中的敏感字段（形如 "address": "..." 的键值对）。
+
+    所有秘密与字段名被编译为同一个正则表达式（各项之间是「或」的关系），
+    因此无论有多少个秘密，每条文本都只需调用一次 re.sub。
+    添加新秘密后，正则表达式在下一次使用时才重新编译；添加已有的秘密不会触发重新编译。
+
+    批量上报时应使用 scoped_secrets，只在账号运行期间保留其秘密：正则表达式只含正在运行的账号的秘密，
+    编译耗时与账号总数无关。
+    """
+
+    def __init__(self, secrets: Iterable[str] = (), fields: Iterable[str] = SENSITIVE_FIELDS):
+        """
+        :param secrets: 要抹去的秘密
+        :param fields: 要抹去其值的字段名
+        """
+        self._fields = tuple(fields)
+        # 秘密 -> 引用次数；见 scoped_secrets
+        self._secrets: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._pattern: Optional[Pattern[str]] = None
+        self._dirty = True
+
+        self.add_secrets(secrets)
+
+    def add_secrets(self, secrets: Iterable[Optional[str]]) -> None:
+        """
+        添加要抹去的秘密。None 与空字符串被忽略；短于 MIN_SECRET_LENGTH 的秘密被忽略并打印警告。
+        同一个秘密可以添加多次，须移除同样多次才会被移除。
+        :param secrets: 秘密，如密码、token
+        :return: None
+        """
+        too_short = 0
+        with self._lock:
+            for secret in secrets:
+                if not secret:
+                    continue
+                if len(secret) < MIN_SECRET_LENGTH:
+                    too_short += 1
+                    continue
+
+                count = self._secrets.get(secret, 0)
+                self._secrets[secret] = count + 1
+                if count == 0:
+                    self._dirty = True
+
+        # 在锁外打印日志：RedactionFilter 处理这条日志时也要取得锁
+        if too_short:
+            logger.warning(f'有 {too_short} 个秘密短于 {MIN_SECRET_LENGTH} 个字符，不会从日志中抹去')
+
+    def remove_secrets(self, secrets: Iterable[Optional[str]]) -> None:
+        """
+        移除由 add_secrets 添加的秘密；忽略未添加过的秘密。
+        :param secrets: 秘密
+        :return: None
+        """
+        with self._lock:
+            for secret in secrets:
+                count = self._secrets.get(secret or '', 0)
+                if count == 1:
+                    del self._secrets[cast(str, secret)]
+                    self._dirty = True
+                elif count > 1:
+                    self._secrets[cast(str, secret)] = count - 1
+
+    @contextlib.contextmanager
+    def scoped_secrets(self, secrets: Iterable[Optional[str]]) -> Iterator[None]:
+        """
+        在 with 语句块中抹去这些秘密，离开时移除它们。
+        :param secrets: 秘密
+        :return: 上下文管理器
+        """
+        secrets = tuple(secrets)
+        self.add_secrets(secrets)
+        try:
+            yield
+        finally:
+            self.remove_secrets(secrets)
+
+    def redact(self, text: str) -> str:
+        """
+        抹去文本中的敏感信息。
+        :param text: 文本
+        :return: 抹去敏感信息后的文本
+        """
+        pattern = self._get_pattern()
+        if pattern is None:
+            return text
+
+        return pattern.sub(self._replace, text)
+
+    def _get_pattern(self) -> Optional[Pattern[str]]:
+        if not self._dirty:
+            return self._pattern
+
+        with self._lock:
+            if self._dirty:
+                self._pattern = self._compile(self._secrets, self._fields)
+                self._dirty = False
+            return self._pattern
+
+    @staticmethod
+    def _compile(secrets: Iterable[str], fields: Tuple[str, ...]) -> Optional[Pattern[str]]:
+        alternatives = []
+
+        if fields:
+            field_names = '|'.join(re.escape(f) for f in fields)
+            alternatives.append(rf'''(?P<key>(?P<quote>["'])(?:{field_names})(?P=quote)\s*:\s*){_VALUE_RE}''')
+
+        if secrets:
+            alternatives.append(_trie_regex(secrets))
+
+        if len(alternatives) == 0:
+            return None
+
+        return re.compile('|'.join(alternatives))
+
+    @staticmethod
+    def _replace(match: Match[str]) -> str:
+        key = match.groupdict().get('key')
+        if key is not None:
+            return f'{key}"{REDACTED}"'
+
+        return REDACTED
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """
+    将一组字符串转换为前缀树形式的正则表达式，如 ['abc', 'abd', 'x'] 转换为 (?:ab[cd]|x)。
+    与直接用 | 连接相比，正则引擎在每个位置只需沿前缀树走一条路径，耗时几乎与字符串的个数无关。
+    某个字符串是另一个字符串的前缀时，优先匹配较长的那个。
+    :param words: 非空字符串
+    :return: 正则表达式
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def to_regex(node: Dict[str, Any]) -> str:
+        is_end = '' in node
+        branches = [re.escape(ch) + to_regex(child) for ch, child in sorted(node.items()) if ch != '']
+        if len(branches) == 0:
+            return ''
+
+        if len(branches) == 1:
+            body = branches[0]
+            if is_end and len(body) > 1:
+                body = f'(?:{body})'
+        elif all(len(b) == 1 or (len(b) == 2 and b[0] == '\\') for b in branches):
+            body = f'[{"".join(branches)}]'
+        else:
+            body = f'(?:{"|".join(branches)})'
+
+        return f'{body}?' if is_end else body
+
+    return to_regex(trie)
+
+
+class RedactionFilter(logging.Filter):
+    """
+    抹去日志中敏感信息的 logging.Filter。
+    应挂在 handler 上（logger 上的 filter 对子 logger 传上来的日志不起作用）。
+    日志的消息与异常调用栈都会被处理；处理后，消息中的参数被合并，异常调用栈被格式化为 exc_text。
+    """
+
+    def __init__(self, redactor: 'Redactor'):
+        super().__init__()
+        self._redactor = redactor
+        self._formatter = logging.Formatter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = self._redactor.redact(record.getMessage())
+        record.args = None
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._formatter.formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = self._redactor.redact(record.exc_text)
+
+        return True
+
+
+_redactor: Optional[Redactor] = None
+_redactor_lock = threading.Lock()
+
+
+def get_redactor() -> Redactor:
+    """
+    取出整个进程共用的 Redactor；第一次调用时创建。
+    Program 在登录与运行期间把该账号的秘密加入其中（见 Redactor.scoped_secrets）。
+    """
+    global _redactor
+
+    with _redactor_lock:
+        if _redactor is None:
+            _redactor = Redactor()
+        return _redactor
@@ -0,0 +1 @@
+from .session_pool import *
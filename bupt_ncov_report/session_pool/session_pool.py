@@ -0,0 +1,163 @@
+__all__ = (
+    'SessionPool',
+    'TimeWindow',
+)
+
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, List, NamedTuple, Optional, Tuple, TypeVar
+
+V = TypeVar('V')
+
+
+class SessionPool(Generic[V]):
+    """
+    预先登录的 Session 池，线程安全。
+
+    在上报时间之前预先登录各账号，把登录后的 Session 放进池中；上报时取出，即可跳过登录。
+    池中最多保留 maxsize 个 Session，超出时淘汰最早放入的；放入超过 ttl 秒的 Session 视为过期，取出时被丢弃。
+    被淘汰、过期或被替换的 Session 会传给 on_evict，可用于释放资源（如关闭 Session）。
+    """
+
+    def __init__(
+            self,
+            maxsize: int,
+            ttl: float,
+            on_evict: Optional[Callable[[V], None]] = None,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param maxsize: 最多保留的 Session 数
+        :param ttl: Session 登录后的有效时间（秒）
+        :param on_evict: Session 被淘汰、过期、替换或池被清空时调用
+        :param clock: 返回当前时间（秒）的函数，用于判断是否过期
+        """
+        if maxsize <= 0 or ttl <= 0:
+            raise ValueError('maxsize 与 ttl 必须大于 0')
+
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._on_evict = on_evict
+        self._clock = clock
+        # 账号 -> (Session, 登录时间)
+        self._items: 'OrderedDict[str, Tuple[V, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, user: str, session: V) -> None:
+        """
+        放入某账号刚刚登录的 Session。该账号已有 Session 时，旧的被替换。
+        :param user: 北邮账号
+        :param session: 已登录的 Session
+        :return: None
+        """
+        evicted: List[V] = []
+
+        with self._lock:
+            old = self._items.pop(user, None)
+            if old is not None and old[0] is not session:
+                evicted.append(old[0])
+
+            self._items[user] = (session, self._clock())
+            while len(self._items) > self._maxsize:
+                evicted.append(self._items.popitem(last=False)[1][0])
+
+        self._evict(evicted)
+
+    def take(self, user: str) -> Optional[V]:
+        """
+        取出某账号的 Session；取出后池中不再保留。
+        :param user: 北邮账号
+        :return: 已登录且未过期的 Session；没有或已过期时返回 None
+        """
+        with self._lock:
+            item = self._items.pop(user, None)
+
+        if item is None:
+            return None
+
+        session, logged_in_at = item
+        if self._clock() - logged_in_at >= self._ttl:
+            self._evict([session])
+            return None
+
+        return session
+
+    def prune(self) -> int:
+        """
+        丢弃所有过期的 Session。
+        :return: 丢弃的个数
+        """
+        now = self._clock()
+        with self._lock:
+            expired = [user for user, (_, logged_in_at) in self._items.items() if now - logged_in_at >= self._ttl]
+            evicted = [self._items.pop(user)[0] for user in expired]
+
+        self._evict(evicted)
+        return len(evicted)
+
+    def clear(self) -> None:
+        """清空池，并对每个 Session 调用 on_evict。"""
+        with self._lock:
+            evicted = [session for session, _ in self._items.values()]
+            self._items.clear()
+
+        self._evict(evicted)
+
+    @property
+    def maxsize(self) -> int:
+        """最多保留的 Session 数。"""
+        return self._maxsize
+
+    def full(self) -> bool:
+        """池是否已满；已满时再放入新账号的 Session 会淘汰最早放入的。"""
+        return len(self._items) >= self._maxsize
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _evict(self, sessions: List[V]) -> None:
+        if self._on_evict is None:
+            return
+
+        for session in sessions:
+            self._on_evict(session)
+
+
+class TimeWindow(NamedTuple):
+    """一天中的一段时间，如 06:30-06:55；用于表示预先登录的时间段。"""
+
+    start: datetime.time
+    end: datetime.time
+
+    @classmethod
+    def parse(cls, text: str) -> 'TimeWindow':
+        """
+        解析形如 06:30-06:55 的时间段。
+        :param text: 时间段
+        :return: TimeWindow
+        """
+        try:
+            start, end = (datetime.datetime.strptime(part.strip(), '%H:%M').time() for part in text.split('-'))
+        except ValueError:
+            raise ValueError(f'无法识别时间段 {text}，格式应形如 06:30-06:55。') from None
+
+        if start >= end:
+            raise ValueError(f'时间段 {text} 的开始时间必须早于结束时间。')
+
+        return cls(start, end)
+
+    def contains(self, now: datetime.time) -> bool:
+        """当前时间是否在时间段内（含开始，不含结束）。"""
+        return self.start <= now.replace(tzinfo=None) < self.end
+
+    def seconds_until_end(self, now: datetime.time) -> float:
+        """
+        从 now 到时间段结束的秒数；已经结束时为 0。
+        :param now: 当前时间
+        :return: 秒数
+        """
+        today = datetime.date.min
+        delta = datetime.datetime.combine(today, self.end) - datetime.datetime.combine(today, now.replace(tzinfo=None))
+        return max(delta.total_seconds(), 0.0)
@@ -0,0 +1 @@
+from .sharding import *
@@ -0,0 +1,64 @@
+__all__ = (
+    'jump_hash',
+    'shard_of',
+    'ShardSpec',
+)
+
+import hashlib
+from typing import NamedTuple
+
+_MASK_64 = (1 << 64) - 1
+
+
+def jump_hash(key: int, num_buckets: int) -> int:
+    """
+    Jump Consistent Hash（Lamping & Veach, 2014）：把 64 位整数 key 映射到 [0, num_buckets) 中的一个桶。
+    桶数从 N 增加到 N + 1 时，只有约 1/(N + 1) 的 key 会移动，且都移动到新增的桶 N 中。
+    :param key: 64 位无符号整数
+    :param num_buckets: 桶数
+    :return: 桶的编号
+    """
+    if num_buckets <= 0:
+        raise ValueError('num_buckets 必须大于 0')
+
+    key &= _MASK_64
+    b, j = -1, 0
+    while j < num_buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & _MASK_64
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+
+    return b
+
+
+def shard_of(user: str, shard_count: int) -> int:
+    """
+    求出账号所属的分片。结果只取决于账号与分片数，在任何机器、任何进程中都相同。
+    :param user: 北邮账号
+    :param shard_count: 分片数
+    :return: 分片编号，[0, shard_count)
+    """
+    key = int.from_bytes(hashlib.sha256(user.encode('utf-8')).digest()[:8], 'big')
+    return jump_hash(key, shard_count)
+
+
+class ShardSpec(NamedTuple):
+    """
+    本节点负责的分片：共 shard_count 个分片，本节点负责第 shard_index 个（从 0 开始）。
+    每个节点只需知道自己的 shard_index 与共同的 shard_count，即可在读取账号列表时选出自己的账号，不需要协调者；
+    各节点选出的账号互不重复，合起来是完整的账号列表。
+    """
+
+    shard_index: int
+    shard_count: int
+
+    def validate(self) -> 'ShardSpec':
+        if self.shard_count <= 0:
+            raise ValueError(f'分片数必须大于 0：{self.shard_count}')
+        if not 0 <= self.shard_index < self.shard_count:
+            raise ValueError(f'分片编号必须在 0 到 {self.shard_count - 1} 之间：{self.shard_index}')
+        return self
+
+    def owns(self, user: str) -> bool:
+        """该账号是否由本节点负责。"""
+        return shard_of(user, self.shard_count) == self.shard_index
@@ -0,0 +1 @@
+from .status_table import *
@@ -0,0 +1,34 @@
+"""
+显示各账号状态表中的进度，直到所有账号都运行结束。
+
+用法（在仓库根目录运行；名字即 BNR_STATUS_SHM）：
+    python -m bupt_ncov_report.status_table <名字> [--interval 1]
+"""
+
+import argparse
+import time
+
+from .status_table import *
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='显示各账号状态表中的进度')
+    parser.add_argument('name', help='状态表（共享内存）的名字')
+    parser.add_argument('--interval', type=float, default=1.0, help='刷新间隔（秒）')
+    args = parser.parse_args()
+
+    table = StatusTable.attach(args.name)
+    try:
+        while True:
+            print(format_progress(table.counts()), flush=True)
+            if table.finished():
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        table.close()
+
+
+if __name__ == '__main__':
+    main()
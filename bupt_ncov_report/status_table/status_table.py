@@ -0,0 +1,162 @@
+__all__ = (
+    'QUEUED',
+    'FAILED',
+    'SKIPPED',
+    'SLOT_STATES',
+    'StatusTable',
+    'format_progress',
+)
+
+import struct
+import sys
+import threading
+from typing import Any, Dict, Optional, cast
+
+from ..constant import *
+
+# 还没有开始运行的账号
+QUEUED = 'queued'
+# 运行结束且失败的账号；运行结束且成功的账号为 PHASE.DONE
+FAILED = 'failed'
+# 不需要运行的账号（如重跑模式下最近一次没有失败的账号）
+SKIPPED = 'skipped'
+
+# 状态表中每个槽的取值；槽中保存状态在本元组中的序号。新建的共享内存全为 0，即 QUEUED
+SLOT_STATES = (QUEUED, PHASE.LOGIN, PHASE.FETCH, PHASE.VERIFY, PHASE.SUBMIT, PHASE.DONE, FAILED, SKIPPED)
+_STATE_CODES: Dict[str, int] = {state: code for code, state in enumerate(SLOT_STATES)}
+# 运行结束的状态
+_FINAL_STATES = (PHASE.DONE, FAILED, SKIPPED)
+
+# 共享内存的开头：魔数与槽数；之后每个账号一个字节
+_HEADER = struct.Struct('<4sI')
+_MAGIC = b'BNRS'
+# attach 时暂时替换了 resource_tracker.register，同一时刻只能有一个线程这样做
+_attach_lock = threading.Lock()
+
+
+class StatusTable:
+    """
+    保存在共享内存（multiprocessing.shared_memory，Python 3.8 以上）中的各账号状态表。
+
+    每个账号占一个字节的槽，以账号的序号为下标。每个槽只由运行该账号的进程写入，写入单个字节不需要加锁；
+    其它进程（如显示进度的进程）用 attach 按名字打开同一块共享内存，随时可以读取，读到的是各进程刚刚写入的状态。
+    """
+
+    def __init__(self, shm: Any, owner: bool):
+        """
+        请使用 create 或 attach。
+        :param shm: SharedMemory
+        :param owner: 是否由本进程创建；创建者负责 unlink
+        """
+        magic, size = _HEADER.unpack_from(shm.buf)
+        if magic != _MAGIC:
+            raise ValueError(f'共享内存 {shm.name} 不是状态表')
+
+        self._shm = shm
+        self._owner = owner
+        self._slots = shm.buf[_HEADER.size:_HEADER.size + size]
+
+    @classmethod
+    def create(cls, name: Optional[str], size: int) -> 'StatusTable':
+        """
+        新建状态表，所有账号的状态均为 QUEUED。
+        :param name: 共享内存的名字；None 表示自动生成
+        :param size: 账号数
+        :return: StatusTable
+        """
+        from multiprocessing.shared_memory import SharedMemory
+
+        shm = SharedMemory(name=name, create=True, size=_HEADER.size + max(size, 1))
+        _HEADER.pack_into(cast(memoryview, shm.buf), 0, _MAGIC, size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'StatusTable':
+        """
+        打开其它进程新建的状态表。
+        :param name: 共享内存的名字
+        :return: StatusTable
+        """
+        from multiprocessing.shared_memory import SharedMemory
+
+        if sys.version_info >= (3, 13):
+            shm = SharedMemory(name=name, track=False)
+        else:
+            # Python 3.13 以前，打开共享内存时会向 resource_tracker 登记，登记了的进程退出时共享内存会被删除，
+            # 即使它是别的进程新建的；事后取消登记也不行，与新建者共用 resource_tracker 时会把新建者的登记一并取消。
+            # 因此打开时暂时跳过登记
+            from multiprocessing import resource_tracker
+
+            with _attach_lock:
+                register = resource_tracker.register
+                setattr(resource_tracker, 'register', lambda name, rtype: None)
+                try:
+                    shm = SharedMemory(name=name)
+                finally:
+                    setattr(resource_tracker, 'register', register)
+
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return str(self._shm.name)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def set(self, index: int, state: str) -> None:
+        """
+        设置一个账号的状态。
+        :param index: 账号的序号
+        :param state: 状态，取值见 SLOT_STATES
+        :return: None
+        """
+        self._slots[index] = _STATE_CODES[state]
+
+    def finish(self, index: int, success: bool) -> None:
+        """标记一个账号运行结束。"""
+        self.set(index, PHASE.DONE if success else FAILED)
+
+    def skip(self, index: int) -> None:
+        """标记一个账号不需要运行。"""
+        self.set(index, SKIPPED)
+
+    def get(self, index: int) -> str:
+        return SLOT_STATES[self._slots[index]]
+
+    def counts(self) -> Dict[str, int]:
+        """
+        统计各状态的账号数。统计的是某一时刻的快照（复制一次所有槽，每个账号一个字节）。
+        :return: dict，键为 SLOT_STATES 中的各状态
+        """
+        snapshot = self._slots.tobytes()
+        return {state: snapshot.count(code) for code, state in enumerate(SLOT_STATES)}
+
+    def finished(self) -> bool:
+        """是否所有账号都已运行结束。"""
+        counts = self.counts()
+        return sum(counts[state] for state in _FINAL_STATES) == len(self)
+
+    def close(self) -> None:
+        """关闭本进程对共享内存的映射；创建者同时删除共享内存。"""
+        self._slots.release()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def format_progress(counts: Dict[str, int]) -> str:
+    """
+    把 StatusTable.counts 的结果格式化为一行进度。
+    :param counts: 各状态的账号数
+    :return: 形如「完成 12/100（成功 10，失败 2，跳过 0），进行中 5（login 2，fetch 1，verify 0，submit 2），排队 83」
+    """
+    total = sum(counts.values())
+    done = sum(counts[state] for state in _FINAL_STATES)
+    running = (PHASE.LOGIN, PHASE.FETCH, PHASE.VERIFY, PHASE.SUBMIT)
+    return (
+        f'完成 {done}/{total}（成功 {counts[PHASE.DONE]}，失败 {counts[FAILED]}，跳过 {counts[SKIPPED]}），'
+        f'进行中 {sum(counts[state] for state in running)}'
+        f'（{"，".join(f"{state} {counts[state]}" for state in running)}），'
+        f'排队 {counts[QUEUED]}'
+    )
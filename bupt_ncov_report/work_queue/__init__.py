@@ -0,0 +1 @@
+from .work_queue import *
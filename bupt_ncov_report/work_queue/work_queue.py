@@ -0,0 +1,251 @@
+__all__ = (
+    'Lease',
+    'DeadLetter',
+    'WorkQueue',
+)
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+
+class Lease(NamedTuple):
+    """从队列中领取的一个任务。"""
+
+    job_id: int
+    # 任务内容（入队时的 JSON 对象）
+    payload: Dict[str, Any]
+    # 含本次在内，该任务被领取的次数
+    attempts: int
+    # 本次领取的凭据；租约过期、任务被别人重新领取后，旧的凭据不能再确认或退回该任务
+    token: str
+
+
+class DeadLetter(NamedTuple):
+    """多次处理失败、不再重试的任务。"""
+
+    job_id: int
+    payload: Dict[str, Any]
+    attempts: int
+    last_error: Optional[str]
+
+
+class WorkQueue:
+    """
+    保存在 SQLite 数据库（WAL 模式）中的任务队列，可供同一台机器（或共享存储上）的多个进程同时使用，线程安全。
+
+    - lease：领取一个任务，该任务在 visibility_timeout 秒内对其它进程不可见（租约）；
+    - ack：处理成功，删除任务；
+    - nack：处理失败，任务回到队列等待重试；已领取 max_attempts 次的任务转入死信，不再重试。
+
+    进程崩溃时，它领取的任务的租约到期后会自动回到队列，由其它进程重新领取。
+    visibility_timeout 应大于处理一个任务所需的最长时间，否则任务可能被重复处理。
+    """
+
+    # 任务的状态
+    READY = 0
+    DEAD = 1
+
+    _SCHEMA = (
+        '''CREATE TABLE IF NOT EXISTS job (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload TEXT NOT NULL,
+            state INTEGER NOT NULL,
+            attempts INTEGER NOT NULL,
+            visible_at REAL NOT NULL,
+            token TEXT,
+            last_error TEXT
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_job_state_visible_at ON job (state, visible_at)',
+    )
+
+    def __init__(
+            self,
+            path: str,
+            visibility_timeout: float = 300,
+            max_attempts: int = 3,
+            busy_timeout: float = 30,
+            clock: Callable[[], float] = time.time,
+    ):
+        """
+        :param path: SQLite 数据库文件路径；不存在时自动创建
+        :param visibility_timeout: 租约的时长（秒）
+        :param max_attempts: 每个任务最多被领取的次数
+        :param busy_timeout: 数据库被其它进程锁住时，最多等待的秒数
+        :param clock: 返回当前时间（秒）的函数；多个进程共用队列，因此应使用墙上时间而不是 time.monotonic
+        """
+        if visibility_timeout <= 0 or max_attempts <= 0:
+            raise ValueError('visibility_timeout 与 max_attempts 必须大于 0')
+
+        self._visibility_timeout = visibility_timeout
+        self._max_attempts = max_attempts
+        self._clock = clock
+        self._lock = threading.Lock()
+        # isolation_level=None：由本类自己开始事务，以便用 BEGIN IMMEDIATE 在领取任务前就拿到写锁
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+
+        with self._lock:
+            # WAL 模式下读写互不阻塞，多个进程可以同时使用；synchronous=NORMAL 在 WAL 模式下不会损坏数据库
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            for sql in self._SCHEMA:
+                self._conn.execute(sql)
+
+    def enqueue(self, payloads: Iterable[Mapping[str, Any]]) -> int:
+        """
+        把任务放入队列。
+        :param payloads: 任务内容，每个元素须能被编码为 JSON 对象
+        :return: 放入的任务数
+        """
+        now = self._clock()
+        rows = ((json.dumps(dict(payload), ensure_ascii=False), self.READY, now) for payload in payloads)
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursor = self._conn.executemany(
+                    'INSERT INTO job (payload, state, attempts, visible_at) VALUES (?, ?, 0, ?)', rows)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+        return cursor.rowcount
+
+    def lease(self) -> Optional[Lease]:
+        """
+        领取最早可见的一个任务。租约过期的任务可以被重新领取；此时若已领取了 max_attempts 次，则转入死信。
+        :return: Lease；没有可领取的任务时返回 None
+        """
+        with self._lock:
+            # 先拿到写锁再查询，保证同一个任务不会被两个进程同时领取
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                lease = self._lease_locked(self._clock())
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+        return lease
+
+    def _lease_locked(self, now: float) -> Optional[Lease]:
+        while True:
+            row = self._conn.execute(
+                'SELECT id, payload, attempts FROM job WHERE state = ? AND visible_at <= ? '
+                'ORDER BY visible_at, id LIMIT 1',
+                (self.READY, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, payload, attempts = row
+            if attempts >= self._max_attempts:
+                # 最后一次领取它的进程没有确认也没有退回（可能崩溃了）
+                self._conn.execute(
+                    "UPDATE job SET state = ?, token = NULL, last_error = COALESCE(last_error, '租约过期') "
+                    'WHERE id = ?',
+                    (self.DEAD, job_id),
+                )
+                continue
+
+            token = uuid.uuid4().hex
+            self._conn.execute(
+                'UPDATE job SET attempts = ?, visible_at = ?, token = ? WHERE id = ?',
+                (attempts + 1, now + self._visibility_timeout, token, job_id),
+            )
+            return Lease(job_id, json.loads(payload), attempts + 1, token)
+
+    def ack(self, lease: Lease) -> bool:
+        """
+        确认任务处理成功，将其从队列中删除。
+        :param lease: lease 的返回值
+        :return: 租约仍然有效时返回 True；租约已过期、任务已被别人重新领取时返回 False
+        """
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM job WHERE id = ? AND token = ?', (lease.job_id, lease.token))
+
+        return cursor.rowcount == 1
+
+    def nack(self, lease: Lease, error: Optional[str] = None, delay: float = 0) -> bool:
+        """
+        退回处理失败的任务。已领取 max_attempts 次的任务转入死信；否则在 delay 秒后可以被重新领取。
+        :param lease: lease 的返回值
+        :param error: 失败原因，保存在死信中
+        :param delay: 重新可见前等待的秒数
+        :return: 租约仍然有效时返回 True；租约已过期、任务已被别人重新领取时返回 False
+        """
+        with self._lock:
+            if lease.attempts >= self._max_attempts:
+                cursor = self._conn.execute(
+                    'UPDATE job SET state = ?, token = NULL, last_error = ? WHERE id = ? AND token = ?',
+                    (self.DEAD, error, lease.job_id, lease.token),
+                )
+            else:
+                cursor = self._conn.execute(
+                    'UPDATE job SET visible_at = ?, token = NULL, last_error = ? WHERE id = ? AND token = ?',
+                    (self._clock() + delay, error, lease.job_id, lease.token),
+                )
+
+        return cursor.rowcount == 1
+
+    def next_visible_in(self) -> Optional[float]:
+        """
+        距离下一个任务可以被领取的秒数。
+        :return: 秒数，已有可领取的任务时为 0；队列中没有待处理的任务（死信除外）时返回 None
+        """
+        with self._lock:
+            visible_at: Optional[float] = self._conn.execute(
+                'SELECT MIN(visible_at) FROM job WHERE state = ?', (self.READY,)).fetchone()[0]
+
+        if visible_at is None:
+            return None
+
+        return max(visible_at - self._clock(), 0.0)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        各状态的任务数。
+        :return: dict，含 ready（可领取）、waiting（已被领取且租约未过期，或退回后等待重试）与 dead（死信）
+        """
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT '
+                'COALESCE(SUM(state = ? AND visible_at <= ?), 0), '
+                'COALESCE(SUM(state = ? AND visible_at > ?), 0), '
+                'COALESCE(SUM(state = ?), 0) '
+                'FROM job',
+                (self.READY, now, self.READY, now, self.DEAD),
+            ).fetchone()
+
+        return {'ready': row[0], 'waiting': row[1], 'dead': row[2]}
+
+    def dead_letters(self) -> List[DeadLetter]:
+        """查询所有死信。"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'SELECT id, payload, attempts, last_error FROM job WHERE state = ? ORDER BY id', (self.DEAD,))
+            rows = cursor.fetchall()
+
+        return [DeadLetter(row[0], json.loads(row[1]), row[2], row[3]) for row in rows]
+
+    def requeue_dead(self) -> int:
+        """
+        把所有死信放回队列，并重置其领取次数。
+        :return: 放回的任务数
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE job SET state = ?, attempts = 0, visible_at = ? WHERE state = ?',
+                (self.READY, self._clock(), self.DEAD),
+            )
+
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
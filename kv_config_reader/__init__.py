@@ -1,3 +1,37 @@
-from .filler import *
-from .predef import *
-from .public_util import *
+import sys
+from typing import TYPE_CHECKING
+
+from ._util import install_lazy_exports
+
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    from ._util.lazy import *
+    from .compiler import *
+    from .filler import *
+    from .predef import *
+    from .public_util import *
+    from .roster import *
+else:
+    # 按需导入，以缩短冷启动时间；见 install_lazy_exports
+    install_lazy_exports(globals(), {
+        'install_lazy_exports': '._util.lazy',
+
+        'CompiledConfig': '.compiler',
+        'compile_schema': '.compiler',
+
+        'IFiller': '.filler.base',
+        'CmdArgsFiller': '.filler.cmd_args_filler',
+        'EnvFiller': '.filler.env_filler',
+        'FileFiller': '.filler.file_filler',
+        'IniFiller': '.filler.ini_filler',
+        'JsonFiller': '.filler.json_filler',
+        'TomlFiller': '.filler.toml_filler',
+        'YamlFiller': '.filler.yaml_filler',
+
+        'SupportedConfigType': '.predef',
+        'ConfigSchemaItem': '.predef',
+
+        'initialize_config': '.public_util',
+
+        'iter_roster': '.roster',
+        'lookup_roster': '.roster',
+    })
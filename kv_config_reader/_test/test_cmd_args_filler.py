@@ -112,6 +112,31 @@ class TestCmdArgsFiller(unittest.TestCase):
             'SHIT_BOOL': False,
         })
 
+    def test_emptyArgs(self):
+        """没有命令行参数时不改变 config（包括 bool 类型的配置）"""
+
+        filler = CmdArgsFiller(args=[])
+        config = {**DEFAULT_CONFIG, 'FUCK_BOOL': True}
+        filler.fill(config, CONFIG_SCHEMA)
+
+        self.assertEqual({**DEFAULT_CONFIG, 'FUCK_BOOL': True}, config)
+
+    def test_unspecifiedBool(self):
+        """未指定的 bool 参数不覆盖原值"""
+
+        filler = CmdArgsFiller(args=['--suck-bool'])
+        config = {**DEFAULT_CONFIG, 'FUCK_BOOL': True}
+        filler.fill(config, CONFIG_SCHEMA)
+
+        self.assertEqual({**DEFAULT_CONFIG, 'FUCK_BOOL': True, 'SUCK_BOOL': True}, config)
+
+    def test_parserCache(self):
+        """相同的 description 与 schema 复用同一个 parser"""
+
+        parser = CmdArgsFiller._get_parser('desc', CONFIG_SCHEMA)
+        self.assertIs(parser, CmdArgsFiller._get_parser('desc', dict(CONFIG_SCHEMA)))
+        self.assertIsNot(parser, CmdArgsFiller._get_parser('other desc', CONFIG_SCHEMA))
+
 
 if __name__ == '__main__':
     unittest.main()
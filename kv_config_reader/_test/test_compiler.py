@@ -0,0 +1,113 @@
+import copy
+import pickle
+import unittest
+from typing import Optional
+
+from kv_config_reader.compiler import *
+from kv_config_reader.predef import *
+
+CONFIG_SCHEMA = {
+    'FUCK_STR': ConfigSchemaItem(description='fuck you', for_short='fy', default='fuck', type=str),
+    'SHIT_STR': ConfigSchemaItem(description='oh shit', for_short='os', default=None, type=str),
+    'FUCK_INT': ConfigSchemaItem(description='fuck you', for_short='fy', default=1, type=int),
+    'FUCK_BOOL': ConfigSchemaItem(description='fuck you', for_short='fy', default=False, type=bool),
+}
+
+DEFAULT_CONFIG = {
+    'FUCK_STR': 'fuck',
+    'SHIT_STR': None,
+    'FUCK_INT': 1,
+    'FUCK_BOOL': False,
+}
+
+
+def no_fuck_shit(config: CompiledConfig) -> None:
+    if config['FUCK_STR'] == config['SHIT_STR']:
+        raise ValueError('FUCK_STR 与 SHIT_STR 不能相同')
+
+
+class NeedsFuck(CompiledConfig):
+    __slots__ = ()
+
+    FUCK_STR: Optional[str]
+
+    _required = ('FUCK_STR',)
+
+
+# 模块级的类才能被 pickle
+PickledConfig = compile_schema(CONFIG_SCHEMA, 'PickledConfig')
+
+
+class TestCompiler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.Config = compile_schema(
+            CONFIG_SCHEMA, 'Config', required=('SHIT_STR',), validators=(no_fuck_shit,),
+        )
+
+    def test_defaultsAndMapping(self):
+        config = self.Config()
+
+        self.assertEqual(DEFAULT_CONFIG, config)
+        self.assertEqual(DEFAULT_CONFIG, config.to_dict())
+        self.assertEqual('fuck', config['FUCK_STR'])
+        self.assertEqual('fuck', config.FUCK_STR)
+        self.assertEqual(1, config.get('FUCK_INT'))
+        self.assertIsNone(config.get('UNKNOWN'))
+        self.assertFalse(hasattr(config, '__dict__'))
+
+    def test_fromMapping_unknownKey(self):
+        with self.assertRaises(TypeError) as _asRa:
+            self.Config.from_mapping({'UNKNOWN': 1})
+
+    def test_validate(self):
+        config = self.Config.from_mapping({'SHIT_STR': 'shit'})
+        self.assertIs(config, config.validate())
+
+        # 未设置必填项
+        with self.assertRaises(ValueError) as _asRa:
+            self.Config().validate()
+
+        # 类型错误
+        with self.assertRaises(ValueError) as _asRa:
+            self.Config(SHIT_STR='shit', FUCK_INT=True).validate()
+
+        # 自定义检查
+        with self.assertRaises(ValueError) as _asRa:
+            self.Config(SHIT_STR='fuck').validate()
+
+    def test_replace(self):
+        config = self.Config(SHIT_STR='shit')
+        other = config.replace(FUCK_INT=2)
+
+        self.assertEqual({**DEFAULT_CONFIG, 'SHIT_STR': 'shit', 'FUCK_INT': 2}, other)
+        self.assertEqual(1, config.FUCK_INT)
+        self.assertEqual(config, copy.copy(config))
+        self.assertIs(type(config), type(copy.copy(config)))
+
+        with self.assertRaises(TypeError) as _asRa:
+            config.replace(UNKNOWN=1)
+
+    def test_base(self):
+        Config = compile_schema(CONFIG_SCHEMA, required=('SHIT_STR',), base=NeedsFuck)
+        self.assertTrue(issubclass(Config, NeedsFuck))
+        self.assertEqual(('FUCK_STR', 'SHIT_STR'), Config._required)
+
+        with self.assertRaises(ValueError) as _asRa:
+            Config(FUCK_STR=None, SHIT_STR='shit').validate()
+
+        # schema 中缺少基类需要的配置项
+        with self.assertRaises(ValueError) as _asRa:
+            compile_schema({'SHIT_STR': CONFIG_SCHEMA['SHIT_STR']}, base=NeedsFuck)
+
+    def test_pickle(self):
+        config = PickledConfig(SHIT_STR='shit')
+        self.assertEqual(config, pickle.loads(pickle.dumps(config)))
+
+    def test_invalidName(self):
+        with self.assertRaises(ValueError) as _asRa:
+            compile_schema({'NOT-AN-IDENTIFIER': CONFIG_SCHEMA['FUCK_STR']})
+
+
+if __name__ == '__main__':
+    unittest.main()
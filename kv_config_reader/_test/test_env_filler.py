@@ -140,3 +140,38 @@ class TestEnvFilter(unittest.TestCase):
             ),
         })
         self.assertEqual(config, DEFAULT_CONFIG)
+
+    def test_iterAccounts(self):
+        """多账号模式：按后缀分组，不带后缀的环境变量为共用配置"""
+
+        filler = EnvFiller(env={
+            'FUCK_STR': 'shared',
+            'SUCK_STR_10': 'j',
+            'SUCK_STR_2': 'b',
+            'FUCK_INT_2': '22',
+            'DAMN_INT_2': 'abc',
+            'FUCK_BOOL_alice': '1',
+            'SHIT_STR_': 'no suffix',
+            'UNKNOWN_1': 'x',
+        })
+        accounts = list(filler.iter_accounts(CONFIG_SCHEMA))
+
+        self.assertEqual([
+            {**DEFAULT_CONFIG, 'FUCK_STR': 'shared', 'SUCK_STR': 'b', 'FUCK_INT': 22},
+            {**DEFAULT_CONFIG, 'FUCK_STR': 'shared', 'SUCK_STR': 'j'},
+            {**DEFAULT_CONFIG, 'FUCK_STR': 'shared', 'FUCK_BOOL': True},
+        ], accounts)
+
+    def test_iterAccounts_baseConfig(self):
+        """指定 base_config 时以其为基础，且不把与配置同名的环境变量当作带后缀的环境变量"""
+
+        schema = {
+            'TG_BOT': ConfigSchemaItem(description='', for_short='', default=None, type=str),
+            'TG_BOT_TOKEN': ConfigSchemaItem(description='', for_short='', default=None, type=str),
+        }
+        filler = EnvFiller(env={'TG_BOT_TOKEN': 'a', 'TG_BOT_TOKEN_1': 'b'})
+
+        self.assertEqual(
+            [{'TG_BOT': 'base', 'TG_BOT_TOKEN': 'b'}],
+            list(filler.iter_accounts(schema, base_config={'TG_BOT': 'base', 'TG_BOT_TOKEN': None})),
+        )
@@ -0,0 +1,114 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+from kv_config_reader.filler import *
+from kv_config_reader.predef import *
+
+CONFIG_SCHEMA = {
+    'USER': ConfigSchemaItem(description='user', for_short='u', default=None, type=str),
+    'TIMES': ConfigSchemaItem(description='times', for_short='t', default=1, type=int),
+    'SICK': ConfigSchemaItem(description='sick', for_short='s', default=False, type=bool),
+}
+
+DEFAULT_CONFIG = {
+    'USER': None,
+    'TIMES': 1,
+    'SICK': False,
+}
+
+
+class CountingJsonFiller(JsonFiller):
+    """记录 parse 被调用次数的 JsonFiller"""
+    parse_count = 0
+
+    @staticmethod
+    def parse(text):
+        CountingJsonFiller.parse_count += 1
+        return JsonFiller.parse(text)
+
+
+class TestFileFiller(unittest.TestCase):
+
+    def _write(self, suffix: str, text: str) -> str:
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_json_sections(self):
+        path = self._write('.json', json.dumps({
+            'TIMES': 3,
+            'UNKNOWN': 'x',
+            'alice': {'USER': 'a', 'SICK': True},
+            'bob': {'USER': 'b', 'TIMES': '5'},
+        }))
+
+        config = DEFAULT_CONFIG.copy()
+        JsonFiller(file_name=path).fill(config, CONFIG_SCHEMA)
+        self.assertEqual({'USER': None, 'TIMES': 3, 'SICK': False}, config)
+
+        config = DEFAULT_CONFIG.copy()
+        JsonFiller(file_name=path, section='bob').fill(config, CONFIG_SCHEMA)
+        self.assertEqual({'USER': 'b', 'TIMES': 5, 'SICK': False}, config)
+
+        self.assertEqual(['alice', 'bob'], JsonFiller(file_name=path).sections())
+
+        with self.assertRaises(ValueError) as _asRa:
+            JsonFiller(file_name=path, section='carol').fill(DEFAULT_CONFIG.copy(), CONFIG_SCHEMA)
+
+    def test_ini(self):
+        path = self._write('.ini', '[DEFAULT]\nTIMES = 7\n\n[alice]\nUSER = a\nSICK = 1\n')
+
+        config = DEFAULT_CONFIG.copy()
+        IniFiller(file_name=path, section='alice').fill(config, CONFIG_SCHEMA)
+        self.assertEqual({'USER': 'a', 'TIMES': 7, 'SICK': True}, config)
+
+    @unittest.skipUnless(importlib.util.find_spec('tomllib') or importlib.util.find_spec('toml'), '缺少 TOML 库')
+    def test_toml(self):
+        path = self._write('.toml', 'TIMES = 2\n\n[alice]\nUSER = "a"\n')
+
+        config = DEFAULT_CONFIG.copy()
+        TomlFiller(file_name=path, section='alice').fill(config, CONFIG_SCHEMA)
+        self.assertEqual({'USER': 'a', 'TIMES': 2, 'SICK': False}, config)
+
+    def test_readFromConfig(self):
+        path = self._write('.json', '{"USER": "a"}')
+
+        config = {**DEFAULT_CONFIG, 'CONFIG_FILE': path}
+        JsonFiller(read_from_config='CONFIG_FILE').fill(config, CONFIG_SCHEMA)
+        self.assertEqual('a', config['USER'])
+
+        # 未设置该配置时不改变 config
+        config = {**DEFAULT_CONFIG, 'CONFIG_FILE': None}
+        JsonFiller(read_from_config='CONFIG_FILE').fill(config, CONFIG_SCHEMA)
+        self.assertEqual({**DEFAULT_CONFIG, 'CONFIG_FILE': None}, config)
+
+        with self.assertRaises(ValueError) as _asRa:
+            JsonFiller()
+
+    def test_parseCache(self):
+        """文件未改变时不重复解析；文件改变后重新解析"""
+        path = self._write('.json', '{"USER": "a"}')
+        CountingJsonFiller.parse_count = 0
+
+        for _ in range(3):
+            config = DEFAULT_CONFIG.copy()
+            CountingJsonFiller(file_name=path).fill(config, CONFIG_SCHEMA)
+            self.assertEqual('a', config['USER'])
+        self.assertEqual(1, CountingJsonFiller.parse_count)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"USER": "bb"}')
+
+        config = DEFAULT_CONFIG.copy()
+        CountingJsonFiller(file_name=path).fill(config, CONFIG_SCHEMA)
+        self.assertEqual('bb', config['USER'])
+        self.assertEqual(2, CountingJsonFiller.parse_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import types
+import unittest
+
+from kv_config_reader.predef import *
+from kv_config_reader.roster import *
+
+CONFIG_SCHEMA = {
+    'USER': ConfigSchemaItem(description='user', for_short='u', default=None, type=str),
+    'PASS': ConfigSchemaItem(description='pass', for_short='p', default=None, type=str),
+    'TIMES': ConfigSchemaItem(description='times', for_short='t', default=1, type=int),
+    'SICK': ConfigSchemaItem(description='sick', for_short='s', default=False, type=bool),
+}
+
+
+class TestRoster(unittest.TestCase):
+
+    def _write(self, suffix: str, text: str) -> str:
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_jsonl(self):
+        path = self._write('.jsonl', '\n'.join((
+            '{"USER": "a", "PASS": "1", "TIMES": 3, "SICK": true}',
+            '',
+            '{"USER": "b", "PASS": "2", "TIMES": "4"}',
+            '{"USER": "c", "TIMES": "abc", "SICK": ""}',
+        )))
+
+        self.assertEqual([
+            {'USER': 'a', 'PASS': '1', 'TIMES': 3, 'SICK': True},
+            {'USER': 'b', 'PASS': '2', 'TIMES': 4, 'SICK': False},
+            {'USER': 'c', 'PASS': None, 'TIMES': 1, 'SICK': False},
+        ], list(iter_roster(path, CONFIG_SCHEMA)))
+
+    def test_csv_withBaseConfig(self):
+        path = self._write('.csv', 'USER,PASS,SICK\na,1,\nb,2,1\n')
+        base = {'USER': None, 'PASS': 'shared', 'TIMES': 9, 'SICK': False}
+
+        self.assertEqual([
+            {'USER': 'a', 'PASS': '1', 'TIMES': 9, 'SICK': False},
+            {'USER': 'b', 'PASS': '2', 'TIMES': 9, 'SICK': True},
+        ], list(iter_roster(path, CONFIG_SCHEMA, base_config=base)))
+
+    def test_isLazy(self):
+        """未迭代时不读取文件；迭代到坏行之前的账号都能正常生成"""
+        path = self._write('.jsonl', '{"USER": "a"}\n{"WHAT": "b"}\n')
+
+        roster = iter_roster(path, CONFIG_SCHEMA)
+        self.assertIsInstance(roster, types.GeneratorType)
+        self.assertEqual('a', next(roster)['USER'])
+        with self.assertRaises(ValueError) as _asRa:
+            next(roster)
+
+    def test_onError(self):
+        """设置了 on_error 时，无法解析的行被跳过，之后的行照常生成"""
+        path = self._write('.jsonl', '{"USER": "a"}\n{"WHAT": "b"}\nnot json\n[1]\n{"USER": "c"}\n')
+        errors = []
+
+        users = [config['USER'] for config in iter_roster(path, CONFIG_SCHEMA, on_error=errors.append)]
+        self.assertEqual(['a', 'c'], users)
+        self.assertEqual(3, len(errors))
+        self.assertIn('第 2 行', str(errors[0]))
+        self.assertIn('第 3 行', str(errors[1]))
+
+    def test_lookup_jsonl(self):
+        path = self._write('.jsonl', '\n'.join((
+            '{"USER": "a", "PASS": "1"}',
+            '',
+            '{"USER": "b", "PASS": "2", "TIMES": 5}',
+            '{"PASS": "3"}',
+            '{"USER": "c", "PASS": "4"}',
+        )))
+
+        self.assertEqual([
+            {'USER': 'c', 'PASS': '4', 'TIMES': 1, 'SICK': False},
+            {'USER': 'b', 'PASS': '2', 'TIMES': 5, 'SICK': False},
+        ], list(lookup_roster(path, CONFIG_SCHEMA, 'USER', ['c', 'x', 'b'])))
+
+    def test_lookup_csv(self):
+        path = self._write('.csv', 'USER,PASS,TIMES\na,1,\n"b","multi\nline",3\nc,3,\n')
+        base = {'USER': None, 'PASS': None, 'TIMES': 9, 'SICK': True}
+
+        self.assertEqual([
+            {'USER': 'c', 'PASS': '3', 'TIMES': 9, 'SICK': True},
+            {'USER': 'b', 'PASS': 'multi\nline', 'TIMES': 3, 'SICK': True},
+        ], list(lookup_roster(path, CONFIG_SCHEMA, 'USER', ['c', 'b'], base_config=base)))
+
+    def test_lookup_fileChanged(self):
+        """文件改变后重建索引"""
+        path = self._write('.jsonl', '{"USER": "a", "PASS": "1"}\n')
+        self.assertEqual('1', next(lookup_roster(path, CONFIG_SCHEMA, 'USER', ['a']))['PASS'])
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"USER": "b"}\n{"USER": "a", "PASS": "22"}\n')
+        self.assertEqual('22', next(lookup_roster(path, CONFIG_SCHEMA, 'USER', ['a']))['PASS'])
+
+    def test_lookup_badLine(self):
+        """无效的 JSON 或 UTF-8 行交给 on_error，不影响其它行"""
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'{"USER": "a"}\nnot json\n{"USER": "\xff"}\n{"USER": "b"}\n')
+        self.addCleanup(os.remove, path)
+
+        errors = []
+        users = [
+            config['USER']
+            for config in lookup_roster(path, CONFIG_SCHEMA, 'USER', ['b', 'a'], on_error=errors.append)
+        ]
+        self.assertEqual(['b', 'a'], users)
+        self.assertEqual(2, len(errors))
+        self.assertIn('第 2 行', str(errors[0]))
+        self.assertIn('第 3 行', str(errors[1]))
+
+        # 索引已缓存，再次查找时仍然报告
+        errors.clear()
+        self.assertEqual(1, len(list(lookup_roster(path, CONFIG_SCHEMA, 'USER', ['a'], on_error=errors.append))))
+        self.assertEqual(2, len(errors))
+
+        with self.assertRaises(ValueError) as _asRa:
+            list(lookup_roster(path, CONFIG_SCHEMA, 'USER', ['a']))
+
+    def test_lookup_numberKey(self):
+        """key 列为 JSON 数字的行与 iter_roster 一样转为字符串，能被查找到"""
+        path = self._write('.jsonl', '{"USER": 2020, "PASS": "1"}\n{"USER": "2021", "PASS": "2"}\n')
+
+        self.assertEqual(
+            [('2020', '1'), ('2021', '2')],
+            [(c['USER'], c['PASS']) for c in lookup_roster(path, CONFIG_SCHEMA, 'USER', ['2020', '2021'])],
+        )
+
+    def test_unknownFormat(self):
+        with self.assertRaises(ValueError) as _asRa:
+            list(iter_roster('roster.txt', CONFIG_SCHEMA))
+
+
+if __name__ == '__main__':
+    unittest.main()
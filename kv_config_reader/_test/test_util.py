@@ -26,6 +26,18 @@ class TestUtil(unittest.TestCase):
     def test_parseEnvAsType_abc_bool(self):
         self.assertEqual(parse_env_as_type('abc', bool), True)
 
+    def test_parseValueAsType_native(self):
+        self.assertEqual(parse_value_as_type(233, int), 233)
+        self.assertEqual(parse_value_as_type(233, str), '233')
+        self.assertEqual(parse_value_as_type(0, bool), False)
+        self.assertEqual(parse_value_as_type(True, bool), True)
+        self.assertEqual(parse_value_as_type(True, int), None)
+        self.assertEqual(parse_value_as_type([1], str), None)
+
+    def test_parseValueAsType_str(self):
+        self.assertEqual(parse_value_as_type('233', int), 233)
+        self.assertEqual(parse_value_as_type('abc', bool), True)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1 +1,3 @@
+from .file_cache import *
+from .lazy import *
 from .util import *
@@ -0,0 +1,39 @@
+__all__ = (
+    'load_file_cached',
+)
+
+import os
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+# 键为 (文件绝对路径, 解析函数)，值为 (mtime_ns, 文件大小, 解析结果)
+_cache: Dict[Tuple[str, Callable[[str], Any]], Tuple[int, int, Any]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_file_cached(path: str, parse: Callable[[str], Any]) -> Any:
+    """
+    读取并解析文件。解析结果按照「路径 + mtime + 文件大小」缓存，
+    文件未改变时直接返回上次的解析结果，不会重新读取、解析文件。
+
+    注意：返回的对象会被多次调用共享，调用者不应修改它。
+
+    :param path: 文件路径
+    :param parse: 解析函数，参数为文件内容（UTF-8 解码后的字符串）
+    :return: parse 的返回值
+    """
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+    key = (abs_path, parse)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(abs_path, 'r', encoding='utf-8') as f:
+        result = parse(f.read())
+
+    with _cache_lock:
+        _cache[key] = (stat.st_mtime_ns, stat.st_size, result)
+    return result
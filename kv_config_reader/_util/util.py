@@ -1,5 +1,6 @@
 __all__ = (
     'parse_env_as_type',
+    'parse_value_as_type',
 )
 
 from typing import Optional, Type
@@ -30,3 +31,34 @@ def parse_env_as_type(
         return text
 
     assert False
+
+
+def parse_value_as_type(
+        value: object,
+        target_type: Type[SupportedConfigType],
+) -> Optional[SupportedConfigType]:
+    """
+    将从文件中读到的值（可能是字符串，也可能是 JSON 等格式中的原生类型）解析为目标类型。
+    字符串交给 parse_env_as_type 解析；原生类型只接受能无损表示为目标类型的值。
+    当无法解析为目标类型时，返回 None。
+
+    :param value: 要解析的值
+    :param target_type: 目标类型
+    :return: 目标类型的值
+    """
+    if isinstance(value, str):
+        return parse_env_as_type(value, target_type)
+
+    # bool 是 int 的子类，必须先于 int 判断
+    if isinstance(value, bool):
+        return value if target_type is bool else None
+
+    if isinstance(value, int):
+        if target_type is int:
+            return value
+        elif target_type is str:
+            return str(value)
+        elif target_type is bool:
+            return value != 0
+
+    return None
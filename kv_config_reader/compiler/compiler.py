@@ -0,0 +1,206 @@
+__all__ = (
+    'CompiledConfig',
+    'compile_schema',
+)
+
+import keyword
+import sys
+from typing import (
+    Any, Callable, ClassVar, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple, Type, TypeVar, overload,
+)
+
+from ..predef import *
+
+_T = TypeVar('_T', bound='CompiledConfig')
+
+
+class CompiledConfig(Mapping[str, Optional[SupportedConfigType]]):
+    """
+    由 compile_schema 生成的配置类的基类。
+
+    生成的类为每个配置项定义一个 __slots__ 属性，因此实例不含 __dict__，占用内存少，访问属性也更快。
+    本类同时实现了 Mapping 接口，可以像 dict 一样用 config['NAME'] 访问；频繁访问的地方应直接访问属性。
+
+    可以继承本类，用类型注解声明某些代码需要的配置项（同时给出属性的类型），并在 _required、_validators 中声明对它们的检查；
+    把子类作为 compile_schema 的 base，生成的类会继承这些注解与检查。
+    """
+
+    __slots__ = ()
+
+    # 以下类属性由 compile_schema 生成
+    _fields: ClassVar[Tuple[str, ...]] = ()
+    _field_set: ClassVar[frozenset] = frozenset()
+    _types: ClassVar[Tuple[Tuple[str, type], ...]] = ()
+    # 以下类属性可以由子类声明，compile_schema 会把传入的值追加在后面
+    _required: ClassVar[Tuple[str, ...]] = ()
+    _validators: ClassVar[Tuple[Callable[['CompiledConfig'], None], ...]] = ()
+
+    @classmethod
+    def from_mapping(cls: Type[_T], mapping: Mapping[str, Optional[SupportedConfigType]]) -> _T:
+        """
+        用已经解析好的配置（如 filler 填好的 dict）建立实例；mapping 中缺少的配置项使用默认值。
+        :param mapping: 配置；不能含有 schema 中不存在的配置名
+        :return: 实例
+        """
+        return cls(**mapping)
+
+    def __copy__(self: _T) -> _T:
+        # 由 compile_schema 生成
+        raise NotImplementedError
+
+    def replace(self: _T, **changes: Optional[SupportedConfigType]) -> _T:
+        """
+        复制一份实例，并修改其中的某些配置项，与 namedtuple 的 _replace 相同。不经过 dict，只复制各个属性。
+        :param changes: 要修改的配置项；不能含有 schema 中不存在的配置名
+        :return: 新的实例
+        """
+        for name in changes:
+            if name not in self._field_set:
+                raise TypeError(f'{type(self).__name__} 没有配置项 {name}')
+
+        other = self.__copy__()
+        for name, value in changes.items():
+            setattr(other, name, value)
+        return other
+
+    def validate(self: _T) -> _T:
+        """
+        检查配置是否正确；如不正确则抛出 ValueError。
+        依次检查：各配置项的类型、必填的配置项、compile_schema 时传入的 validators。
+        :return: self，便于链式调用
+        """
+        for name, target_type in self._types:
+            value = getattr(self, name)
+            if value is None:
+                continue
+
+            # bool 是 int 的子类，int 类型的配置项不接受 bool
+            if not isinstance(value, target_type) or (target_type is int and isinstance(value, bool)):
+                raise ValueError(f'配置 {name} 的类型应为 {target_type.__name__}，实际为 {type(value).__name__}。')
+
+        for name in self._required:
+            if getattr(self, name) is None:
+                raise ValueError(f'配置 {name} 未设置。')
+
+        for validator in self._validators:
+            validator(self)
+
+        return self
+
+    def to_dict(self) -> Dict[str, Optional[SupportedConfigType]]:
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __getitem__(self, key: str) -> Optional[SupportedConfigType]:
+        if key not in self._field_set:
+            raise KeyError(key)
+
+        value: Optional[SupportedConfigType] = getattr(self, key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._field_set
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({values})'
+
+
+@overload
+def compile_schema(
+        config_schema: Mapping[str, ConfigSchemaItem],
+        class_name: str = ...,
+        required: Iterable[str] = ...,
+        validators: Sequence[Callable[[CompiledConfig], None]] = ...,
+        *,
+        base: Type[_T],
+        module: Optional[str] = ...,
+) -> Type[_T]: ...
+
+
+@overload
+def compile_schema(
+        config_schema: Mapping[str, ConfigSchemaItem],
+        class_name: str = ...,
+        required: Iterable[str] = ...,
+        validators: Sequence[Callable[[CompiledConfig], None]] = ...,
+        *,
+        module: Optional[str] = ...,
+) -> Type[CompiledConfig]: ...
+
+
+def compile_schema(
+        config_schema: Mapping[str, ConfigSchemaItem],
+        class_name: str = 'Config',
+        required: Iterable[str] = (),
+        validators: Sequence[Callable[[CompiledConfig], None]] = (),
+        *,
+        base: Type[CompiledConfig] = CompiledConfig,
+        module: Optional[str] = None,
+) -> Type[CompiledConfig]:
+    """
+    将 schema 编译为一个 CompiledConfig 的子类。
+
+    生成的类为每个配置项定义 __slots__ 属性，__init__ 只接受关键字参数，未传入的配置项使用 schema 中的默认值。
+    类型检查与 validators 都在编译时准备好，建立、检查大量实例时没有额外开销。
+
+    :param config_schema: schema；配置名必须是合法的 Python 标识符
+    :param class_name: 生成的类名
+    :param required: 必须设置（不为 None）的配置名；追加在 base 声明的之后
+    :param validators: 额外的检查函数；参数为实例，配置不正确时应抛出 ValueError。追加在 base 声明的之后
+    :param base: 基类，CompiledConfig 或其子类；schema 必须含有基类用类型注解声明的所有配置项
+    :param module: 生成的类所在的模块名，用于 pickle（如传给其它进程）；None 表示调用者所在的模块
+    :return: 生成的类
+    """
+    fields = tuple(config_schema)
+    for name in fields:
+        if not name.isidentifier() or keyword.iskeyword(name) or name.startswith('_'):
+            raise ValueError(f'配置名 {name} 不是合法的属性名。')
+
+    for klass in base.__mro__:
+        if not issubclass(klass, CompiledConfig) or klass is CompiledConfig:
+            continue
+        for name in klass.__dict__.get('__annotations__', {}):
+            if not name.startswith('_') and name not in config_schema:
+                raise ValueError(f'{base.__name__} 需要的配置 {name} 不在 schema 中。')
+
+    required = (*base._required, *required)
+    for name in required:
+        if name not in config_schema:
+            raise ValueError(f'必填的配置 {name} 不在 schema 中。')
+
+    # 与 namedtuple 类似，用 exec 生成只接受关键字参数的 __init__；默认值放在其全局命名空间中。
+    # __copy__ 逐个复制属性，不经过 __init__
+    defaults = {f'_default_{name}': item.default for name, item in config_schema.items()}
+    params = ', '.join(f'{name}=_default_{name}' for name in fields)
+    body = '\n'.join(f'    self.{name} = {name}' for name in fields) or '    pass'
+    init_source = f'def __init__(self, *, {params}):\n{body}\n' if fields else f'def __init__(self):\n{body}\n'
+    copy_body = ''.join(f'    other.{name} = self.{name}\n' for name in fields)
+    copy_source = f'def __copy__(self):\n    other = _new(type(self))\n{copy_body}    return other\n'
+
+    namespace: Dict[str, Any] = {**defaults, '_new': object.__new__}
+    exec(init_source + copy_source, namespace)
+
+    # 与 namedtuple 相同，默认把生成的类放在调用者所在的模块中，使实例能被 pickle
+    if module is None:
+        module = sys._getframe(1).f_globals.get('__name__', '__main__')
+
+    class_dict: Dict[str, Any] = {
+        '__slots__': fields,
+        '__init__': namespace['__init__'],
+        '__copy__': namespace['__copy__'],
+        '__module__': module,
+        '__annotations__': {name: Optional[item.type] for name, item in config_schema.items()},
+        '_fields': fields,
+        '_field_set': frozenset(fields),
+        '_types': tuple((name, item.type) for name, item in config_schema.items()),
+        '_required': tuple(dict.fromkeys(required)),
+        '_validators': (*base._validators, *validators),
+    }
+
+    return type(class_name, (base,), class_dict)
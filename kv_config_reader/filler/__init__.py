@@ -1,7 +1,25 @@
-from .base import *
-from .cmd_args_filler import *
-from .env_filler import *
-from .ini_filler import *
-from .json_filler import *
-from .toml_filler import *
-from .yaml_filler import *
+import sys
+from typing import TYPE_CHECKING
+
+from .._util import install_lazy_exports
+
+if TYPE_CHECKING or sys.version_info < (3, 7):
+    from .base import *
+    from .cmd_args_filler import *
+    from .env_filler import *
+    from .file_filler import *
+    from .ini_filler import *
+    from .json_filler import *
+    from .toml_filler import *
+    from .yaml_filler import *
+else:
+    install_lazy_exports(globals(), {
+        'IFiller': '.base',
+        'CmdArgsFiller': '.cmd_args_filler',
+        'EnvFiller': '.env_filler',
+        'FileFiller': '.file_filler',
+        'IniFiller': '.ini_filler',
+        'JsonFiller': '.json_filler',
+        'TomlFiller': '.toml_filler',
+        'YamlFiller': '.yaml_filler',
+    })
@@ -3,13 +3,18 @@ __all__ = (
 )
 
 import sys
-from argparse import ArgumentParser
-from typing import Any, Dict, Mapping, MutableMapping, Optional, Sequence, Union
+from typing import TYPE_CHECKING, Any, Dict, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
 
 from .base import *
 from .._util import *
 from ..predef import *
 
+if TYPE_CHECKING:
+    from argparse import ArgumentParser
+
+# 键为 (description, schema 的全部项)，值为构造好的 ArgumentParser
+_parser_cache: Dict[Tuple[Optional[str], Tuple[Tuple[str, ConfigSchemaItem], ...]], 'ArgumentParser'] = {}
+
 
 class CmdArgsFiller(IFiller):
     """
@@ -38,8 +43,53 @@ class CmdArgsFiller(IFiller):
             config: MutableMapping[str, Optional[SupportedConfigType]],
             config_schema: Mapping[str, ConfigSchemaItem],
     ) -> None:
+        # 没有命令行参数时，不会有任何配置被填写，无需构造 ArgumentParser
+        if len(self.args) == 0:
+            return
+
+        parser = self._get_parser(self.description, config_schema)
+
+        # 解析命令行参数，将被指定的项填写到 _conf 变量中
+        args: Dict[str, Union[str, bool, None]]
+        args = vars(parser.parse_args(args=self.args))
+
+        for k, v in args.items():
+            if isinstance(v, bool):
+                config[k] = v
+                continue
+
+            # 空字符串视作 None
+            if v is None or v == '':
+                continue
+
+            parse_result = parse_env_as_type(v, config_schema[k].type)
+            if parse_result is None:
+                continue
+
+            config[k] = parse_result
+
+    @staticmethod
+    def _get_parser(
+            description: Optional[str],
+            config_schema: Mapping[str, ConfigSchemaItem],
+    ) -> 'ArgumentParser':
+        """
+        获取与 description、schema 对应的 ArgumentParser。
+        构造好的 parser 按照 description 与 schema 的内容缓存，同一进程中多次调用 fill 时不会重复构造。
+        :param description: 程序的简介
+        :param config_schema: schema
+        :return: ArgumentParser
+        """
+        key = (description, tuple(config_schema.items()))
+        parser = _parser_cache.get(key)
+        if parser is not None:
+            return parser
+
+        # argparse 只在需要解析命令行参数时才导入
+        from argparse import ArgumentParser
+
         parser = ArgumentParser(
-            description=self.description,
+            description=description,
         )
 
         for name, schema_item in config_schema.items():
@@ -60,21 +110,5 @@ class CmdArgsFiller(IFiller):
             # 将形如 FOO_BAR 的名字转换为 --foo-bar，添加为命令行参数
             parser.add_argument('--' + name.lower().replace('_', '-'), **parser_args)
 
-        # 解析命令行参数，将被指定的项填写到 _conf 变量中
-        args: Dict[str, Union[str, bool, None]]
-        args = vars(parser.parse_args(args=self.args))
-
-        for k, v in args.items():
-            if isinstance(v, bool):
-                config[k] = v
-                continue
-
-            # 空字符串视作 None
-            if v is None or v == '':
-                continue
-
-            parse_result = parse_env_as_type(v, config_schema[k].type)
-            if parse_result is None:
-                continue
-
-            config[k] = parse_result
+        _parser_cache[key] = parser
+        return parser
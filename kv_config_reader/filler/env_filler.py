@@ -3,15 +3,20 @@ __all__ = (
 )
 
 import os
-from typing import Mapping, MutableMapping, Optional
+from typing import Dict, Iterator, List, Mapping, MutableMapping, Optional
 
 from .base import *
 from .._util import *
 from ..predef import *
+from ..public_util import *
 
 
 class EnvFiller(IFiller):
-    """从环境变量中读取配置。"""
+    """
+    从环境变量中读取配置。
+    除了与配置同名的环境变量外，还支持多账号模式：形如 BUPT_SSO_USER_1、BUPT_SSO_PASS_1 的环境变量
+    按后缀（此处为 1）分组，每组表示一个账号。详见 iter_accounts。
+    """
 
     def __init__(self, env: Optional[Mapping[str, str]] = None):
         if env is None:
@@ -36,3 +41,66 @@ class EnvFiller(IFiller):
                 continue
 
             config[name] = parse_result
+
+    def iter_accounts(
+            self,
+            config_schema: Mapping[str, ConfigSchemaItem],
+            base_config: Optional[Mapping[str, Optional[SupportedConfigType]]] = None,
+    ) -> Iterator[Dict[str, Optional[SupportedConfigType]]]:
+        """
+        多账号模式：逐个生成由带后缀的环境变量表示的账号的配置。
+        后缀为数字时按数值排序，排在其它后缀之前；其它后缀按字典序排序。
+
+        环境变量只扫描一次，按后缀建立索引，因此耗时与环境变量个数成正比，而与账号数、配置项数的乘积无关。
+        后缀中不能含有下划线；与某个配置同名的环境变量不会被当作带后缀的环境变量。
+
+        :param config_schema: schema
+        :param base_config: 所有账号共用的配置；None 表示使用 schema 中的默认值，再填入与配置同名的环境变量
+        :return: 生成器，每个元素是一个账号的配置
+        """
+        if base_config is None:
+            base = initialize_config(config_schema)
+            self.fill(base, config_schema)
+        else:
+            base = dict(base_config)
+
+        index = self._build_suffix_index(config_schema)
+        for suffix in self._sort_suffixes(index):
+            config = dict(base)
+
+            for name, value_as_text in index[suffix].items():
+                if value_as_text == '':
+                    continue
+
+                parse_result = parse_env_as_type(value_as_text, config_schema[name].type)
+                if parse_result is None:
+                    continue
+
+                config[name] = parse_result
+
+            yield config
+
+    def _build_suffix_index(self, config_schema: Mapping[str, ConfigSchemaItem]) -> Dict[str, Dict[str, str]]:
+        """
+        扫描一次环境变量，将形如「配置名_后缀」的环境变量按后缀分组。
+        :param config_schema: schema
+        :return: dict，键为后缀，值为该后缀下 配置名 -> 环境变量值 的 dict
+        """
+        index: Dict[str, Dict[str, str]] = {}
+
+        for env_name, value_as_text in self.env.items():
+            if env_name in config_schema:
+                continue
+
+            name, sep, suffix = env_name.rpartition('_')
+            if sep == '' or suffix == '' or name not in config_schema:
+                continue
+
+            index.setdefault(suffix, {})[name] = value_as_text
+
+        return index
+
+    @staticmethod
+    def _sort_suffixes(index: Mapping[str, object]) -> List[str]:
+        """数字后缀按数值排在前面，其它后缀按字典序排在后面。"""
+        return sorted(index, key=lambda x: (0, int(x), '') if x.isdigit() else (1, 0, x))
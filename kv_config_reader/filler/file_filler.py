@@ -0,0 +1,132 @@
+__all__ = (
+    'FileFiller',
+)
+
+from abc import abstractmethod
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional
+
+from .base import *
+from .._util import *
+from ..predef import *
+
+
+class FileFiller(IFiller):
+    """
+    从配置文件中读取配置的 filler 的基类。
+
+    配置文件顶层的键值对是所有账号共用的配置；顶层中值为表（dict）的项是一个「节」，
+    通常每个节表示一个账号。指定 section 时，先填入顶层的配置，再用该节中的配置覆盖。
+    值为空字符串、类型错误的配置项不覆盖原值；schema 中不存在的配置项被忽略。
+
+    文件的解析结果按照「路径 + mtime + 文件大小」缓存，文件未改变时不会重复读取与解析。
+    """
+
+    def __init__(
+            self,
+            file_name: Optional[str] = None,
+            read_from_config: Optional[str] = None,
+            section: Optional[str] = None,
+    ):
+        """
+        :param file_name: 配置文件路径
+        :param read_from_config: 配置名；表示从 config 中该配置的值读取配置文件路径
+        :param section: 要读取的节名；None 表示只读取顶层配置
+        """
+        if file_name is None and read_from_config is None:
+            raise ValueError('file_name 与 read_from_config 必须填写一个')
+
+        self.file_name = file_name
+        self.read_from_config = read_from_config
+        self.section = section
+
+    @staticmethod
+    @abstractmethod
+    def parse(text: str) -> Dict[str, Any]:
+        """
+        将配置文件的内容解析为 dict。
+        :param text: 配置文件的内容
+        :return: dict，顶层的键为配置名或节名
+        """
+
+    def fill(
+            self,
+            config: MutableMapping[str, Optional[SupportedConfigType]],
+            config_schema: Mapping[str, ConfigSchemaItem],
+    ) -> None:
+        data = self._load(config)
+        if data is None:
+            return
+
+        self._fill_from(data, config, config_schema)
+
+        if self.section is not None:
+            self.fill_section(config, config_schema, self.section)
+
+    def fill_section(
+            self,
+            config: MutableMapping[str, Optional[SupportedConfigType]],
+            config_schema: Mapping[str, ConfigSchemaItem],
+            section: str,
+    ) -> None:
+        """
+        只将某一节中的配置填入 config，不填入顶层配置。
+        :param config: dict，为填写的目标
+        :param config_schema: schema
+        :param section: 节名
+        :return: None
+        """
+        data = self._load(config)
+        section_data = data.get(section) if data is not None else None
+        if not isinstance(section_data, dict):
+            raise ValueError(f'配置文件中没有名为 {section} 的节。')
+
+        self._fill_from(section_data, config, config_schema)
+
+    def sections(self, config: Optional[Mapping[str, Optional[SupportedConfigType]]] = None) -> List[str]:
+        """
+        列出配置文件中所有的节名（通常每个节表示一个账号），顺序与文件中一致。
+        :param config: 使用 read_from_config 时，从该 config 中读取配置文件路径
+        :return: 节名列表
+        """
+        data = self._load(config if config is not None else {})
+        if data is None:
+            return []
+
+        return [k for k, v in data.items() if isinstance(v, dict)]
+
+    def _load(self, config: Mapping[str, Optional[SupportedConfigType]]) -> Optional[Dict[str, Any]]:
+        """
+        读取配置文件（带缓存）。
+        :param config: 使用 read_from_config 时，从该 config 中读取配置文件路径
+        :return: 解析结果；未指定配置文件路径时返回 None
+        """
+        path = self.file_name
+        if path is None:
+            path_in_config = config.get(self.read_from_config or '')
+            if not isinstance(path_in_config, str) or path_in_config == '':
+                return None
+            path = path_in_config
+
+        data = load_file_cached(path, self.parse)
+        if not isinstance(data, dict):
+            raise ValueError(f'配置文件 {path} 的顶层不是键值对。')
+
+        return data
+
+    @staticmethod
+    def _fill_from(
+            data: Mapping[str, Any],
+            config: MutableMapping[str, Optional[SupportedConfigType]],
+            config_schema: Mapping[str, ConfigSchemaItem],
+    ) -> None:
+        """将 data 中属于 schema 的配置项解析后填入 config。"""
+        for name, schema_item in config_schema.items():
+            value = data.get(name)
+            if value is None or value == '':
+                continue
+
+            parse_result = parse_value_as_type(value, schema_item.type)
+            if parse_result is None:
+                continue
+
+            config[name] = parse_result
@@ -1,7 +1,27 @@
 __all__ = ('IniFiller',)
 
-from .base import IFiller
+from configparser import ConfigParser
+from typing import Any, Dict
 
+from .file_filler import FileFiller
 
-class IniFiller(IFiller):
-    pass
+
+class IniFiller(FileFiller):
+    """
+    从 INI 文件中读取配置。
+    [DEFAULT] 节中的配置视作顶层配置，其它节视作账号节。
+    """
+
+    @staticmethod
+    def parse(text: str) -> Dict[str, Any]:
+        parser = ConfigParser(interpolation=None, default_section='DEFAULT')
+        # 默认会把配置名转为小写，此处保持原样
+        parser.optionxform = str  # type: ignore
+        parser.read_string(text)
+
+        result: Dict[str, Any] = dict(parser.defaults())
+        for section in parser.sections():
+            # 节中的值包含从 [DEFAULT] 继承的值，与先填入顶层配置的结果一致
+            result[section] = dict(parser.items(section))
+
+        return result
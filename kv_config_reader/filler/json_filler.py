@@ -1,15 +1,15 @@
 __all__ = ('JsonFiller',)
 
-from typing import Optional
+import json
+from typing import Any, Dict
 
-from .base import IFiller
+from .file_filler import FileFiller
 
 
-class JsonFiller(IFiller):
+class JsonFiller(FileFiller):
+    """从 JSON 文件中读取配置。"""
 
-    def __init__(self, file_name: Optional[str] = None, read_from_config: Optional[str] = None):
-        if file_name is None and read_from_config is None:
-            raise ValueError('file_name 与 read_from_config 必须填写一个')
-
-        self.file_name = file_name
-        self.read_from_config = read_from_config
+    @staticmethod
+    def parse(text: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = json.loads(text)
+        return result
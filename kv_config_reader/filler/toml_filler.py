@@ -1,14 +1,26 @@
 __all__ = ('TomlFiller',)
 
-from typing import Optional
+import importlib
+from typing import Any, Dict
 
-from .base import IFiller
+from .file_filler import FileFiller
 
 
-class TomlFiller(IFiller):
-    def __init__(self, file_name: Optional[str], read_from_config: Optional[str]):
-        if file_name is None and read_from_config is None:
-            raise ValueError('file_name 与 read_from_config 必须填写一个')
+class TomlFiller(FileFiller):
+    """
+    从 TOML 文件中读取配置。
+    Python 3.11 以上使用标准库 tomllib；更早的版本需要安装 toml 库。
+    """
 
-        self.file_name = file_name
-        self.read_from_config = read_from_config
+    @staticmethod
+    def parse(text: str) -> Dict[str, Any]:
+        for module_name in ('tomllib', 'toml'):
+            try:
+                toml_module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+
+            result: Dict[str, Any] = toml_module.loads(text)
+            return result
+
+        raise RuntimeError('读取 TOML 配置文件需要 Python 3.11 以上版本，或安装 toml 库：pip install toml')
@@ -1,14 +1,20 @@
 __all__ = ('YamlFiller',)
 
-from typing import Optional
+import importlib
+from typing import Any, Dict
 
-from .base import IFiller
+from .file_filler import FileFiller
 
 
-class YamlFiller(IFiller):
-    def __init__(self, file_name: Optional[str], read_from_config: Optional[str]):
-        if file_name is None and read_from_config is None:
-            raise ValueError('file_name 与 read_from_config 必须填写一个')
+class YamlFiller(FileFiller):
+    """从 YAML 文件中读取配置。需要安装 PyYAML 库。"""
 
-        self.file_name = file_name
-        self.read_from_config = read_from_config
+    @staticmethod
+    def parse(text: str) -> Dict[str, Any]:
+        try:
+            yaml = importlib.import_module('yaml')
+        except ImportError:
+            raise RuntimeError('读取 YAML 配置文件需要安装 PyYAML 库：pip install pyyaml')
+
+        result: Dict[str, Any] = yaml.safe_load(text)
+        return result
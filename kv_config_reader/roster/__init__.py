@@ -0,0 +1 @@
+from .roster import *
@@ -0,0 +1,332 @@
+__all__ = (
+    'iter_roster',
+    'lookup_roster',
+)
+
+import csv
+import json
+import os
+import threading
+from typing import (
+    BinaryIO, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Type, TypeVar, Union,
+    cast, overload,
+)
+
+from .._util import *
+from ..compiler import *
+from ..predef import *
+from ..public_util import *
+
+_C = TypeVar('_C', bound=CompiledConfig)
+# 一个账号的配置：dict，或 config_class 的实例
+_AccountConfig = Union[Dict[str, Optional[SupportedConfigType]], CompiledConfig]
+
+# 文件扩展名与格式的对应关系
+_FORMATS = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.csv': 'csv',
+}
+
+
+@overload
+def iter_roster(
+        path: str,
+        config_schema: Mapping[str, ConfigSchemaItem],
+        base_config: Optional[Mapping[str, Optional[SupportedConfigType]]] = None,
+        on_error: Optional[Callable[[ValueError], None]] = None,
+) -> Iterator[Dict[str, Optional[SupportedConfigType]]]: ...
+
+
+@overload
+def iter_roster(
+        path: str,
+        config_schema: Mapping[str, ConfigSchemaItem],
+        base_config: Optional[Mapping[str, Optional[SupportedConfigType]]] = None,
+        on_error: Optional[Callable[[ValueError], None]] = None,
+        *,
+        config_class: Type[_C],
+) -> Iterator[_C]: ...
+
+
+def iter_roster(
+        path: str,
+        config_schema: Mapping[str, ConfigSchemaItem],
+        base_config: Optional[Mapping[str, Optional[SupportedConfigType]]] = None,
+        on_error: Optional[Callable[[ValueError], None]] = None,
+        *,
+        config_class: Optional[Type[CompiledConfig]] = None,
+) -> Iterator[_AccountConfig]:
+    """
+    从 JSONL 或 CSV 格式的账号列表文件中逐行读取配置。本函数是生成器，每次只读取一行，
+    因此无论文件多大，占用的内存都是常数。
+
+    每一行表示一个账号，以 base_config 为基础，用该行的值覆盖对应的配置。
+    该行的值会按照 schema 中的类型解析；与 filler 一致，空值和类型错误的值不覆盖原值。
+    出现 schema 中不存在的配置名、或某一行不是 JSON 对象时，抛出 ValueError；设置了 on_error 时改为调用它并跳过该行。
+
+    :param path: 文件路径；根据扩展名（.jsonl、.ndjson、.csv）决定格式
+    :param config_schema: schema
+    :param base_config: 所有账号共用的配置；None 表示使用 schema 中的默认值
+    :param on_error: 某一行无法解析时调用，参数为异常；None 表示抛出异常
+    :param config_class: 由 compile_schema 生成的类；设置后每个账号的配置直接由 base_config 的实例复制而来，不经过 dict
+    :return: 生成器，每个元素是一个账号的配置（dict，或 config_class 的实例）
+    """
+    file_format = _FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise ValueError(f'无法识别账号列表 {path} 的格式，扩展名必须是 {"、".join(_FORMATS)} 之一。')
+
+    base = _make_base(config_schema, base_config, config_class)
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows: Iterator[Tuple[object, str]]
+        if file_format == 'csv':
+            # csv 的行号从表头之后开始计算
+            rows = ((row, f'{path} 第 {line_no} 行') for line_no, row in enumerate(csv.DictReader(f), 2))
+        else:
+            rows = ((line, f'{path} 第 {line_no} 行') for line_no, line in enumerate(f, 1) if line.strip() != '')
+
+        for raw_row, where in rows:
+            try:
+                row = raw_row if file_format == 'csv' else _parse_jsonl_line(cast(str, raw_row), where)
+                config = _row_to_config(cast(Mapping[Optional[str], object], row), config_schema, base, where)
+            except ValueError as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+                continue
+
+            yield config
+
+
+def _decode_jsonl_line(line: bytes, where: str) -> str:
+    """解码以二进制模式读取的 JSONL 文件中的一行；该行不是有效的 UTF-8 时抛出 ValueError。"""
+    try:
+        return line.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise ValueError(f'{where}不是有效的 UTF-8：{e}')
+
+
+def _parse_jsonl_line(line: str, where: str) -> Mapping[Optional[str], object]:
+    """解析 JSONL 文件中的一行；该行不是 JSON 对象时抛出 ValueError。"""
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f'{where}不是有效的 JSON：{e}')
+    if not isinstance(row, dict):
+        raise ValueError(f'{where}不是 JSON 对象。')
+    return row
+
+
+class _RosterIndex(NamedTuple):
+    """账号列表文件的索引：某一列的值 -> 该行在文件中的字节偏移量。"""
+
+    mtime_ns: int
+    size: int
+    # CSV 的表头；JSONL 为 None
+    header: Optional[List[str]]
+    offsets: Dict[str, int]
+    # 建立索引时无法解析的行的错误信息；每次查找时都报告
+    errors: Tuple[str, ...]
+
+
+# 键为 (文件绝对路径, 列名)
+_index_cache: Dict[Tuple[str, str], _RosterIndex] = {}
+_index_cache_lock = threading.Lock()
+
+
+@overload
+def lookup_roster(
+        path: str,
+        config_schema: Mapping[str, ConfigSchemaItem],
+        key: str,
+        values: Iterable[str],
+        base_config: Optional[Mapping[str, Optional[SupportedConfigType]]] = None,
+        on_error: Optional[Callable[[ValueError], None]] = None,
+) -> Iterator[Dict[str, Optional[SupportedConfigType]]]: ...
+
+
+@overload
+def lookup_roster(
+        path: str,
+        config_schema: Mapping[str, ConfigSchemaItem],
+        key: str,
+        values: Iterable[str],
+        base_config: Optional[Mapping[str, Optional[SupportedConfigType]]] = None,
+        on_error: Optional[Callable[[ValueError], None]] = None,
+        *,
+        config_class: Type[_C],
+) -> Iterator[_C]: ...
+
+
+def lookup_roster(
+        path: str,
+        config_schema: Mapping[str, ConfigSchemaItem],
+        key: str,
+        values: Iterable[str],
+        base_config: Optional[Mapping[str, Optional[SupportedConfigType]]] = None,
+        on_error: Optional[Callable[[ValueError], None]] = None,
+        *,
+        config_class: Optional[Type[CompiledConfig]] = None,
+) -> Iterator[_AccountConfig]:
+    """
+    从账号列表文件中只读取 key 列的值在 values 中的行，如重跑模式下只读取失败的账号。
+
+    第一次查找某个文件时建立索引（key 列的值 -> 该行的字节偏移量），只解析 key 列，不生成各行的配置；
+    索引按照「路径 + mtime + 文件大小」缓存，文件未改变时之后的查找直接定位到各行，不再读取整个文件。
+    key 列的值与其它配置一样按照 schema 中的类型解析后再转为字符串，如 JSON 中的数字 2020 与 "2020" 相同。
+    同一个值出现在多行时只取第一行；文件中没有的值被忽略。
+    建立索引时无法解析的行（如不是有效的 JSON）与 iter_roster 一样处理：交给 on_error，或抛出 ValueError。
+
+    :param path: 文件路径；格式同 iter_roster
+    :param config_schema: schema
+    :param key: 用于查找的列，如账号
+    :param values: 要查找的值；按此顺序生成
+    :param base_config: 所有账号共用的配置；None 表示使用 schema 中的默认值
+    :param on_error: 某一行无法解析时调用，参数为异常；None 表示抛出异常
+    :param config_class: 同 iter_roster
+    :return: 生成器，每个元素是一个账号的配置
+    """
+    file_format = _FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise ValueError(f'无法识别账号列表 {path} 的格式，扩展名必须是 {"、".join(_FORMATS)} 之一。')
+
+    base = _make_base(config_schema, base_config, config_class)
+
+    index = _get_index(path, file_format, key, config_schema[key].type if key in config_schema else str)
+    for message in index.errors:
+        error = ValueError(message)
+        if on_error is None:
+            raise error
+        on_error(error)
+
+    with open(path, 'rb') as f:
+        for value in values:
+            offset = index.offsets.get(value)
+            if offset is None:
+                continue
+
+            f.seek(offset)
+            where = f'{path} 中 {key} 为 {value} 的行'
+            row: Mapping[Optional[str], object]
+            try:
+                if index.header is not None:
+                    row = next(csv.DictReader(_decode_lines(f), fieldnames=index.header))
+                else:
+                    row = _parse_jsonl_line(_decode_jsonl_line(f.readline(), where), where)
+                config = _row_to_config(row, config_schema, base, where)
+            except ValueError as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+                continue
+
+            yield config
+
+
+def _get_index(path: str, file_format: str, key: str, key_type: Type[SupportedConfigType]) -> _RosterIndex:
+    """取出账号列表文件的索引；文件改变时重建。key_type 为 key 列在 schema 中的类型。"""
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+
+    with _index_cache_lock:
+        cached = _index_cache.get((abs_path, key))
+    if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+        return cached
+
+    header: Optional[List[str]] = None
+    offsets: Dict[str, int] = {}
+    errors: List[str] = []
+
+    def add(value: object, offset: int) -> None:
+        # 与 _row_to_config 相同地解析 key 列的值；空值和无法解析的值不建立索引
+        parsed = None if value is None or value == '' else parse_value_as_type(value, key_type)
+        if parsed is not None:
+            offsets.setdefault(str(parsed), offset)
+
+    with open(abs_path, 'rb') as f:
+        if file_format == 'csv':
+            # csv 模块每次只从 f 中取出一条记录所需的行，因此取出一条记录前 f 的位置就是该记录的偏移量。
+            # 无效的 UTF-8 在查找该行时才报告
+            reader = csv.reader(_decode_lines(f, errors='replace'))
+            header = next(reader, [])
+            column = header.index(key) if key in header else None
+            while column is not None:
+                offset = f.tell()
+                row = next(reader, None)
+                if row is None:
+                    break
+                if column < len(row):
+                    add(row[column], offset)
+        else:
+            offset = 0
+            for line_no, line in enumerate(f, 1):
+                if line.strip() != b'':
+                    where = f'{path} 第 {line_no} 行'
+                    try:
+                        add(_parse_jsonl_line(_decode_jsonl_line(line, where), where).get(key), offset)
+                    except ValueError as e:
+                        errors.append(str(e))
+                offset += len(line)
+
+    index = _RosterIndex(stat.st_mtime_ns, stat.st_size, header, offsets, tuple(errors))
+    with _index_cache_lock:
+        _index_cache[(abs_path, key)] = index
+    return index
+
+
+def _decode_lines(f: BinaryIO, errors: str = 'strict') -> Iterator[str]:
+    """逐行读取以二进制模式打开的文件并解码；用 readline 而不是迭代 f，使 f.tell() 始终准确。"""
+    while True:
+        line = f.readline()
+        if line == b'':
+            return
+        yield line.decode('utf-8', errors)
+
+
+def _make_base(
+        config_schema: Mapping[str, ConfigSchemaItem],
+        base_config: Optional[Mapping[str, Optional[SupportedConfigType]]],
+        config_class: Optional[Type[CompiledConfig]],
+) -> _AccountConfig:
+    """生成各账号共用的配置：dict，或 config_class 的实例。"""
+    if base_config is None:
+        base_config = initialize_config(config_schema)
+    if config_class is None:
+        return dict(base_config)
+    return config_class.from_mapping(base_config)
+
+
+def _row_to_config(
+        row: Mapping[Optional[str], object],
+        config_schema: Mapping[str, ConfigSchemaItem],
+        base: _AccountConfig,
+        where: str,
+) -> _AccountConfig:
+    """
+    将一行数据按照 schema 解析，覆盖到 base 的副本上。
+    :param row: 一行数据，键为配置名
+    :param config_schema: schema
+    :param base: 所有账号共用的配置；见 _make_base
+    :param where: 该行的位置，用于生成错误信息
+    :return: 该账号的配置，与 base 的类型相同
+    """
+    changes: Dict[str, Optional[SupportedConfigType]] = {}
+
+    for name, value in row.items():
+        if name is None or name not in config_schema:
+            raise ValueError(f'{where}：配置 {name} 不存在。')
+        schema_item = config_schema[name]
+
+        if value is None or value == '':
+            continue
+
+        parse_result = parse_value_as_type(value, schema_item.type)
+        if parse_result is None:
+            continue
+
+        changes[name] = parse_result
+
+    if isinstance(base, CompiledConfig):
+        return base.replace(**changes)
+    return {**base, **changes}
@@ -1,13 +1,39 @@
 __all__ = (
     'main',
+    'fan_out',
 )
 
-from typing import Dict, List, Optional, cast
+import base64
+import contextlib
+import datetime
+import functools
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Type, cast
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 
-from bupt_ncov_report import *
-from kv_config_reader import *
+import kv_config_reader
+from bupt_ncov_report import (
+    HEADERS, PHASE, ConfigValue, DataChecker, DnsCache, DnsCachingAdapter, INotifier, IRecorder, LayoutCache, LruCache,
+    Program, ProgramConfig, ProgramUtils, PureUtils, RetryPolicy, RunOutcome, SessionPool, ShardSpec, TimeWindow,
+    beijing_date, beijing_now, load_rules, preconnect,
+)
+from kv_config_reader import (
+    CmdArgsFiller, ConfigSchemaItem, EnvFiller, FileFiller, IFiller, compile_schema, initialize_config,
+)
+
+if TYPE_CHECKING:
+    from bupt_ncov_report import Metrics, MetricsServer, ResultHistory, StatusTable, WorkQueue
+
+# 挂在 bupt_ncov_report 的 logger 之下，与 Program 的日志输出到同一处
+logger = logging.getLogger('bupt_ncov_report.main')
 
 # 该变量用于给每一个设置项生成文档。
 # 如果您无法设置环境变量、命令行参数，可以在此处指定默认值；详情参考文档。
@@ -44,6 +70,18 @@ CONFIG_SCHEMA: Dict[str, ConfigSchemaItem] = {
         default=None,
         type=str,
     ),
+    'BNR_LOG_MAX_BYTES': ConfigSchemaItem(
+        description='（可选）设置后启用日志轮换：日志文件超过该大小（字节）或跨日时轮换，旧文件在后台压缩为 .gz',
+        for_short='字节数',
+        default=None,
+        type=int,
+    ),
+    'BNR_LOG_BACKUP_COUNT': ConfigSchemaItem(
+        description='（可选）日志轮换时最多保留的压缩文件个数',
+        for_short='个数',
+        default=7,
+        type=int,
+    ),
     'STOP_WHEN_SICK': ConfigSchemaItem(
         description='（可选）当检测到您上报的数据表明您为疑似病患时（如体温>=37°C、接触过确诊人群等），'
                     '若您开启了此选项，将停止自动上报，以防止您连续多日上报异常数据。',
@@ -57,15 +95,212 @@ CONFIG_SCHEMA: Dict[str, ConfigSchemaItem] = {
         default=None,
         type=str,
     ),
+    'BNR_CONFIG_PATH': ConfigSchemaItem(
+        description='（可选）配置文件（JSON、TOML、YAML 或 INI）的路径。配置文件的优先级低于环境变量与命令行参数；'
+                    '文件中的每一节表示一个账号',
+        for_short='路径',
+        default=None,
+        type=str,
+    ),
+    'BNR_ROSTER_PATH': ConfigSchemaItem(
+        description='（可选）账号列表文件（JSONL 或 CSV）的路径。设置后将依次为文件中的每个账号上报，'
+                    '文件中每一行的配置覆盖其它方式提供的配置',
+        for_short='路径',
+        default=None,
+        type=str,
+    ),
+    'BNR_MULTI_ENV': ConfigSchemaItem(
+        description='（可选）多账号环境变量模式：形如 BUPT_SSO_USER_1、BUPT_SSO_PASS_1 的环境变量按后缀分组，'
+                    '每组表示一个账号',
+        for_short='',
+        default=False,
+        type=bool,
+    ),
+    'BNR_HISTORY_PATH': ConfigSchemaItem(
+        description='（可选）运行结果历史（SQLite 数据库）的存放路径，未设置则不保存历史。RERUN_FAILED 需要此配置',
+        for_short='路径',
+        default=None,
+        type=str,
+    ),
+    'BNR_RESULT_LOG_PATH': ConfigSchemaItem(
+        description='（可选）结构化运行结果（JSON Lines）的存放路径，实际的文件名中会插入日期，未设置则不保存',
+        for_short='路径',
+        default=None,
+        type=str,
+    ),
+    'BNR_RESULT_HASH_KEY': ConfigSchemaItem(
+        description='（可选）结构化运行结果中账号摘要的密钥（HMAC-SHA256）。'
+                    '未设置时摘要没有密钥，可被逐个尝试学号还原，只能算假名',
+        for_short='密钥',
+        default=None,
+        type=str,
+    ),
+    'BNR_RULES_PATH': ConfigSchemaItem(
+        description='（可选）上报数据检查规则（JSON）的路径，未设置则使用内置规则。用于 STOP_WHEN_SICK 功能',
+        for_short='路径',
+        default=None,
+        type=str,
+    ),
+    'BNR_PRELOGIN_WINDOW': ConfigSchemaItem(
+        description='（可选）预先登录的时间段（北京时间），形如 06:30-06:55。在该时间段内运行时，只登录各账号并保留登录后的会话，'
+                    '之后运行时直接上报，跳过登录',
+        for_short='时间段',
+        default=None,
+        type=str,
+    ),
+    'BNR_PRELOGIN_WAIT': ConfigSchemaItem(
+        description='（可选）与 BNR_PRELOGIN_WINDOW 一同使用：预先登录后不退出，等到时间段结束时直接上报。直接运行时必须设置',
+        for_short='',
+        default=False,
+        type=bool,
+    ),
+    'BNR_SESSION_TTL': ConfigSchemaItem(
+        description='（可选）预先登录的会话的有效时间（秒），超过后上报时重新登录',
+        for_short='秒数',
+        default=1800,
+        type=int,
+    ),
+    'BNR_PRECONNECT': ConfigSchemaItem(
+        description='（可选）开始上报前，为上报网站与通知平台各预先建立多少个连接（包括 TLS 握手），并缓存其 DNS 解析结果；'
+                    '0 表示不预先建立',
+        for_short='个数',
+        default=0,
+        type=int,
+    ),
+    'BNR_DNS_TTL': ConfigSchemaItem(
+        description='（可选）与 BNR_PRECONNECT 一同使用：DNS 解析结果的缓存时间（秒）',
+        for_short='秒数',
+        default=300,
+        type=int,
+    ),
+    'BNR_DEADLINE': ConfigSchemaItem(
+        description='（可选）每个账号一次运行（含重试与发送通知）的总时限（秒）；超出时不再重试，状态码为 2',
+        for_short='秒数',
+        default=120,
+        type=int,
+    ),
+    'BNR_FANOUT_WORKERS': ConfigSchemaItem(
+        description='（可选）扇出模式（入口函数 fan_out）下同时上报的账号数',
+        for_short='个数',
+        default=8,
+        type=int,
+    ),
+    'BNR_FANOUT_TIME_LIMIT': ConfigSchemaItem(
+        description='（可选）扇出模式下，平台不提供剩余时间（如 GCP Cloud Function）时，一次调用的时限（秒），应与平台设置的超时时间一致',
+        for_short='秒数',
+        default=60,
+        type=int,
+    ),
+    'BNR_SHARD_INDEX': ConfigSchemaItem(
+        description='（可选）多台机器分担账号时，本机负责的分片编号（从 0 开始）；须与 BNR_SHARD_COUNT 同时设置',
+        for_short='编号',
+        default=None,
+        type=int,
+    ),
+    'BNR_SHARD_COUNT': ConfigSchemaItem(
+        description='（可选）多台机器分担账号时的分片总数，各机器须设置相同的值。账号按 BUPT_SSO_USER 的一致性哈希分配到各分片',
+        for_short='个数',
+        default=None,
+        type=int,
+    ),
+    'BNR_PROCESS_WORKERS': ConfigSchemaItem(
+        description='（可选）在多少个预先启动的工作进程中上报各账号；一个账号使工作进程崩溃或卡住时，不影响其它账号。0 表示不使用工作进程',
+        for_short='个数',
+        default=0,
+        type=int,
+    ),
+    'BNR_PROCESS_MAX_TASKS': ConfigSchemaItem(
+        description='（可选）与 BNR_PROCESS_WORKERS 一同使用：每个工作进程上报多少个账号后，换用新的工作进程',
+        for_short='个数',
+        default=100,
+        type=int,
+    ),
+    'BNR_PROCESS_MAX_RSS_MB': ConfigSchemaItem(
+        description='（可选）与 BNR_PROCESS_WORKERS 一同使用：工作进程占用内存超过多少 MiB 后，换用新的工作进程',
+        for_short='MiB',
+        default=256,
+        type=int,
+    ),
+    'BNR_STATUS_SHM': ConfigSchemaItem(
+        description='（可选）设置后，在以该名字命名的共享内存中实时保存各账号的状态（排队、登录、获取、提交、完成、失败），'
+                    '可用 python -m bupt_ncov_report.status_table 名字 查看进度。需要 Python 3.8 以上',
+        for_short='名字',
+        default=None,
+        type=str,
+    ),
+    'BNR_METRICS_PORT': ConfigSchemaItem(
+        description='（可选）设置后，在该端口上提供运行指标的 HTTP 服务：/healthz、/metrics（Prometheus 格式）与 /status',
+        for_short='端口',
+        default=None,
+        type=int,
+    ),
+    'BNR_METRICS_HOST': ConfigSchemaItem(
+        description='（可选）与 BNR_METRICS_PORT 一同使用：运行指标服务监听的地址',
+        for_short='地址',
+        default='127.0.0.1',
+        type=str,
+    ),
+    'BNR_QUEUE_PATH': ConfigSchemaItem(
+        description='（可选）任务队列（SQLite 数据库）的路径；多个进程可以共用同一个队列。与 BNR_QUEUE_MODE 一同使用',
+        for_short='路径',
+        default=None,
+        type=str,
+    ),
+    'BNR_QUEUE_MODE': ConfigSchemaItem(
+        description='（可选）任务队列模式：enqueue 表示把账号放入队列后退出；worker 表示从队列中逐个领取账号并上报，直到队列为空',
+        for_short='模式',
+        default=None,
+        type=str,
+    ),
+    'BNR_QUEUE_VISIBILITY_TIMEOUT': ConfigSchemaItem(
+        description='（可选）任务队列中，领取一个账号后的租约时长（秒），应大于 BNR_DEADLINE；'
+                    '领取它的进程崩溃时，租约到期后该账号回到队列',
+        for_short='秒数',
+        default=300,
+        type=int,
+    ),
+    'BNR_QUEUE_MAX_ATTEMPTS': ConfigSchemaItem(
+        description='（可选）任务队列中，每个账号最多被领取的次数，超过后转入死信',
+        for_short='次数',
+        default=3,
+        type=int,
+    ),
+    'RERUN_FAILED': ConfigSchemaItem(
+        description='（可选）只重新运行历史中最近一次运行失败的账号，并在失败时按重试策略重试。',
+        for_short='',
+        default=False,
+        type=bool,
+    ),
+    'RERUN_SINCE': ConfigSchemaItem(
+        description='（可选）与 RERUN_FAILED 一同使用，只重新运行该日期（含）之后失败的账号，格式如 2020-06-19',
+        for_short='日期',
+        default=None,
+        type=str,
+    ),
 }
 PROGRAM_DESC = '自动填写北邮「疫情防控通」的每日上报信息。'
 
 
-def fill_config(config: Dict[str, Optional[ConfigValue]]) -> None:
+# 由 CONFIG_SCHEMA 编译出的单个账号的配置类；每个账号的配置都是该类的实例，运行前用 validate 检查一次（见 ProgramConfig）
+AccountConfig = compile_schema(CONFIG_SCHEMA, class_name='AccountConfig', base=ProgramConfig)
+
+
+# 配置文件扩展名与 filler 类名的对应关系；只有用到的 filler 才会被导入
+FILE_FILLERS: Dict[str, str] = {
+    '.json': 'JsonFiller',
+    '.toml': 'TomlFiller',
+    '.yaml': 'YamlFiller',
+    '.yml': 'YamlFiller',
+    '.ini': 'IniFiller',
+}
+
+
+def fill_config(config: Dict[str, Optional[ConfigValue]]) -> Optional[FileFiller]:
     """
-    往 _conf 中按照 env、cmdargs 的顺序填入配置值。
+    往 _conf 中按照 配置文件、env、cmdargs 的顺序填入配置值。
+    配置文件的路径（BNR_CONFIG_PATH）本身来自 env 或 cmdargs，因此在读取配置文件后会再填入一次 env、cmdargs。
     :param config: dict 对象
-    :return: None
+    :return: 配置文件的 filler；未设置 BNR_CONFIG_PATH 时返回 None
     """
 
     fillers: List[IFiller] = [
@@ -76,61 +311,971 @@ def fill_config(config: Dict[str, Optional[ConfigValue]]) -> None:
     for filler in fillers:
         filler.fill(config, CONFIG_SCHEMA)
 
+    config_path = cast(Optional[str], config['BNR_CONFIG_PATH'])
+    if not config_path:
+        return None
+
+    filler_name = FILE_FILLERS.get(os.path.splitext(config_path)[1].lower())
+    if filler_name is None:
+        raise ValueError(f'无法识别配置文件 {config_path} 的格式，扩展名必须是 {"、".join(FILE_FILLERS)} 之一。')
+
+    filler_class = cast(Type[FileFiller], getattr(kv_config_reader, filler_name))
+    file_filler = filler_class(file_name=config_path)
+    for filler in [file_filler, *fillers]:
+        filler.fill(config, CONFIG_SCHEMA)
+
+    return file_filler
+
 
-def initialize_notifier(config: Dict[str, Optional[ConfigValue]]) -> List[INotifier]:
+def initialize_notifier(
+        config: ProgramConfig,
+        session: Optional[requests.Session] = None,
+) -> List[INotifier]:
     """
     初始化 Notifier 对象，用于实现运行结果通知用户的功能。
-    :param config: 通过 kv_config_reader 获取到的配置
+    :param config: 该账号的配置；须已经通过 validate 检查
+    :param session: notifier 共用的 Session；None 表示每个 notifier 各自新建
     :return: list，元素是 INotifier 的子类
     """
     res: List[INotifier] = []
 
-    # 检查两个 Telegram 参数是否未同时填写
-    if bool(config['TG_BOT_TOKEN']) != bool(config['TG_CHAT_ID']):
-        raise ValueError('TG_BOT_TOKEN 与 TG_CHAT_ID 必须同时填写。')
-
     # 若两个 Telegram 参数都填写了，则初始化 Telegram 通知器
-    if config['TG_BOT_TOKEN'] and config['TG_CHAT_ID']:
+    if config.TG_BOT_TOKEN and config.TG_CHAT_ID:
+        # notifier 只在配置了对应平台时才导入
+        from bupt_ncov_report import TelegramNotifier
+
         res.append(TelegramNotifier(
-            token=cast(str, config['TG_BOT_TOKEN']),
-            chat_id=cast(str, config['TG_CHAT_ID']),
-            session=requests.Session(),
+            token=config.TG_BOT_TOKEN,
+            chat_id=config.TG_CHAT_ID,
+            session=session or requests.Session(),
         ))
 
     # 如果填写了 SCKEY，就初始化 Server 酱通知器
-    if config['SERVER_CHAN_SCKEY']:
+    if config.SERVER_CHAN_SCKEY:
+        from bupt_ncov_report import ServerChanNotifier
+
         res.append(ServerChanNotifier(
-            sckey=cast(str, config['SERVER_CHAN_SCKEY']),
-            sess=requests.Session(),
+            sckey=config.SERVER_CHAN_SCKEY,
+            sess=session or requests.Session(),
         ))
 
     return res
 
 
-def main(*wtf: object, **kwwtf: object) -> object:
+def initialize_history(config: Dict[str, Optional[ConfigValue]]) -> Optional['ResultHistory']:
     """
-    入口函数。该函数用于在允许直接运行的同时，兼容 GCP Cloud Function/AWS Lambda 等云函数平台。
-    :return: 由检测到的平台决定
+    初始化运行结果历史，用于 RERUN_FAILED 功能。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :return: ResultHistory；未配置 BNR_HISTORY_PATH 时返回 None
     """
+    if config['RERUN_SINCE'] is not None:
+        # 检查日期格式，格式错误时抛出 ValueError
+        datetime.datetime.strptime(cast(str, config['RERUN_SINCE']), '%Y-%m-%d')
 
-    config: Dict[str, Optional[ConfigValue]] = initialize_config(CONFIG_SCHEMA)
-    fill_config(config)
+    if not config['BNR_HISTORY_PATH']:
+        if config['RERUN_FAILED']:
+            raise ValueError('使用 RERUN_FAILED 时必须设置 BNR_HISTORY_PATH。')
+        return None
+
+    from bupt_ncov_report import ResultHistory
+
+    return ResultHistory(cast(str, config['BNR_HISTORY_PATH']))
+
+
+def get_shard_spec(config: Mapping[str, Optional[ConfigValue]]) -> Optional[ShardSpec]:
+    """
+    读取本机负责的分片。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :return: ShardSpec；未设置分片时返回 None
+    """
+    index, count = config['BNR_SHARD_INDEX'], config['BNR_SHARD_COUNT']
+    if (index is None) != (count is None):
+        raise ValueError('BNR_SHARD_INDEX 与 BNR_SHARD_COUNT 必须同时设置。')
+    if index is None:
+        return None
+
+    return ShardSpec(cast(int, index), cast(int, count)).validate()
+
+
+def report_bad_row(error: ValueError) -> None:
+    """账号列表中的某一行无法解析时，打印原因；该行被跳过，不影响其它账号。"""
+    print(f'跳过账号列表中无法解析的一行：{error}')
+
+
+def iter_accounts(
+        config: Dict[str, Optional[ConfigValue]],
+        file_filler: Optional[FileFiller],
+        on_error: Callable[[ValueError], None] = report_bad_row,
+) -> Iterator[ProgramConfig]:
+    """
+    逐个生成要上报的账号的配置。设置了分片（BNR_SHARD_INDEX、BNR_SHARD_COUNT）时，只生成本机负责的账号。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param file_filler: 配置文件的 filler
+    :param on_error: 账号列表中的某一行无法解析时调用，之后跳过该行
+    :return: 生成器，每个元素是一个账号的配置
+    """
+    shard = get_shard_spec(config)
+    for account in iter_all_accounts(config, file_filler, on_error):
+        if shard is None or shard.owns(account.BUPT_SSO_USER):
+            yield account
+
+
+def iter_all_accounts(
+        config: Dict[str, Optional[ConfigValue]],
+        file_filler: Optional[FileFiller],
+        on_error: Callable[[ValueError], None] = report_bad_row,
+) -> Iterator[ProgramConfig]:
+    """
+    逐个生成所有账号的配置（AccountConfig 的实例）。
+    设置了 BNR_ROSTER_PATH 时，从账号列表文件中流式读取（以 config 为共用配置）；
+    开启了 BNR_MULTI_ENV 时，每组带后缀的环境变量是一个账号（以 config 为共用配置）；
+    否则，若配置文件中有节，则每一节是一个账号（以 config 为共用配置）；否则只有 config 这一个账号。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param file_filler: 配置文件的 filler
+    :param on_error: 账号列表中的某一行无法解析时调用，之后跳过该行
+    :return: 生成器，每个元素是一个账号的配置
+    """
+    if config['BNR_ROSTER_PATH']:
+        from kv_config_reader import iter_roster
+
+        # 每一行直接生成 AccountConfig 的实例，不经过 dict
+        yield from iter_roster(
+            cast(str, config['BNR_ROSTER_PATH']), CONFIG_SCHEMA, base_config=config, on_error=on_error,
+            config_class=AccountConfig)
+        return
+
+    if config['BNR_MULTI_ENV']:
+        for account in EnvFiller().iter_accounts(CONFIG_SCHEMA, base_config=config):
+            yield AccountConfig.from_mapping(account)
+        return
+
+    sections = file_filler.sections() if file_filler is not None else []
+    if len(sections) == 0:
+        yield AccountConfig.from_mapping(config)
+        return
+
+    for section in sections:
+        account = dict(config)
+        cast(FileFiller, file_filler).fill_section(account, CONFIG_SCHEMA, section)
+        yield AccountConfig.from_mapping(account)
+
+
+class WarmCache:
+    """
+    云函数平台会复用容器，多次调用 main 时模块级变量会被保留。
+    本类保存可以跨调用复用的对象：各账号的 Session（复用 keep-alive 连接）、预先登录的 Session、notifier、
+    ProgramUtils（含已知的上报页面结构）、运行结果历史与运行指标服务。
+    配置改变时，整个缓存失效并重建。
+    """
+
+    # 最多保留的账号 Session 数与 notifier 组数
+    MAX_SESSIONS = 64
+    # 最多保留的预先登录的 Session 数；池满后其余账号不预先登录，见 prelogin_accounts。
+    # 每个 Session 保存 cookie 等状态，约占几 KiB 内存（连接池由所有 Session 共用，不计在内）
+    MAX_PRELOGIN_SESSIONS = 512
+
+    def __init__(self, config: Dict[str, Optional[ConfigValue]], with_metrics: bool = True):
+        """
+        :param config: 通过 kv_config_reader 获取到的配置（所有账号共用的部分）
+        :param with_metrics: 设置了 BNR_METRICS_PORT 时，是否建立运行指标并启动其 HTTP 服务；
+            工作进程中为 False，端口由主进程占用，指标也由主进程记录（见 run_in_process_pool）
+        """
+        self.fingerprint = self.make_fingerprint(config)
+        self.with_metrics = with_metrics
+
+        pure_utils = PureUtils()
+        data_checker = None
+        if config['BNR_RULES_PATH']:
+            data_checker = DataChecker(load_rules(cast(str, config['BNR_RULES_PATH'])), pure_utils)
+        self.program_utils = ProgramUtils(pure_utils, LayoutCache(), data_checker)
+        self.history = initialize_history(config)
+        self.recorders: List[IRecorder] = [self.history] if self.history is not None else []
+        if config['BNR_RESULT_LOG_PATH']:
+            from bupt_ncov_report import JsonlResultSink
+            self.recorders.append(JsonlResultSink(
+                cast(str, config['BNR_RESULT_LOG_PATH']),
+                hash_key=cast(Optional[str], config['BNR_RESULT_HASH_KEY']),
+            ))
+
+        # 运行指标及其 HTTP 服务；服务在后台线程中运行，跨调用保留
+        self.metrics: Optional['Metrics'] = None
+        self.metrics_server: Optional['MetricsServer'] = None
+        if with_metrics and config['BNR_METRICS_PORT'] is not None:
+            from bupt_ncov_report import Metrics, MetricsServer
+            self.metrics = Metrics()
+            self.recorders.append(self.metrics)
+            self.metrics_server = MetricsServer(
+                self.metrics, cast(str, config['BNR_METRICS_HOST']), cast(int, config['BNR_METRICS_PORT']))
+            self.metrics_server.start()
+
+        # 预先建立连接时使用的 DNS 缓存；只对下面的共用 adapter 生效，见 preconnect
+        self.preconnect_count = cast(int, config['BNR_PRECONNECT'])
+        self.dns_cache: Optional[DnsCache] = None
+
+        # 每个账号使用各自的 Session，以免 cookie 互相干扰；notifier 共用一个 Session。
+        # 所有 Session 共用同一个 HTTPAdapter，即共用同一个连接池，预先建立的连接对所有账号可用
+        self.adapter: HTTPAdapter
+        if self.preconnect_count > 0:
+            self.dns_cache = DnsCache(cast(int, config['BNR_DNS_TTL']))
+            # 连接池至少能容纳预先建立的连接
+            self.adapter = DnsCachingAdapter(
+                self.dns_cache, pool_maxsize=max(DEFAULT_POOLSIZE, self.preconnect_count))
+        else:
+            self.adapter = HTTPAdapter()
+        self.notifier_session = self.new_session()
+        self._sessions: LruCache[str, requests.Session] = LruCache(self.MAX_SESSIONS, on_evict=self.close_session)
+        self._notifiers: LruCache[Tuple[Optional[ConfigValue], ...], List[INotifier]] = LruCache(self.MAX_SESSIONS)
+
+        # 预先登录的 Session；见 prelogin_accounts
+        self.prelogin_window: Optional[TimeWindow] = None
+        if config['BNR_PRELOGIN_WINDOW']:
+            self.prelogin_window = TimeWindow.parse(cast(str, config['BNR_PRELOGIN_WINDOW']))
+        self.prelogin_pool: SessionPool[requests.Session] = SessionPool(
+            self.MAX_PRELOGIN_SESSIONS,
+            cast(int, config['BNR_SESSION_TTL']),
+            on_evict=self.close_session,
+        )
+
+    @staticmethod
+    def make_fingerprint(config: Mapping[str, Optional[ConfigValue]]) -> Tuple[Tuple[str, str], ...]:
+        """生成配置的指纹；指纹不同表示配置改变了。"""
+        return tuple(sorted((k, repr(v)) for k, v in config.items()))
+
+    def new_session(self) -> requests.Session:
+        """新建一个使用共用连接池的 Session。"""
+        session = requests.Session()
+        session.mount('https://', self.adapter)
+        return session
+
+    def close_session(self, session: requests.Session) -> None:
+        """关闭 Session，但不关闭共用的连接池。"""
+        for adapter in session.adapters.values():
+            if adapter is not self.adapter:
+                adapter.close()
+
+    def session_for(self, user: str) -> requests.Session:
+        """取出某账号的 Session；不存在时新建。"""
+        return self._sessions.get_or_create(user, self.new_session)
+
+    def preconnect(self, config: Mapping[str, Optional[ConfigValue]]) -> int:
+        """
+        为上报网站与 config 中配置了的通知平台预先建立连接，并缓存其 DNS 解析结果；未设置 BNR_PRECONNECT 时不做任何事。
+        :param config: 通过 kv_config_reader 获取到的配置
+        :return: 预先建立（或确认可用）的连接数
+        """
+        if self.dns_cache is None:
+            return 0
+
+        origins = [HEADERS.ORIGIN_BUPTAPP]
+        if config['TG_BOT_TOKEN']:
+            from bupt_ncov_report import TelegramNotifier
+            origins.append(TelegramNotifier.API_ORIGIN)
+        if config['SERVER_CHAN_SCKEY']:
+            from bupt_ncov_report import ServerChanNotifier
+            origins.append(ServerChanNotifier.API_ORIGIN)
+
+        self.dns_cache.add_hosts(cast(str, urlsplit(origin).hostname) for origin in origins)
+        return preconnect(self.notifier_session, origins, self.preconnect_count)
+
+    def notifiers_for(self, config: ProgramConfig) -> List[INotifier]:
+        """取出与该账号的通知配置对应的 notifier；不存在时新建。"""
+        key = (config.TG_BOT_TOKEN, config.TG_CHAT_ID, config.SERVER_CHAN_SCKEY)
+        return self._notifiers.get_or_create(key, lambda: initialize_notifier(config, self.notifier_session))
+
+    def close(self) -> None:
+        self._sessions.clear()
+        self.prelogin_pool.clear()
+        self._notifiers.clear()
+        self.notifier_session.close()
+        self.adapter.close()
+        for recorder in self.recorders:
+            recorder.flush()
+        if self.history is not None:
+            self.history.close()
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+
+
+# 跨调用保留的缓存；见 WarmCache
+_warm_cache: Optional[WarmCache] = None
+
+
+def get_warm_cache(config: Dict[str, Optional[ConfigValue]], with_metrics: bool = True) -> WarmCache:
+    """
+    取出跨调用保留的缓存。第一次调用或配置改变时重建缓存。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param with_metrics: 见 WarmCache
+    :return: WarmCache
+    """
+    global _warm_cache
+
+    if (
+            _warm_cache is None
+            or _warm_cache.fingerprint != WarmCache.make_fingerprint(config)
+            or _warm_cache.with_metrics != with_metrics
+    ):
+        if _warm_cache is not None:
+            _warm_cache.close()
+        _warm_cache = WarmCache(config, with_metrics)
+
+    return _warm_cache
+
+
+def prelogin_accounts(
+        config: Dict[str, Optional[ConfigValue]],
+        file_filler: Optional[FileFiller],
+        warm_cache: WarmCache,
+) -> int:
+    """
+    预先登录各账号，把登录后的 Session 放进 warm_cache.prelogin_pool；之后上报时直接取出，跳过登录。
+    登录失败的账号不放进池中，上报时会正常登录。
+    池满（WarmCache.MAX_PRELOGIN_SESSIONS 个）后停止：再登录的 Session 只会把先放入的淘汰掉，白白多登录一次。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param file_filler: 配置文件的 filler
+    :param warm_cache: 提供 ProgramUtils 与 Session 池
+    :return: 成功登录的账号数
+    """
+    warm_cache.prelogin_pool.prune()
+
+    count = 0
+    for account in iter_accounts(config, file_filler):
+        user = account.BUPT_SSO_USER
+        if warm_cache.prelogin_pool.full():
+            print(f'预先登录的会话数达到上限（{warm_cache.prelogin_pool.maxsize} 个），其余账号上报时再登录')
+            break
+
+        session = warm_cache.new_session()
+        try:
+            program = Program(
+                config=account.validate(),
+                program_utils=warm_cache.program_utils,
+                session=session,
+                notifiers=[],
+            )
+            program.login()
+        except Exception as e:
+            print(f'账号 {user} 预先登录失败，上报时将重新登录：{type(e).__name__}: {e}')
+            warm_cache.close_session(session)
+            continue
+
+        warm_cache.prelogin_pool.put(user, session)
+        count += 1
+
+    return count
+
+
+def run_account(
+        config: ProgramConfig,
+        warm_cache: WarmCache,
+        retry_policy: Optional[RetryPolicy],
+        on_phase: Optional[Callable[[str], None]] = None,
+) -> int:
+    """
+    为一个账号建立 Program 实例并运行。
+    该账号有预先登录且未过期的 Session 时，使用该 Session 并跳过登录。
+    :param config: 该账号的配置
+    :param warm_cache: 提供可复用的 Session、notifier 等依赖
+    :param retry_policy: 失败时的重试策略
+    :param on_phase: 进入新的阶段时调用；见 Program
+    :return: Program 的状态码
+    """
+    account = config.validate()
+    user = account.BUPT_SSO_USER
+
+    # 预先登录的 Session 只用一次，用完即关闭
+    prelogin_session = warm_cache.prelogin_pool.take(user)
 
     # 搭积木；手动建立各个类的实例，并注入依赖
-    notifiers = initialize_notifier(config)
-    pure_util = PureUtils()
     program = Program(
-        config=config,
-        program_utils=ProgramUtils(pure_util),
-        session=requests.Session(),
-        notifiers=notifiers,
+        config=account,
+        program_utils=warm_cache.program_utils,
+        session=prelogin_session if prelogin_session is not None else warm_cache.session_for(user),
+        notifiers=warm_cache.notifiers_for(account),
+        recorders=warm_cache.recorders,
+        retry_policy=retry_policy,
+        logged_in=prelogin_session is not None,
+        on_phase=on_phase,
     )
 
     # 运行程序
-    program.main()
+    if warm_cache.metrics is not None:
+        warm_cache.metrics.account_started()
+    try:
+        program.main()
+    finally:
+        if warm_cache.metrics is not None:
+            warm_cache.metrics.account_finished()
+        if prelogin_session is not None:
+            warm_cache.close_session(prelogin_session)
     return program.get_exit_status()
 
 
+def open_status_table(
+        config: Dict[str, Optional[ConfigValue]],
+        file_filler: Optional[FileFiller],
+        failed_users: Optional[List[str]],
+) -> Optional['StatusTable']:
+    """
+    新建各账号的状态表。状态表的大小须事先确定，因此会先数一遍要运行的账号。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param file_filler: 配置文件的 filler
+    :param failed_users: 重跑模式下要重新运行的账号；见 rerun_selection
+    :return: StatusTable；未设置 BNR_STATUS_SHM 时返回 None
+    """
+    if not config['BNR_STATUS_SHM']:
+        return None
+
+    from bupt_ncov_report import StatusTable
+
+    # 无法解析的行在运行时才报告
+    size = sum(1 for _ in select_accounts(config, file_filler, failed_users, on_error=lambda e: None))
+    return StatusTable.create(cast(str, config['BNR_STATUS_SHM']), size)
+
+
+def run_tracked_account(
+        account: ProgramConfig,
+        index: int,
+        warm_cache: WarmCache,
+        retry_policy: Optional[RetryPolicy],
+        status_table: Optional['StatusTable'],
+) -> int:
+    """
+    为一个账号上报，并在状态表中更新其状态。
+    :param account: 该账号的配置
+    :param index: 该账号的序号，即在状态表中的下标
+    :param warm_cache: 提供可复用的 Session、notifier 等依赖
+    :param retry_policy: 失败时的重试策略
+    :param status_table: 状态表；None 表示不更新
+    :return: Program 的状态码
+    """
+    if status_table is None:
+        return run_account(account, warm_cache, retry_policy)
+
+    status = Program.EXIT_FAILED
+    try:
+        status = run_account(account, warm_cache, retry_policy, on_phase=functools.partial(status_table.set, index))
+    finally:
+        status_table.finish(index, status == 0)
+    return status
+
+
+def select_accounts(
+        config: Dict[str, Optional[ConfigValue]],
+        file_filler: Optional[FileFiller],
+        failed_users: Optional[List[str]],
+        on_error: Callable[[ValueError], None] = report_bad_row,
+) -> Iterator[ProgramConfig]:
+    """
+    逐个生成要运行的账号的配置：重跑模式下只有失败的账号，否则是所有账号。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param file_filler: 配置文件的 filler
+    :param failed_users: 重跑模式下要重新运行的账号；见 rerun_selection
+    :param on_error: 账号列表中的某一行无法解析时调用，之后跳过该行
+    :return: 生成器，每个元素是一个账号的配置
+    """
+    if failed_users is None:
+        return iter_accounts(config, file_filler, on_error)
+    return iter_failed_accounts(config, file_filler, failed_users, on_error)
+
+
+def iter_failed_accounts(
+        config: Dict[str, Optional[ConfigValue]],
+        file_filler: Optional[FileFiller],
+        failed_users: List[str],
+        on_error: Callable[[ValueError], None] = report_bad_row,
+) -> Iterator[ProgramConfig]:
+    """
+    重跑模式：只取出失败的账号的配置。
+    账号列表文件通过索引直接定位到这些账号所在的行（见 lookup_roster），不解析其它行；其它来源的账号数很少，逐个比较即可。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param file_filler: 配置文件的 filler
+    :param failed_users: 要重新运行的账号
+    :param on_error: 账号列表中的某一行无法解析时调用，之后跳过该行
+    :return: 生成器，每个元素是一个账号的配置，按 failed_users 的顺序
+    """
+    shard = get_shard_spec(config)
+    users = [user for user in failed_users if shard is None or shard.owns(user)]
+
+    accounts: Iterable[ProgramConfig]
+    if config['BNR_ROSTER_PATH']:
+        from kv_config_reader import lookup_roster
+
+        accounts = lookup_roster(
+            cast(str, config['BNR_ROSTER_PATH']), CONFIG_SCHEMA, 'BUPT_SSO_USER', users,
+            base_config=config, on_error=on_error, config_class=AccountConfig)
+    else:
+        wanted = set(users)
+        accounts = (account for account in iter_all_accounts(config, file_filler, on_error)
+                    if account.BUPT_SSO_USER in wanted)
+
+    found = 0
+    for account in accounts:
+        found += 1
+        yield account
+
+    if found < len(users):
+        logger.debug(f'历史中有 {len(users) - found} 个失败的账号已不在账号列表中，不再运行')
+
+
+def prepare_batch(config: Dict[str, Optional[ConfigValue]], with_metrics: bool = True) -> WarmCache:
+    """
+    开始一批上报前的准备：取出跨调用保留的缓存，开始新的一批，并预先建立连接。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param with_metrics: 见 WarmCache
+    :return: WarmCache
+    """
+    warm_cache = get_warm_cache(config, with_metrics)
+    cast(LayoutCache, warm_cache.program_utils.layout_cache).start_batch()
+
+    # 预先建立连接，使各账号的第一个请求不必等待 DNS 解析与 TLS 握手
+    warm_cache.preconnect(config)
+    return warm_cache
+
+
+def rerun_selection(
+        config: Dict[str, Optional[ConfigValue]],
+        warm_cache: WarmCache,
+) -> Tuple[Optional[List[str]], Optional[RetryPolicy]]:
+    """
+    重跑模式：通过历史的索引找出失败的账号，只重新运行这些账号。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param warm_cache: 提供运行结果历史
+    :return: (要重新运行的账号, 重试策略)；不是重跑模式时均为 None
+    """
+    if not config['RERUN_FAILED']:
+        return None, None
+
+    history = cast('ResultHistory', warm_cache.history)
+    failed_users = history.failed_users(cast(Optional[str], config['RERUN_SINCE']))
+    print(f'重跑模式：历史中有 {len(failed_users)} 个账号最近一次运行失败。')
+    return failed_users, RetryPolicy()
+
+
+def should_run(account: ProgramConfig, failed_users: Optional[Set[str]]) -> bool:
+    """重跑模式下，只运行最近一次运行失败的账号。"""
+    if failed_users is not None and account.BUPT_SSO_USER not in failed_users:
+        logger.debug(f'账号 {account.BUPT_SSO_USER} 最近一次运行没有失败，无需重新运行')
+        return False
+
+    return True
+
+
+# 工作进程中，每个账号的时限比 BNR_DEADLINE 多出的秒数；超出时工作进程被终止
+PROCESS_TIMEOUT_MARGIN_SECONDS = 30
+# 从父进程继承的缓存；其中的连接与数据库连接不能在工作进程中使用，但也不能在工作进程中关闭，因此只保留引用
+_inherited_warm_cache: Optional[WarmCache] = None
+# 工作进程中打开的状态表；见 BNR_STATUS_SHM
+_worker_status_table: Optional['StatusTable'] = None
+
+
+def start_worker_process(config: Dict[str, Optional[ConfigValue]]) -> None:
+    """
+    工作进程启动时调用：丢弃从父进程继承的缓存，建立本进程自己的缓存并预先建立连接。
+    本进程的缓存不含运行指标：指标服务的端口由主进程占用，指标由主进程根据各账号的结果记录。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :return: None
+    """
+    global _warm_cache, _inherited_warm_cache, _worker_status_table
+
+    _inherited_warm_cache, _warm_cache = _warm_cache, None
+    prepare_batch(config, with_metrics=False)
+
+    if config['BNR_STATUS_SHM']:
+        from bupt_ncov_report import StatusTable
+        _worker_status_table = StatusTable.attach(cast(str, config['BNR_STATUS_SHM']))
+
+
+def stop_worker_process() -> None:
+    """工作进程退出前调用：写出缓冲中的运行结果，关闭本进程的缓存与状态表。"""
+    if _warm_cache is not None:
+        _warm_cache.close()
+    if _worker_status_table is not None:
+        _worker_status_table.close()
+
+
+def run_account_in_worker(
+        config: Dict[str, Optional[ConfigValue]],
+        retry_policy: Optional[RetryPolicy],
+        task: Tuple[int, ProgramConfig],
+) -> int:
+    """
+    在工作进程中为一个账号上报；见 run_in_process_pool。
+    每个账号结束后立即写出各 recorder 缓存的结果，工作进程之后崩溃或被杀死时不会丢失已完成账号的结果。
+    """
+    index, account = task
+    warm_cache = get_warm_cache(config, with_metrics=False)
+    try:
+        return run_tracked_account(account, index, warm_cache, retry_policy, _worker_status_table)
+    finally:
+        for recorder in warm_cache.recorders:
+            recorder.flush()
+
+
+def worker_error_class(error: Optional[str]) -> Optional[str]:
+    """
+    从 TaskOutcome 的错误信息中取出异常类名，用于运行指标。
+    :param error: TaskOutcome.error；任务函数抛出异常时形如「类名: 信息」
+    :return: 异常类名；工作进程崩溃或超时时为 WorkerError；没有出错时为 None
+    """
+    if error is None:
+        return None
+
+    name = error.split(':', 1)[0]
+    return name if name.isidentifier() else 'WorkerError'
+
+
+def run_in_process_pool(
+        config: Dict[str, Optional[ConfigValue]],
+        accounts: Iterable[Tuple[int, ProgramConfig]],
+        retry_policy: Optional[RetryPolicy],
+        status_table: Optional['StatusTable'],
+        metrics: Optional['Metrics'] = None,
+) -> int:
+    """
+    在 BNR_PROCESS_WORKERS 个预先启动的工作进程中逐个上报各账号。
+    一个账号使工作进程崩溃、或运行超过 BNR_DEADLINE 加 PROCESS_TIMEOUT_MARGIN_SECONDS 秒时，只有该账号失败。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :param accounts: 要上报的账号及其序号；见 select_accounts
+    :param retry_policy: 失败时的重试策略
+    :param status_table: 状态表；工作进程按名字打开它，本进程在工作进程崩溃或超时时更新它
+    :param metrics: 本进程的运行指标；工作进程不记录指标，由本进程根据各账号的结果记录
+    :return: 各账号的状态码中最大的一个
+    """
+    from bupt_ncov_report import ProcessPool
+
+    # 各账号交给工作进程的时间；工作进程空闲时才从 accounts 中取出下一个账号，取出即开始运行
+    started_at: Dict[int, float] = {}
+
+    def dispatch() -> Iterator[Tuple[int, ProgramConfig]]:
+        for index, account in accounts:
+            started_at[index] = time.monotonic()
+            if metrics is not None:
+                metrics.account_started()
+            yield index, account
+
+    deadline = cast(Optional[int], config['BNR_DEADLINE'])
+    max_rss_mb = cast(Optional[int], config['BNR_PROCESS_MAX_RSS_MB'])
+    pool: ProcessPool[Tuple[int, ProgramConfig]] = ProcessPool(
+        functools.partial(run_account_in_worker, config, retry_policy),
+        workers=cast(int, config['BNR_PROCESS_WORKERS']),
+        max_tasks=cast(int, config['BNR_PROCESS_MAX_TASKS']),
+        max_rss=max_rss_mb * 1024 * 1024 if max_rss_mb else None,
+        task_timeout=deadline + PROCESS_TIMEOUT_MARGIN_SECONDS if deadline is not None else None,
+        initializer=functools.partial(start_worker_process, config),
+        finalizer=stop_worker_process,
+    )
+
+    exit_status = 0
+    with pool:
+        for outcome in pool.run(dispatch()):
+            index, account = outcome.task
+            if outcome.error is not None:
+                print(f'账号 {account.BUPT_SSO_USER} 无法运行（工作进程 {outcome.pid}）：{outcome.error}')
+            status = outcome.status if outcome.status is not None else Program.EXIT_FAILED
+            if outcome.status is None and status_table is not None:
+                status_table.finish(index, False)
+            exit_status = max(exit_status, status)
+
+            duration = time.monotonic() - started_at.pop(index)
+            if metrics is not None:
+                metrics.account_finished()
+                # 工作进程中各阶段的耗时与通知的结果不传回本进程，只记录结果与总耗时
+                metrics.record(RunOutcome(
+                    account.BUPT_SSO_USER, beijing_date(), PHASE.DONE if status == 0 else PHASE.INIT, status == 0,
+                    worker_error_class(outcome.error), duration,
+                ))
+
+    return exit_status
+
+
+# 任务队列模式；见 BNR_QUEUE_MODE
+QUEUE_MODE_ENQUEUE = 'enqueue'
+QUEUE_MODE_WORKER = 'worker'
+# 队列中暂时没有可领取的账号（都被其它进程领取了）时，每隔多少秒查看一次
+QUEUE_POLL_SECONDS = 1.0
+# 描述一个账号的配置项；只有这些配置项会放入任务队列，worker 也只用队列中的这些配置项覆盖自己的配置
+QUEUE_ACCOUNT_KEYS = (
+    'BUPT_SSO_USER', 'BUPT_SSO_PASS', 'TG_BOT_TOKEN', 'TG_CHAT_ID', 'SERVER_CHAN_SCKEY', 'STOP_WHEN_SICK',
+)
+
+
+def make_queue_payload(config: Mapping[str, Optional[ConfigValue]], account: ProgramConfig) -> Dict[str, Optional[ConfigValue]]:
+    """
+    生成放入任务队列的账号配置：只含该账号与公共配置不同的账号配置项（以及账号本身）。
+    公共配置中的密码、token 与 BNR_* 设置不会放入队列，由 worker 自己的配置提供。
+    :param config: 通过 kv_config_reader 获取到的配置（所有账号共用的部分）
+    :param account: 该账号的配置
+    :return: 可编码为 JSON 的 dict
+    """
+    payload: Dict[str, Optional[ConfigValue]] = {'BUPT_SSO_USER': account.BUPT_SSO_USER}
+    for key in QUEUE_ACCOUNT_KEYS:
+        if account[key] != config[key]:
+            payload[key] = account[key]
+    return payload
+
+
+def open_work_queue(config: Mapping[str, Optional[ConfigValue]]) -> Optional['WorkQueue']:
+    """
+    打开任务队列。
+    :param config: 通过 kv_config_reader 获取到的配置
+    :return: WorkQueue；未设置 BNR_QUEUE_MODE 时返回 None
+    """
+    mode = config['BNR_QUEUE_MODE']
+    if not mode:
+        return None
+    if mode not in (QUEUE_MODE_ENQUEUE, QUEUE_MODE_WORKER):
+        raise ValueError(f'BNR_QUEUE_MODE 必须是 {QUEUE_MODE_ENQUEUE} 或 {QUEUE_MODE_WORKER}。')
+    if not config['BNR_QUEUE_PATH']:
+        raise ValueError('使用 BNR_QUEUE_MODE 时必须设置 BNR_QUEUE_PATH。')
+
+    from bupt_ncov_report import WorkQueue
+
+    return WorkQueue(
+        cast(str, config['BNR_QUEUE_PATH']),
+        visibility_timeout=cast(int, config['BNR_QUEUE_VISIBILITY_TIMEOUT']),
+        max_attempts=cast(int, config['BNR_QUEUE_MAX_ATTEMPTS']),
+    )
+
+
+def drain_work_queue(
+        config: Mapping[str, Optional[ConfigValue]],
+        queue: 'WorkQueue',
+        warm_cache: WarmCache,
+        retry_policy: Optional[RetryPolicy],
+) -> int:
+    """
+    任务队列的 worker：逐个领取账号并上报，成功时确认，失败时退回（等待重试或转入死信）。
+    队列中没有待处理的账号时返回；其它进程领取的账号尚未完成时，等待其完成或租约到期。
+    :param config: 通过 kv_config_reader 获取到的配置；队列中的账号配置项（QUEUE_ACCOUNT_KEYS）覆盖其中的值
+    :param queue: 任务队列
+    :param warm_cache: 提供可复用的 Session、notifier 等依赖
+    :param retry_policy: 失败时的重试策略
+    :return: 各账号的状态码中最大的一个
+    """
+    exit_status = 0
+    while True:
+        lease = queue.lease()
+        if lease is None:
+            wait_seconds = queue.next_visible_in()
+            if wait_seconds is None:
+                break
+            time.sleep(min(wait_seconds, QUEUE_POLL_SECONDS))
+            continue
+
+        error: Optional[str] = None
+        try:
+            per_account = {k: v for k, v in lease.payload.items() if k in QUEUE_ACCOUNT_KEYS}
+            account = AccountConfig.from_mapping({**config, **per_account})
+            status = run_account(account, warm_cache, retry_policy)
+        except Exception as e:
+            print(f'账号 {lease.payload.get("BUPT_SSO_USER")} 无法运行：{type(e).__name__}: {e}')
+            status, error = Program.EXIT_FAILED, f'{type(e).__name__}: {e}'
+
+        if status == 0:
+            still_leased = queue.ack(lease)
+        else:
+            still_leased = queue.nack(lease, error or f'状态码 {status}', delay=RetryPolicy().interval)
+        if not still_leased:
+            print(f'账号 {lease.payload.get("BUPT_SSO_USER")} 的租约已经过期，可能被其它进程重复上报；请调大 BNR_QUEUE_VISIBILITY_TIMEOUT。')
+
+        exit_status = max(exit_status, status)
+
+    return exit_status
+
+
+def main(*wtf: object, **kwwtf: object) -> object:
+    """
+    入口函数。该函数用于在允许直接运行的同时，兼容 GCP Cloud Function/AWS Lambda 等云函数平台。
+    容器被复用时（warm start），Session、notifier 等对象会被复用；见 WarmCache。
+    :return: 由检测到的平台决定
+    """
+
+    config: Dict[str, Optional[ConfigValue]] = initialize_config(CONFIG_SCHEMA)
+    file_filler = fill_config(config)
+    warm_cache = prepare_batch(config)
+
+    # 预先登录的时间段内：只登录各账号，保留登录后的 Session；设置了 BNR_PRELOGIN_WAIT 时等到时间段结束再上报。
+    # 不等待时，会话要留到容器被复用时的下一次调用；直接运行（云函数平台会传入参数）时进程随即退出，会话白白丢弃，
+    # 下一次运行还要再登录一遍，因此不预先登录，照常上报
+    window = warm_cache.prelogin_window
+    in_window = window is not None and not config['RERUN_FAILED'] and window.contains(beijing_now().time())
+    direct_run = len(wtf) == 0 and len(kwwtf) == 0
+    if in_window and direct_run and not config['BNR_PRELOGIN_WAIT']:
+        print('警告：直接运行时，预先登录的会话在进程退出时丢失，必须同时设置 BNR_PRELOGIN_WAIT；本次不预先登录，直接上报。')
+    elif window is not None and in_window:
+        count = prelogin_accounts(config, file_filler, warm_cache)
+        print(f'预先登录了 {count} 个账号。')
+        if not config['BNR_PRELOGIN_WAIT']:
+            return 0
+
+        time.sleep(window.seconds_until_end(beijing_now().time()))
+
+    failed_users, retry_policy = rerun_selection(config, warm_cache)
+    queue = open_work_queue(config)
+
+    # 账号列表中无法解析的行被跳过，算作失败
+    bad_rows: List[ValueError] = []
+
+    def on_bad_row(error: ValueError) -> None:
+        report_bad_row(error)
+        bad_rows.append(error)
+
+    exit_status = 0
+    if queue is None:
+        status_table = open_status_table(config, file_filler, failed_users)
+        accounts = enumerate(select_accounts(config, file_filler, failed_users, on_bad_row))
+        try:
+            if cast(int, config['BNR_PROCESS_WORKERS']) > 0:
+                exit_status = run_in_process_pool(config, accounts, retry_policy, status_table, warm_cache.metrics)
+            else:
+                for index, account in accounts:
+                    try:
+                        status = run_tracked_account(account, index, warm_cache, retry_policy, status_table)
+                    except Exception as e:
+                        print(f'账号 {account.BUPT_SSO_USER} 无法运行：{type(e).__name__}: {e}')
+                        status = Program.EXIT_FAILED
+                    exit_status = max(exit_status, status)
+        finally:
+            if status_table is not None:
+                status_table.close()
+    elif config['BNR_QUEUE_MODE'] == QUEUE_MODE_ENQUEUE:
+        with contextlib.closing(queue):
+            count = queue.enqueue(
+                make_queue_payload(config, account)
+                for account in select_accounts(config, file_filler, failed_users, on_bad_row))
+        print(f'已将 {count} 个账号放入任务队列。')
+    else:
+        with contextlib.closing(queue):
+            exit_status = drain_work_queue(config, queue, warm_cache, retry_policy)
+
+    if len(bad_rows) > 0:
+        exit_status = max(exit_status, Program.EXIT_FAILED)
+
+    # 写出缓冲中的运行结果；云函数平台可能在返回后冻结或回收容器
+    for recorder in warm_cache.recorders:
+        recorder.flush()
+
+    return exit_status
+
+
+# 扇出模式下，为平台的超时预留的秒数；剩余时间不足 FANOUT_MIN_SECONDS 时不再开始新的账号
+FANOUT_MARGIN_SECONDS = 5
+FANOUT_MIN_SECONDS = 10
+
+
+def parse_fan_out_offset(event: object) -> int:
+    """
+    从云函数的事件中读出从账号列表的第几个账号开始（即上一次调用返回的 next_offset）。
+    事件可以是形如 {"offset": 100} 的 dict，也可以是 data 字段为该 JSON 的 base64 编码的 Pub/Sub 消息。
+    :param event: 云函数的事件
+    :return: 偏移量；事件中没有时为 0
+    """
+    if not isinstance(event, dict):
+        return 0
+
+    if 'offset' not in event and isinstance(event.get('data'), str):
+        try:
+            event = json.loads(base64.b64decode(event['data']))
+        except ValueError:
+            return 0
+        if not isinstance(event, dict):
+            return 0
+
+    offset = int(event.get('offset') or 0)
+    if offset < 0:
+        raise ValueError(f'offset 不能为负数：{offset}')
+    return offset
+
+
+def remaining_time_reader(context: object, time_limit: int) -> Callable[[], float]:
+    """
+    返回读取本次调用剩余时间（秒）的函数。
+    AWS Lambda 的 context 提供 get_remaining_time_in_millis；其它平台按 time_limit 从现在起计时。
+    :param context: 云函数的 context
+    :param time_limit: 平台不提供剩余时间时，本次调用的时限（秒）
+    :return: 函数
+    """
+    get_remaining_ms = getattr(context, 'get_remaining_time_in_millis', None)
+    if callable(get_remaining_ms):
+        return lambda: cast(float, get_remaining_ms()) / 1000
+
+    end = time.monotonic() + time_limit
+    return lambda: end - time.monotonic()
+
+
+def fan_out(event: object = None, context: object = None) -> Dict[str, Optional[int]]:
+    """
+    云函数的扇出模式入口：在一次调用中并发地处理账号列表的一段。
+    从事件中的 offset 开始，用 BNR_FANOUT_WORKERS 个线程同时上报；剩余时间不足时不再开始新的账号，
+    并把每个账号的总时限（BNR_DEADLINE）缩短到本次调用结束之前，保证已开始的账号都能在超时前完成。
+
+    返回值中的 next_offset 是下一次调用应传入的 offset；账号列表已经处理完时为 None。
+    只要以 {"offset": next_offset} 为事件再次调用本函数（如通过 Step Functions 或 Pub/Sub），
+    就可以用一串调用处理完任意长的账号列表。
+
+    :param event: 云函数的事件；见 parse_fan_out_offset
+    :param context: 云函数的 context；见 remaining_time_reader
+    :return: dict，含 processed（本次运行的账号数）、failed（失败的账号数）、exit_status 与 next_offset
+    """
+    config: Dict[str, Optional[ConfigValue]] = initialize_config(CONFIG_SCHEMA)
+    file_filler = fill_config(config)
+    remaining = remaining_time_reader(context, cast(int, config['BNR_FANOUT_TIME_LIMIT']))
+    offset = parse_fan_out_offset(event)
+    workers = cast(int, config['BNR_FANOUT_WORKERS'])
+    if workers <= 0:
+        raise ValueError('BNR_FANOUT_WORKERS 必须大于 0。')
+
+    warm_cache = prepare_batch(config)
+    failed_list, retry_policy = rerun_selection(config, warm_cache)
+    # 失败的账号重跑成功后会从历史中消失，offset 须按完整的账号列表计算，因此扇出模式下仍然逐个比较
+    failed_users = set(failed_list) if failed_list is not None else None
+
+    def run(account: ProgramConfig) -> int:
+        try:
+            return run_account(account, warm_cache, retry_policy)
+        except Exception as e:
+            print(f'账号 {account.BUPT_SSO_USER} 无法运行：{type(e).__name__}: {e}')
+            return Program.EXIT_FAILED
+
+    statuses: List[int] = []
+    next_offset: Optional[int] = None
+    in_flight: Set['Future[int]'] = set()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bnr-fan-out') as executor:
+        for index, account in enumerate(itertools.islice(iter_accounts(config, file_filler), offset, None), offset):
+            if not should_run(account, failed_users):
+                continue
+
+            # 等待空闲的线程
+            while len(in_flight) >= workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                statuses.extend(future.result() for future in done)
+
+            budget = remaining() - FANOUT_MARGIN_SECONDS
+            if budget < FANOUT_MIN_SECONDS:
+                next_offset = index
+                break
+
+            deadline = account.BNR_DEADLINE
+            account = account.replace(BNR_DEADLINE=int(budget) if deadline is None else min(deadline, int(budget)))
+            in_flight.add(executor.submit(run, account))
+
+        statuses.extend(future.result() for future in wait(in_flight).done)
+
+    # 写出缓冲中的运行结果；云函数平台可能在返回后冻结或回收容器
+    for recorder in warm_cache.recorders:
+        recorder.flush()
+
+    if next_offset is not None:
+        print(f'剩余时间不足，下一次调用应从第 {next_offset} 个账号开始。')
+
+    return {
+        'processed': len(statuses),
+        'failed': sum(1 for status in statuses if status != 0),
+        'exit_status': max(statuses, default=0),
+        'next_offset': next_offset,
+    }
+
+
 if __name__ == '__main__':
     status_code = main()
     exit(status_code)